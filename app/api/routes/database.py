@@ -6,7 +6,6 @@ Questo modulo fornisce endpoint per monitorare e gestire il database SQLite.
 import os
 import json
 import sqlite3
-import shutil
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
@@ -14,7 +13,7 @@ from typing import Optional, Dict, Any, List
 
 # Importiamo il modello base di pydantic per la risposta di stato
 # from app.api.models import StatusResponse
-from app.utils.sqlite_metadata_manager import SQLiteMetadataManager
+from app.utils.sqlite_metadata_manager import SQLiteMetadataManager, backup_sqlite_file
 
 # Router per la gestione del database
 router = APIRouter(prefix="/admin/database", tags=["admin"])
@@ -149,8 +148,9 @@ async def create_database_backup():
         backup_filename = f"documents.{timestamp}.db.bak"
         backup_path = os.path.join(backup_dir, backup_filename)
         
-        # Crea il backup
-        shutil.copy2(db_path, backup_path)
+        # Crea il backup con l'API di backup di SQLite: il database è in WAL mode e
+        # la copia del file perderebbe i commit ancora in documents.db-wal
+        backup_sqlite_file(db_path, backup_path)
         
         return BackupResponse(
             success=True,
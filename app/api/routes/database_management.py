@@ -8,7 +8,6 @@ import os
 import logging
 import json
 import sqlite3
-import shutil
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from pathlib import Path
@@ -137,7 +136,6 @@ async def backup_document_db(background_tasks: BackgroundTasks):
         os.makedirs(backup_path, exist_ok=True)
         
         # Backup del database SQLite
-        db_source = doc_db.db_file
         db_dest = os.path.join(backup_path, "documents.db")
         
         # Utilizziamo la funzione esporta in JSON per un backup secondario
@@ -146,8 +144,11 @@ async def backup_document_db(background_tasks: BackgroundTasks):
         # Esegui il backup in background
         def do_backup():
             try:
-                # Copia il file del database
-                shutil.copy2(db_source, db_dest)
+                # Backup consistente del database (API di backup di SQLite: la copia
+                # del solo file .db perderebbe i commit ancora nel -wal)
+                if not doc_db.backup_database(db_dest):
+                    logger.error(f"Backup del database documenti fallito: {db_dest}")
+                    return
                 
                 # Esporta anche in JSON
                 doc_db.export_to_json(json_dest)
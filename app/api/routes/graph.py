@@ -3,6 +3,9 @@ Graph API Routes - Endpoint per gestione Knowledge Graph con normalizzazione
 
 Endpoints:
 - POST /graph/relationships - Crea relazione con normalizzazione predicato
+- POST /graph/relationships/bulk - Crea N relazioni in un'unica transazione
+- POST /graph/relationships/reinforce/bulk - Rinforza N relazioni in un'unica transazione
+- POST /graph/entities/bulk - Crea/arricchisce N entità in un'unica transazione
 - GET /graph/relationships - Query relazioni con filtri
 - POST /graph/relationships/query - Query avanzate con group_by
 - POST /graph/decay - Trigger decay service
@@ -17,7 +20,7 @@ from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 import logging
 
-from app.graph.graph_service import get_graph_service
+from app.graph.graph_service import get_graph_service, RelationshipConflictError
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +43,12 @@ class CreateRelationshipRequest(BaseModel):
     raw_relation: RawRelation
 
 
+class CreateRelationshipsBulkRequest(BaseModel):
+    """Request per creare più relazioni normalizzate in batch"""
+    user_id: str = Field("default", description="User identifier")
+    raw_relations: List[RawRelation] = Field(..., description="Relazioni raw, applicate in ordine")
+
+
 class QueryFilters(BaseModel):
     """Filtri per query avanzate"""
     relation_type: Optional[str] = Field(None, description="Filter by relation type (sentiment, ownership, etc.)")
@@ -55,6 +64,7 @@ class QueryRelationshipsRequest(BaseModel):
     filters: Optional[QueryFilters] = None
     group_by: Optional[str] = Field(None, description="Field to group by (es. 'target_type')")
     limit: int = Field(100, ge=1, le=1000, description="Max results")
+    include_metadata: bool = Field(True, description="Includi source_sentence e metadata nei risultati flat")
 
 
 class DecayRequest(BaseModel):
@@ -129,6 +139,16 @@ class ReinforceRelationshipRequest(BaseModel):
     source_sentence: Optional[str] = Field(None, description="Nuova frase sorgente")
 
 
+class ReinforceRelationshipBulkItem(ReinforceRelationshipRequest):
+    """Rinforzo di una relazione in un batch"""
+    rel_id: str = Field(..., description="ID della relazione")
+
+
+class ReinforceRelationshipsBulkRequest(BaseModel):
+    """Request per rinforzare più relazioni in batch"""
+    reinforcements: List[ReinforceRelationshipBulkItem] = Field(..., description="Rinforzi, applicati in ordine")
+
+
 class CreateEntityRequest(BaseModel):
     """Request per creare una nuova entità"""
     name: str = Field(..., description="Nome primario dell'entità")
@@ -142,6 +162,11 @@ class CreateEntityRequest(BaseModel):
     hints: Optional[Dict[str, Any]] = Field(None, description="Hint da Thalamus: {category: 'soggetto'}")
 
 
+class CreateEntitiesBulkRequest(BaseModel):
+    """Request per creare più entità in batch"""
+    entities: List[CreateEntityRequest] = Field(..., description="Entità, applicate in ordine")
+
+
 class FindOrCreateEntityRequest(BaseModel):
     """Request per find-or-create entità"""
     name: str = Field(..., description="Nome dell'entità da cercare/creare")
@@ -313,6 +338,48 @@ async def create_relationship(request: CreateRelationshipRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/relationships/bulk")
+async def create_relationships_bulk(request: CreateRelationshipsBulkRequest):
+    """
+    Crea più relazioni normalizzando i predicati RAW, in un'unica transazione.
+    
+    Stessa semantica di POST /relationships ripetuto per ogni elemento, in ordine
+    (una relazione ripetuta nel batch viene rinforzata). Se un elemento è invalido
+    non viene scritto nulla.
+    
+    Example request:
+    ```json
+    {
+        "user_id": "admin",
+        "raw_relations": [
+            {"subject": "user_admin", "predicate": "esprimere_gradimento_per", "object": "pizza_margherita"},
+            {"subject": "user_admin", "predicate": "lavorare_presso", "object": "org:acme"}
+        ]
+    }
+    ```
+    
+    Example response:
+    ```json
+    {
+        "relationships": [...],
+        "count": 2
+    }
+    ```
+    """
+    try:
+        service = get_graph_service()
+        results = await service.create_relationships_from_raw_bulk(
+            user_id=request.user_id,
+            raw_relations=[r.model_dump() for r in request.raw_relations]
+        )
+        return {"relationships": results, "count": len(results)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating relationships in bulk: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/relationships")
 async def get_relationships(
     user_id: str = Query("default", description="User identifier"),
@@ -324,7 +391,8 @@ async def get_relationships(
     min_strength: Optional[float] = Query(None, ge=0.0, le=1.0, description="Minimum strength"),
     status: str = Query("active", description="Status filter"),
     limit: int = Query(50, ge=1, le=200, description="Max results"),
-    offset: int = Query(0, ge=0, description="Pagination offset")
+    offset: int = Query(0, ge=0, description="Pagination offset"),
+    include_metadata: bool = Query(True, description="Include source_sentence and metadata")
 ):
     """
     Query relazioni con filtri.
@@ -352,7 +420,8 @@ async def get_relationships(
             min_strength=min_strength,
             status=status,
             limit=limit,
-            offset=offset
+            offset=offset,
+            include_metadata=include_metadata
         )
         return result
     except Exception as e:
@@ -407,7 +476,8 @@ async def query_relationships(request: QueryRelationshipsRequest):
             user_id=request.user_id,
             filters=filters,
             group_by=request.group_by,
-            limit=request.limit
+            limit=request.limit,
+            include_metadata=request.include_metadata
         )
         return result
     except Exception as e:
@@ -458,6 +528,8 @@ async def update_relationship(rel_id: str, request: UpdateRelationshipRequest):
     ```
     
     Returns 404 se non trovata.
+    Returns 409 se status="active" riattiverebbe una relazione quando ne esiste già
+    una attiva con lo stesso (from, to, relation_type).
     """
     try:
         service = get_graph_service()
@@ -474,6 +546,8 @@ async def update_relationship(rel_id: str, request: UpdateRelationshipRequest):
         return result
     except HTTPException:
         raise
+    except RelationshipConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating relationship: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -558,6 +632,45 @@ async def reinforce_relationship(rel_id: str, request: ReinforceRelationshipRequ
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/relationships/reinforce/bulk")
+async def reinforce_relationships_bulk(request: ReinforceRelationshipsBulkRequest):
+    """
+    Rinforza più relazioni in un'unica transazione.
+    
+    Stessa semantica di POST /relationships/{rel_id}/reinforce ripetuto per ogni
+    elemento, in ordine. Le relazioni non trovate restano `null` nella risposta.
+    
+    Example request:
+    ```json
+    {
+        "reinforcements": [
+            {"rel_id": "rel:user_admin_to_pizza_margherita_1a2b3c4d", "strength_boost": 0.1},
+            {"rel_id": "rel:user_admin_to_org:acme_5e6f7a8b", "source_sentence": "Lavoro ancora in Acme"}
+        ]
+    }
+    ```
+    
+    Example response:
+    ```json
+    {
+        "relationships": [{...}, null],
+        "count": 2
+    }
+    ```
+    """
+    try:
+        service = get_graph_service()
+        results = await service.reinforce_relationships_bulk(
+            reinforcements=[r.model_dump() for r in request.reinforcements]
+        )
+        return {"relationships": results, "count": len(results)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reinforcing relationships in bulk: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ==================== RELATIONSHIP EVENT HISTORY ====================
 
 @router.get("/relationships/{rel_id}/events")
@@ -888,6 +1001,46 @@ async def create_entity(request: CreateEntityRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/entities/bulk")
+async def create_entities_bulk(request: CreateEntitiesBulkRequest):
+    """
+    Crea o arricchisce più entità in un'unica transazione.
+    
+    Stessa semantica di POST /entities ripetuto per ogni elemento, in ordine
+    (un'entità ripetuta nel batch viene arricchita). Se un elemento è invalido
+    non viene scritto nulla.
+    
+    Example request:
+    ```json
+    {
+        "entities": [
+            {"name": "Fabrizio Rossi", "entity_type": "person", "aliases": ["Fab"]},
+            {"name": "Google Italia", "entity_type": "auto", "context": "Lavoro per Google Italia"}
+        ]
+    }
+    ```
+    
+    Example response:
+    ```json
+    {
+        "entities": [...],
+        "count": 2
+    }
+    ```
+    """
+    try:
+        service = get_graph_service()
+        results = await service.create_entities_bulk(
+            entities=[e.model_dump() for e in request.entities]
+        )
+        return {"entities": results, "count": len(results)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating entities in bulk: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/entities/{entity_id:path}")
 async def get_entity(entity_id: str):
     """
@@ -17,6 +17,12 @@ from app.graph.data_models import (
     StoredEntity,
     StoredRelationship,
     RelationshipEvent,
+    RelationMeta,
+    SentimentMeta,
+    OwnershipMeta,
+    EmploymentMeta,
+    LocationMeta,
+    FamilyMeta,
     PREDICATE_TO_CATEGORY_HINTS,
     CATEGORY_EXEMPLARS
 )
@@ -30,6 +36,12 @@ __all__ = [
     "StoredEntity",
     "StoredRelationship",
     "RelationshipEvent",
+    "RelationMeta",
+    "SentimentMeta",
+    "OwnershipMeta",
+    "EmploymentMeta",
+    "LocationMeta",
+    "FamilyMeta",
     "PREDICATE_TO_CATEGORY_HINTS",
     "CATEGORY_EXEMPLARS",
     "PredicateNormalizer",
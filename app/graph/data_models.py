@@ -9,12 +9,64 @@ Adapted: February 2026
 """
 
 import json
-from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+import time
+from types import MappingProxyType
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterable, List, Any, Mapping, Optional, Union
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 
 
+# ==================== TIMESTAMPS ====================
+# Timestamps are stored in memory as int64 epoch nanoseconds (UTC) and
+# converted to ISO-8601 ("...Z") only at the dict/JSON boundary.
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _now_ns() -> int:
+    """Current UTC time as epoch nanoseconds"""
+    return time.time_ns()
+
+
+def ns_to_iso(ns: int) -> str:
+    """Convert epoch nanoseconds to ISO-8601 with 'Z' suffix (same format as utcnow().isoformat() + 'Z')"""
+    return (_EPOCH + timedelta(microseconds=ns // 1000)).isoformat() + "Z"
+
+
+def to_epoch_ns(value: Any) -> Optional[int]:
+    """
+    Normalize a timestamp to epoch nanoseconds.
+    
+    Accepts int epoch-ns, float epoch-seconds (time.time() style), ISO-8601
+    strings (with or without 'Z'/offset) and datetime objects.
+    Returns None for None or unparsable values.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        # epoch float = secondi, non nanosecondi
+        return round(value * 1_000_000_000)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value[:-1] if value.endswith("Z") else value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return (value - _EPOCH) // timedelta(microseconds=1) * 1000
+    return None
+
+
+def _ns_or_none_to_iso(ns: Optional[int]) -> Optional[str]:
+    return None if ns is None else ns_to_iso(ns)
+
+
 class EntityType(str, Enum):
     """Types of entities in the knowledge graph"""
     PERSON = "person"
@@ -28,6 +80,24 @@ class EntityType(str, Enum):
     SELF = "self"       # Mind itself (singleton)
     FOOD = "food"       # Food items (pizza, etc.)
     UNKNOWN = "unknown"
+    
+    @classmethod
+    def parse(cls, value: Any, default: Optional["EntityType"] = None) -> "EntityType":
+        """
+        Lookup member by value without raising on unknown values.
+        
+        Reads the Enum value map directly instead of going through
+        EntityType(value), which raises (and costs an exception) on a miss.
+        """
+        if isinstance(value, cls):
+            return value
+        try:
+            member = cls._value2member_map_.get(value)
+        except TypeError:  # unhashable input
+            member = None
+        if member is None:
+            return cls.UNKNOWN if default is None else default
+        return member
 
 
 class RelationCategory(str, Enum):
@@ -58,7 +128,7 @@ class RelationCategory(str, Enum):
     UNKNOWN = "unknown"              # Cannot categorize
 
 
-@dataclass
+@dataclass(slots=True, init=False)
 class StoredEntity:
     """
     Persistent entity representation for storage.
@@ -74,17 +144,67 @@ class StoredEntity:
     
     # Memory enrichment (cached from episodic/semantic)
     memory_summary: str = ""
-    last_interaction: Optional[str] = None
+    last_interaction: Optional[int] = None  # epoch ns
     interaction_count: int = 0
     sentiment_score: float = 0.0  # -1.0 to 1.0
     
-    # Metadata
-    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
-    updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+    # Metadata (epoch ns, serialized as ISO-8601 by to_dict)
+    created_at: int = field(default_factory=_now_ns)
+    updated_at: int = field(default_factory=_now_ns)
     confidence: float = 1.0
     source: str = "extraction"  # extraction, user_declared, inferred
     status: str = "active"
     
+    # Hand-written __init__ (init=False above): the generated one calls every
+    # default_factory on each construction, including the two timestamp factories.
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        canonical_name: str,
+        entity_type: EntityType,
+        aliases: Optional[List[str]] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        memory_summary: str = "",
+        last_interaction: Optional[int] = None,
+        interaction_count: int = 0,
+        sentiment_score: float = 0.0,
+        created_at: Optional[int] = None,
+        updated_at: Optional[int] = None,
+        confidence: float = 1.0,
+        source: str = "extraction",
+        status: str = "active"
+    ):
+        if created_at is None or updated_at is None:
+            now = _now_ns()
+            if created_at is None:
+                created_at = now
+            if updated_at is None:
+                updated_at = now
+        self.id = id
+        self.name = name
+        self.canonical_name = canonical_name
+        self.entity_type = entity_type
+        self.aliases = aliases if aliases is not None else []
+        self.attributes = attributes if attributes is not None else {}
+        self.memory_summary = memory_summary
+        self.last_interaction = last_interaction
+        self.interaction_count = interaction_count
+        self.sentiment_score = sentiment_score
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.confidence = confidence
+        self.source = source
+        self.status = status
+    
+    @property
+    def created_at_iso(self) -> str:
+        return ns_to_iso(self.created_at)
+    
+    @property
+    def updated_at_iso(self) -> str:
+        return ns_to_iso(self.updated_at)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for storage"""
         return {
@@ -95,46 +215,168 @@ class StoredEntity:
             "aliases": self.aliases,
             "attributes": self.attributes,
             "memory_summary": self.memory_summary,
-            "last_interaction": self.last_interaction,
+            "last_interaction": _ns_or_none_to_iso(self.last_interaction),
             "interaction_count": self.interaction_count,
             "sentiment_score": self.sentiment_score,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
+            "created_at": ns_to_iso(self.created_at),
+            "updated_at": ns_to_iso(self.updated_at),
             "confidence": self.confidence,
             "source": self.source,
             "status": self.status
         }
     
+    @classmethod
+    def from_records(cls, rows: Iterable[Mapping[str, Any]]) -> List["StoredEntity"]:
+        """Bulk variant of from_dict (map() keeps the per-row loop in C)"""
+        return list(map(cls.from_dict, rows))
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "StoredEntity":
         """Create from dictionary"""
-        entity_type = data.get("entity_type", "unknown")
-        if isinstance(entity_type, str):
-            try:
-                entity_type = EntityType(entity_type)
-            except ValueError:
-                entity_type = EntityType.UNKNOWN
-        
+        get = data.get  # local bind: from_dict is the bulk-load hot path
+        canonical_name = get("canonical_name")
+        if canonical_name is None:
+            canonical_name = get("name", "").lower()
         return cls(
-            id=data.get("id", ""),
-            name=data.get("name", ""),
-            canonical_name=data.get("canonical_name", data.get("name", "").lower()),
-            entity_type=entity_type,
-            aliases=data.get("aliases", []),
-            attributes=data.get("attributes", {}),
-            memory_summary=data.get("memory_summary", ""),
-            last_interaction=data.get("last_interaction"),
-            interaction_count=data.get("interaction_count", 0),
-            sentiment_score=data.get("sentiment_score", 0.0),
-            created_at=data.get("created_at", datetime.utcnow().isoformat() + "Z"),
-            updated_at=data.get("updated_at", datetime.utcnow().isoformat() + "Z"),
-            confidence=data.get("confidence", 1.0),
-            source=data.get("source", "extraction"),
-            status=data.get("status", "active")
+            id=get("id", ""),
+            name=get("name", ""),
+            canonical_name=canonical_name,
+            entity_type=EntityType.parse(get("entity_type", "unknown")),
+            aliases=get("aliases", []),
+            attributes=get("attributes", {}),
+            memory_summary=get("memory_summary", ""),
+            last_interaction=to_epoch_ns(get("last_interaction")),
+            interaction_count=get("interaction_count", 0),
+            sentiment_score=get("sentiment_score", 0.0),
+            created_at=to_epoch_ns(get("created_at")),
+            updated_at=to_epoch_ns(get("updated_at")),
+            confidence=get("confidence", 1.0),
+            source=get("source", "extraction"),
+            status=get("status", "active")
         )
 
 
-@dataclass
+# ==================== TYPED RELATIONSHIP METADATA ====================
+# Slot-based typed views for the metadata of the most common categories
+# (StoredRelationship.meta_view()). StoredRelationship.metadata stays a plain dict:
+# the view is an opt-in accessor with attribute access and a compact footprint.
+# to_dict() returns exactly the keys that were present in the source dict,
+# including keys present with a None value.
+
+_META_FIELD_NAMES: Dict[type, tuple] = {}
+
+
+def _meta_field_names(meta_cls: type) -> tuple:
+    """Field names of a RelationMeta class (computed once per class)"""
+    names = _META_FIELD_NAMES.get(meta_cls)
+    if names is None:
+        names = tuple(f.name for f in fields(meta_cls) if not f.name.startswith("_"))
+        _META_FIELD_NAMES[meta_cls] = names
+    return names
+
+
+@dataclass(slots=True)
+class RelationMeta:
+    """Base class for typed relationship metadata (common normalization fields)"""
+    normalization_method: Optional[str] = None
+    normalization_confidence: Optional[float] = None
+    # Keys of the source dict (from_dict): serialized even when their value is None
+    _present: tuple = field(default=(), init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["RelationMeta"]:
+        """
+        Create the typed view from a metadata dict.
+        
+        Returns None if the dict has keys outside the schema, so the caller
+        can keep the original dict unchanged.
+        """
+        if not set(_meta_field_names(cls)).issuperset(data):
+            return None
+        meta = cls(**data)
+        meta._present = tuple(data)
+        return meta
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary: source-dict keys plus any field set to a non-None value"""
+        result = {}
+        present = self._present
+        for name in _meta_field_names(type(self)):
+            value = getattr(self, name)
+            if value is not None or name in present:
+                result[name] = value
+        return result
+
+
+@dataclass(slots=True)
+class SentimentMeta(RelationMeta):
+    """Metadata for relation_type=sentiment"""
+    valence: Optional[str] = None
+    intensity: Optional[float] = None
+    aspect: Optional[str] = None
+
+
+@dataclass(slots=True)
+class OwnershipMeta(RelationMeta):
+    """Metadata for relation_type=ownership"""
+    valence: Optional[str] = None
+    intensity: Optional[float] = None
+    aspect: Optional[str] = None
+    direction: Optional[str] = None
+    acquired_date: Optional[str] = None
+    shared_with: Optional[List[str]] = None
+
+
+@dataclass(slots=True)
+class EmploymentMeta(RelationMeta):
+    """Metadata for relation_type=employment"""
+    valence: Optional[str] = None
+    intensity: Optional[float] = None
+    aspect: Optional[str] = None
+    role: Optional[str] = None
+    since: Optional[str] = None
+
+
+@dataclass(slots=True)
+class LocationMeta(RelationMeta):
+    """Metadata for relation_type=location"""
+    valence: Optional[str] = None
+    intensity: Optional[float] = None
+    type: Optional[str] = None
+
+
+@dataclass(slots=True)
+class FamilyMeta(RelationMeta):
+    """Metadata for relation_type=family"""
+    valence: Optional[str] = None
+    intensity: Optional[float] = None
+    relation: Optional[str] = None
+    confirmed: Optional[bool] = None
+
+
+RELATION_META_TYPES: Dict[str, type] = {
+    "sentiment": SentimentMeta,
+    "ownership": OwnershipMeta,
+    "employment": EmploymentMeta,
+    "location": LocationMeta,
+    "family": FamilyMeta,
+}
+
+
+def parse_relation_metadata(relation_type: str, data: Dict[str, Any]) -> Union[RelationMeta, Dict[str, Any]]:
+    """
+    Convert relationship metadata to its typed view when the category is known.
+    
+    Unknown categories and dicts with out-of-schema keys are returned unchanged.
+    """
+    meta_cls = RELATION_META_TYPES.get(relation_type)
+    if meta_cls is None or not isinstance(data, dict):
+        return data
+    meta = meta_cls.from_dict(data)
+    return data if meta is None else meta
+
+
+@dataclass(slots=True, init=False)
 class StoredRelationship:
     """
     Persistent relationship representation for storage.
@@ -161,7 +403,7 @@ class StoredRelationship:
     predicate_surface: Optional[str] = None  # Surface form before canonicalization
     source_sentence: Optional[str] = None    # Original user sentence
     
-    # Normalized metadata (varies by relation_type)
+    # Normalized metadata (varies by relation_type); typed view: meta_view()
     metadata: Dict[str, Any] = field(default_factory=dict)
     # For sentiment: {"valence": "positive", "intensity": 0.8, "aspect": "preference"}
     # For ownership: {"acquired_date": "...", "shared_with": [...]}
@@ -175,7 +417,7 @@ class StoredRelationship:
     
     # Evidence tracking
     evidence_count: int = 1
-    last_evidence: Optional[str] = None
+    last_evidence: Optional[int] = None  # epoch ns
     
     # Temporal qualifiers (from Thalamus v3.0)
     valid_from: Optional[str] = None  # ISO date or null
@@ -183,13 +425,85 @@ class StoredRelationship:
     negation: bool = False             # "NON più", "NON è"
     modality: str = "asserted"         # asserted, uncertain, inferred, negated
     
-    # Metadata
-    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
-    updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
-    last_reinforced: Optional[str] = None  # Last confirmation/mention
+    # Metadata (epoch ns, serialized as ISO-8601 by to_dict)
+    created_at: int = field(default_factory=_now_ns)
+    updated_at: int = field(default_factory=_now_ns)
+    last_reinforced: Optional[int] = None  # Last confirmation/mention
     source: str = "extraction"  # extraction, user_declared, inferred
     status: str = "active"
     
+    def __init__(
+        self,
+        id: str,
+        source_entity_id: str,
+        target_entity_id: str,
+        relation_type: str,
+        original_predicate: str,
+        predicate_surface: Optional[str] = None,
+        source_sentence: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        strength: float = 1.0,
+        confidence: float = 1.0,
+        bidirectional: bool = False,
+        evidence_count: int = 1,
+        last_evidence: Optional[int] = None,
+        valid_from: Optional[str] = None,
+        valid_to: Optional[str] = None,
+        negation: bool = False,
+        modality: str = "asserted",
+        created_at: Optional[int] = None,
+        updated_at: Optional[int] = None,
+        last_reinforced: Optional[int] = None,
+        source: str = "extraction",
+        status: str = "active"
+    ):
+        if created_at is None or updated_at is None:
+            now = _now_ns()
+            if created_at is None:
+                created_at = now
+            if updated_at is None:
+                updated_at = now
+        self.id = id
+        self.source_entity_id = source_entity_id
+        self.target_entity_id = target_entity_id
+        self.relation_type = relation_type
+        self.original_predicate = original_predicate
+        self.predicate_surface = predicate_surface
+        self.source_sentence = source_sentence
+        self.metadata = metadata if metadata is not None else {}
+        self.strength = strength
+        self.confidence = confidence
+        self.bidirectional = bidirectional
+        self.evidence_count = evidence_count
+        self.last_evidence = last_evidence
+        self.valid_from = valid_from
+        self.valid_to = valid_to
+        self.negation = negation
+        self.modality = modality
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.last_reinforced = last_reinforced
+        self.source = source
+        self.status = status
+    
+    @property
+    def created_at_iso(self) -> str:
+        return ns_to_iso(self.created_at)
+    
+    @property
+    def updated_at_iso(self) -> str:
+        return ns_to_iso(self.updated_at)
+    
+    def meta_view(self) -> Optional[RelationMeta]:
+        """
+        Typed view of metadata for the known categories (RELATION_META_TYPES).
+        
+        Returns None for other categories or when metadata has out-of-schema keys.
+        The view is a copy: changes to it are not written back to metadata.
+        """
+        meta = parse_relation_metadata(self.relation_type, self.metadata)
+        return meta if isinstance(meta, RelationMeta) else None
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for storage"""
         return {
@@ -205,51 +519,77 @@ class StoredRelationship:
             "confidence": self.confidence,
             "bidirectional": self.bidirectional,
             "evidence_count": self.evidence_count,
-            "last_evidence": self.last_evidence,
+            "last_evidence": _ns_or_none_to_iso(self.last_evidence),
             "valid_from": self.valid_from,
             "valid_to": self.valid_to,
             "negation": self.negation,
             "modality": self.modality,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-            "last_reinforced": self.last_reinforced,
+            "created_at": ns_to_iso(self.created_at),
+            "updated_at": ns_to_iso(self.updated_at),
+            "last_reinforced": _ns_or_none_to_iso(self.last_reinforced),
             "source": self.source,
             "status": self.status
         }
     
+    @classmethod
+    def from_records(cls, rows: Iterable[Mapping[str, Any]]) -> List["StoredRelationship"]:
+        """Bulk variant of from_dict (map() keeps the per-row loop in C)"""
+        return list(map(cls.from_dict, rows))
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "StoredRelationship":
         """Create from dictionary"""
+        get = data.get
+        relation_type = get("relation_type")
+        if relation_type is None:
+            relation_type = get("type", "unknown")
         return cls(
-            id=data.get("id", ""),
-            source_entity_id=data.get("source_entity_id", data.get("from_entity_id", "")),
-            target_entity_id=data.get("target_entity_id", data.get("to_entity_id", "")),
-            relation_type=data.get("relation_type", data.get("type", "unknown")),
-            original_predicate=data.get("original_predicate", data.get("predicate", "")),
-            predicate_surface=data.get("predicate_surface"),
-            source_sentence=data.get("source_sentence"),
-            metadata=data.get("metadata", {}),
-            strength=data.get("strength", 1.0),
-            confidence=data.get("confidence", 1.0),
-            bidirectional=data.get("bidirectional", False),
-            evidence_count=data.get("evidence_count", 1),
-            last_evidence=data.get("last_evidence"),
-            valid_from=data.get("valid_from"),
-            valid_to=data.get("valid_to"),
-            negation=data.get("negation", False),
-            modality=data.get("modality", "asserted"),
-            created_at=data.get("created_at", datetime.utcnow().isoformat() + "Z"),
-            updated_at=data.get("updated_at", datetime.utcnow().isoformat() + "Z"),
-            last_reinforced=data.get("last_reinforced"),
-            source=data.get("source", "extraction"),
-            status=data.get("status", "active")
+            id=get("id", ""),
+            source_entity_id=get("source_entity_id", get("from_entity_id", "")),
+            target_entity_id=get("target_entity_id", get("to_entity_id", "")),
+            relation_type=relation_type,
+            original_predicate=get("original_predicate", get("predicate", "")),
+            predicate_surface=get("predicate_surface"),
+            source_sentence=get("source_sentence"),
+            metadata=get("metadata", {}),
+            strength=get("strength", 1.0),
+            confidence=get("confidence", 1.0),
+            bidirectional=get("bidirectional", False),
+            evidence_count=get("evidence_count", 1),
+            last_evidence=to_epoch_ns(get("last_evidence")),
+            valid_from=get("valid_from"),
+            valid_to=get("valid_to"),
+            negation=get("negation", False),
+            modality=get("modality", "asserted"),
+            created_at=to_epoch_ns(get("created_at")),
+            updated_at=to_epoch_ns(get("updated_at")),
+            last_reinforced=to_epoch_ns(get("last_reinforced")),
+            source=get("source", "extraction"),
+            status=get("status", "active")
         )
 
 
 # ==================== PREDICATE NORMALIZATION HINTS ====================
 # These are hints for implementing normalization in MindMemoryService
 
-PREDICATE_TO_CATEGORY_HINTS: Dict[str, Dict[str, Any]] = {
+def _canonical_hints(hints: Dict[str, Dict[str, Any]]) -> Dict[str, Mapping[str, Any]]:
+    """
+    Many hints share identical content: keep one read-only mapping per unique
+    content, so equal hints are also the same object (`is` comparisons work).
+    Predicate order and the key order of each hint are preserved.
+    """
+    shared: Dict[frozenset, Mapping[str, Any]] = {}
+    result = {}
+    for predicate, hint in hints.items():
+        key = frozenset(hint.items())
+        canonical = shared.get(key)
+        if canonical is None:
+            canonical = shared[key] = MappingProxyType(dict(hint))
+        result[predicate] = canonical
+    return result
+
+
+PREDICATE_TO_CATEGORY_HINTS: Dict[str, Mapping[str, Any]] = _canonical_hints({
     # Sentiment (positive)
     "esprimere_gradimento_per": {"category": "sentiment", "valence": "positive", "intensity": 0.7},
     "piacere": {"category": "sentiment", "valence": "positive", "intensity": 0.6},
@@ -316,7 +656,7 @@ PREDICATE_TO_CATEGORY_HINTS: Dict[str, Dict[str, Any]] = {
     # Identity / Attribute
     "essere": {"category": "identity", "valence": "neutral", "intensity": 0.9},
     "chiamarsi": {"category": "identity", "valence": "neutral", "intensity": 0.95, "aspect": "name"},
-}
+})
 
 # For unknown predicates, use embedding similarity to these category exemplars
 CATEGORY_EXEMPLARS: Dict[str, List[str]] = {
@@ -333,7 +673,7 @@ CATEGORY_EXEMPLARS: Dict[str, List[str]] = {
 
 # ==================== RELATIONSHIP EVENT MODEL ====================
 
-@dataclass
+@dataclass(slots=True, init=False)
 class RelationshipEvent:
     """
     Event log entry for relationship changes.
@@ -358,11 +698,39 @@ class RelationshipEvent:
     source_sentence: Optional[str] = None  # Original sentence that triggered this event
     
     # Metadata
-    timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+    timestamp: int = field(default_factory=_now_ns)  # epoch ns
     normalization_method: str = "direct"  # direct, partial, embedding
     normalization_confidence: float = 1.0
     metadata: Dict[str, Any] = field(default_factory=dict)
     
+    def __init__(
+        self,
+        event_id: str,
+        rel_id: str,
+        predicate: str,
+        valence: float,
+        intensity: float,
+        source_sentence: Optional[str] = None,
+        timestamp: Optional[int] = None,
+        normalization_method: str = "direct",
+        normalization_confidence: float = 1.0,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.event_id = event_id
+        self.rel_id = rel_id
+        self.predicate = predicate
+        self.valence = valence
+        self.intensity = intensity
+        self.source_sentence = source_sentence
+        self.timestamp = timestamp if timestamp is not None else _now_ns()
+        self.normalization_method = normalization_method
+        self.normalization_confidence = normalization_confidence
+        self.metadata = metadata if metadata is not None else {}
+    
+    @property
+    def timestamp_iso(self) -> str:
+        return ns_to_iso(self.timestamp)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for storage"""
         return {
@@ -372,26 +740,37 @@ class RelationshipEvent:
             "valence": self.valence,
             "intensity": self.intensity,
             "source_sentence": self.source_sentence,
-            "timestamp": self.timestamp,
+            "timestamp": ns_to_iso(self.timestamp),
             "normalization_method": self.normalization_method,
             "normalization_confidence": self.normalization_confidence,
             "metadata": self.metadata
         }
     
+    @classmethod
+    def from_records(cls, rows: Iterable[Mapping[str, Any]]) -> List["RelationshipEvent"]:
+        """Bulk variant of from_dict (map() keeps the per-row loop in C)"""
+        return list(map(cls.from_dict, rows))
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any]) -> List["RelationshipEvent"]:
+        """Bulk variant of from_row for cursor.fetchall() results"""
+        return list(map(cls.from_row, rows))
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "RelationshipEvent":
         """Create from dictionary"""
+        get = data.get
         return cls(
-            event_id=data.get("event_id", ""),
-            rel_id=data.get("rel_id", ""),
-            predicate=data.get("predicate", ""),
-            valence=data.get("valence", 0.0),
-            intensity=data.get("intensity", 0.5),
-            source_sentence=data.get("source_sentence"),
-            timestamp=data.get("timestamp", datetime.utcnow().isoformat() + "Z"),
-            normalization_method=data.get("normalization_method", "direct"),
-            normalization_confidence=data.get("normalization_confidence", 1.0),
-            metadata=data.get("metadata", {})
+            event_id=get("event_id", ""),
+            rel_id=get("rel_id", ""),
+            predicate=get("predicate", ""),
+            valence=get("valence", 0.0),
+            intensity=get("intensity", 0.5),
+            source_sentence=get("source_sentence"),
+            timestamp=to_epoch_ns(get("timestamp")),
+            normalization_method=get("normalization_method", "direct"),
+            normalization_confidence=get("normalization_confidence", 1.0),
+            metadata=get("metadata", {})
         )
     
     @classmethod
@@ -404,6 +783,13 @@ class RelationshipEvent:
             except:
                 pass
         
+        # Un timestamp illeggibile non deve diventare "adesso"
+        timestamp = to_epoch_ns(row["timestamp"])
+        if timestamp is None:
+            raise ValueError(
+                f"Invalid timestamp for relationship event {row['event_id']}: {row['timestamp']!r}"
+            )
+        
         return cls(
             event_id=row["event_id"],
             rel_id=row["rel_id"],
@@ -411,7 +797,7 @@ class RelationshipEvent:
             valence=row["valence"],
             intensity=row["intensity"],
             source_sentence=row["source_sentence"],
-            timestamp=row["timestamp"],
+            timestamp=timestamp,
             normalization_method=row["normalization_method"],
             normalization_confidence=row["normalization_confidence"],
             metadata=metadata
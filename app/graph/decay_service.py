@@ -13,9 +13,15 @@ Source: PramaIA-Mind/Mind/world_model/entity_decay_service.py
 Adapted: February 2026
 """
 
+import asyncio
 import logging
+import math
+import sqlite3
+import threading
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+
+from app.graph.graph_schema import ensure_graph_schema_once
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +33,9 @@ class GraphDecayService:
     Decay logic:
     - Entità non usate → confidence decade verso 0
     - Relazioni non confermate → strength decade verso 0
+    - Decay esponenziale: value * retention^giorni (idempotente rispetto alla frequenza dei run)
     - Decay rate dipende da:
-      1. Tempo da last_interaction / last_reinforced
+      1. Tempo da updated_at / ultimo decay applicato
       2. Interaction count (entità usate di più decadono più lentamente)
       3. Confidence/strength attuale
       4. Source (user_declared protette da decay)
@@ -50,8 +57,9 @@ class GraphDecayService:
         
         # Decay configuration
         self.config = {
-            "decay_rate": 0.05,                    # 5% decay per ciclo
+            "decay_rate": 0.05,                    # 5% perso ogni decay_interval_days di inattività
             "decay_interval_days": 30,             # Decay dopo 30 giorni di inattività
+            "half_life_days": None,                # Se impostato, sostituisce decay_rate (k = ln2 / half_life)
             "min_confidence_threshold": 0.2,       # Sotto questa soglia → garbage collection
             "min_strength_threshold": 0.2,         # Relazioni sotto questa → rimosse
             "interaction_protection_threshold": 5, # Entità con 5+ interazioni decadono più lentamente
@@ -71,6 +79,16 @@ class GraphDecayService:
             "orphans_removed": 0,
             "last_decay_run": None
         }
+        self._stats_lock = threading.Lock()
+        
+        # Incrementato DENTRO la transazione del decay (prima del commit) quando vengono
+        # cancellate entità: le cache di esistenza dei writer (GraphService) lo confrontano.
+        # I contatori di stats sono aggiornati solo dopo il commit: troppo tardi per questo
+        self.removal_epoch = 0
+        
+        # SQL del decay già formattato (vedi _decay_statements)
+        self._statements: Dict[str, str] = {}
+        self._statements_key: Optional[tuple] = None
         
         logger.info("[GRAPH_DECAY] Service initialized")
     
@@ -79,6 +97,7 @@ class GraphDecayService:
         if self.db_manager is None:
             from app.utils.sqlite_metadata_manager import SQLiteMetadataManager
             self.db_manager = SQLiteMetadataManager()
+        ensure_graph_schema_once(self.db_manager)
         return self.db_manager
     
     def update_config(self, **kwargs):
@@ -86,7 +105,7 @@ class GraphDecayService:
         for key, value in kwargs.items():
             if key in self.config:
                 self.config[key] = value
-                logger.info(f"[GRAPH_DECAY] Config updated: {key}={value}")
+                logger.info("[GRAPH_DECAY] Config updated: %s=%s", key, value)
     
     async def apply_decay(self, user_id: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -99,13 +118,17 @@ class GraphDecayService:
         Returns:
             Risultati del decay con statistiche
         """
-        logger.info(f"[GRAPH_DECAY] Starting decay run...")
+        logger.info("[GRAPH_DECAY] Starting decay run...")
         
         # Merge options con config
         config = self.config.copy()
         if options:
             config.update(options)
         
+        # Un solo "now" per l'intero run: timestamp del risultato e soglie dei tre step
+        now = datetime.utcnow()
+        now_ts = int(now.replace(tzinfo=timezone.utc).timestamp())
+        
         result = {
             "success": True,
             "entities_processed": 0,
@@ -116,260 +139,216 @@ class GraphDecayService:
             "relationships_removed": 0,
             "orphans_removed": 0,
             "errors": [],
-            "timestamp": datetime.utcnow().isoformat() + "Z"
+            "timestamp": now.isoformat() + "Z"
         }
         
         try:
+            # Tutto l'I/O SQLite è bloccante: gira in un worker thread (SQLite rilascia
+            # il GIL durante l'I/O) così l'event loop resta libero per le altre richieste
+            await asyncio.to_thread(self._run_decay_sync, config, now_ts, result)
+            
+            # Update stats (read-modify-write: serializzato, i run possono sovrapporsi)
+            with self._stats_lock:
+                self.stats["total_decay_runs"] += 1
+                self.stats["entities_decayed"] += result["entities_decayed"]
+                self.stats["entities_removed"] += result["entities_removed"]
+                self.stats["relationships_decayed"] += result["relationships_decayed"]
+                self.stats["relationships_removed"] += result["relationships_removed"]
+                self.stats["orphans_removed"] += result["orphans_removed"]
+                self.stats["last_decay_run"] = result["timestamp"]
+            
+            # Formattazione lazy: gli argomenti vengono interpolati solo se il record è emesso
+            logger.info(
+                "[GRAPH_DECAY] Completed: %d entities decayed, %d removed, "
+                "%d relationships decayed, %d removed, %d orphans removed",
+                result["entities_decayed"], result["entities_removed"],
+                result["relationships_decayed"], result["relationships_removed"],
+                result["orphans_removed"]
+            )
+            
+        except Exception as e:
+            # Il context manager della connessione ha già fatto rollback
+            logger.error("[GRAPH_DECAY] Failed: %s", e)
+            result["success"] = False
+            result["errors"].append(str(e))
+        
+        return result
+    
+    def _run_decay_sync(self, config: Dict[str, Any], now_ts: int, result: Dict[str, Any]) -> None:
+        """Esegue i tre step di decay (bloccante, da chiamare fuori dall'event loop)"""
+        # Un'unica connessione e un'unica transazione per l'intero run:
+        # un solo lock di scrittura, un solo commit, nessuno stato parziale
+        db = self._get_db_manager()
+        with db._get_thread_connection() as conn:
+            self._ensure_math_functions(conn)
+            conn.execute("BEGIN IMMEDIATE")
+            
             # Step 1: Decay entities
-            entity_results = await self._decay_entities(config)
+            entity_results = self._decay_entities(conn, config, now_ts)
             result["entities_processed"] = entity_results["processed"]
             result["entities_decayed"] = entity_results["decayed"]
             result["entities_removed"] = entity_results["removed"]
-            result["errors"].extend(entity_results.get("errors", []))
             
             # Step 2: Decay relationships
-            rel_results = await self._decay_relationships(config)
+            rel_results = self._decay_relationships(conn, config, now_ts)
             result["relationships_processed"] = rel_results["processed"]
             result["relationships_decayed"] = rel_results["decayed"]
             result["relationships_removed"] = rel_results["removed"]
-            result["errors"].extend(rel_results.get("errors", []))
             
             # Step 3: Remove orphan entities
-            orphan_results = await self._remove_orphans(config)
+            orphan_results = self._remove_orphans(conn, config, now_ts)
             result["orphans_removed"] = orphan_results["removed"]
-            result["errors"].extend(orphan_results.get("errors", []))
             
-            # Update stats
-            self.stats["total_decay_runs"] += 1
-            self.stats["entities_decayed"] += result["entities_decayed"]
-            self.stats["entities_removed"] += result["entities_removed"]
-            self.stats["relationships_decayed"] += result["relationships_decayed"]
-            self.stats["relationships_removed"] += result["relationships_removed"]
-            self.stats["orphans_removed"] += result["orphans_removed"]
-            self.stats["last_decay_run"] = result["timestamp"]
+            # Il lock di scrittura è ancora nostro: nessun writer può confermare
+            # un'entità cancellata tra questo incremento e il commit
+            if result["entities_removed"] or result["orphans_removed"]:
+                with self._stats_lock:
+                    self.removal_epoch += 1
             
-            logger.info(
-                f"[GRAPH_DECAY] Completed: "
-                f"{result['entities_decayed']} entities decayed, "
-                f"{result['entities_removed']} removed, "
-                f"{result['relationships_decayed']} relationships decayed, "
-                f"{result['relationships_removed']} removed, "
-                f"{result['orphans_removed']} orphans removed"
-            )
+            conn.commit()
             
-        except Exception as e:
-            logger.error(f"[GRAPH_DECAY] Failed: {e}")
-            result["success"] = False
-            result["errors"].append(str(e))
-        
-        return result
+            # Aggiorna le statistiche del planner (ANALYZE solo dove serve)
+            # così gli indici parziali di decay restano la scelta preferita
+            conn.execute("PRAGMA optimize")
     
-    async def _decay_entities(self, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Apply decay to entities"""
-        result = {"processed": 0, "decayed": 0, "removed": 0, "errors": []}
-        
-        db = self._get_db_manager()
-        now = datetime.utcnow()
-        decay_threshold_date = now - timedelta(days=config["decay_interval_days"])
-        
+    # ==================== SQL DEL DECAY ====================
+    # Testi costanti (formattati una sola volta per set di protected_sources): il testo
+    # stabile fa sì che la statement cache di sqlite3 riusi gli statement già preparati.
+    
+    # Decay esponenziale in forma chiusa: value * retention^giorni_trascorsi, dove i giorni
+    # partono dall'ultimo evento che ha fissato il valore (update o decay precedente).
+    # Dipende solo dal tempo trascorso, non da quante volte gira il decay: idempotente.
+    _DECAY_FACTOR_SQL = (
+        "pow(:retention, (:now_ts - MAX(updated_at_ts, COALESCE(last_decayed_at, 0))) / 86400.0)"
+    )
+    
+    # Entità decadibili: attive, inattive da almeno decay_interval_days, non protette.
+    # updated_at non parsabile → updated_at_ts NULL → riga esclusa (assunta recente)
+    _ENTITY_DECAYABLE_SQL = "status = 'active' AND updated_at_ts <= :threshold_ts AND {unprotected}"
+    _ENTITY_VALUE_SQL = f"COALESCE(confidence, 1.0) * {_DECAY_FACTOR_SQL}"
+    
+    _RELATIONSHIP_DECAYABLE_SQL = "status = 'active' AND updated_at_ts <= :threshold_ts"
+    _RELATIONSHIP_VALUE_SQL = f"COALESCE(strength, 1.0) * {_DECAY_FACTOR_SQL}"
+    
+    _DECAY_SQL_TEMPLATES = {
+        "entity_count": "SELECT COUNT(*) FROM entities WHERE status = 'active'",
+        "entity_delete": (
+            f"DELETE FROM entities WHERE {_ENTITY_DECAYABLE_SQL} AND {_ENTITY_VALUE_SQL} < :min_threshold"
+        ),
+        "entity_update": (
+            f"UPDATE entities SET confidence = {_ENTITY_VALUE_SQL}, last_decayed_at = :now_ts "
+            f"WHERE {_ENTITY_DECAYABLE_SQL}"
+        ),
+        "relationship_count": "SELECT COUNT(*) FROM relationships WHERE status = 'active'",
+        "relationship_delete": (
+            f"DELETE FROM relationships WHERE {_RELATIONSHIP_DECAYABLE_SQL} "
+            f"AND {_RELATIONSHIP_VALUE_SQL} < :min_threshold"
+        ),
+        "relationship_update": (
+            f"UPDATE relationships SET strength = {_RELATIONSHIP_VALUE_SQL}, last_decayed_at = :now_ts "
+            f"WHERE {_RELATIONSHIP_DECAYABLE_SQL}"
+        ),
+        # Orphan = nessuna relazione in entrata/uscita (usa idx_relationships_from/_to)
+        "orphan_delete": """
+            DELETE FROM entities
+            WHERE status = 'active'
+            AND updated_at_ts <= :threshold_ts
+            AND {unprotected}
+            AND NOT EXISTS (
+                SELECT 1 FROM relationships r 
+                WHERE r.from_entity_id = entities.entity_id 
+                OR r.to_entity_id = entities.entity_id
+            )
+        """,
+    }
+    
+    @staticmethod
+    def _daily_retention(config: Dict[str, Any]) -> float:
+        """Frazione conservata per giorno (lambda): da half_life_days o da decay_rate/decay_interval_days"""
+        half_life = config.get("half_life_days")
+        if half_life:
+            return math.exp(-math.log(2) / half_life)
+        return (1.0 - config["decay_rate"]) ** (1.0 / config["decay_interval_days"])
+    
+    @staticmethod
+    def _ensure_math_functions(conn):
+        """pow() è nativo da SQLite 3.35 (se compilato con le math functions), altrimenti lo registra"""
         try:
-            with db._get_db_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Get all active entities
-                cursor.execute("""
-                    SELECT entity_id, confidence, salience, updated_at, 
-                           attributes_json, tags_json
-                    FROM entities 
-                    WHERE status = 'active'
-                """)
-                entities = cursor.fetchall()
-                result["processed"] = len(entities)
-                
-                for entity in entities:
-                    entity_id = entity["entity_id"]
-                    confidence = entity["confidence"] or 1.0
-                    updated_at_str = entity["updated_at"]
-                    
-                    # Parse updated_at
-                    try:
-                        updated_at = datetime.fromisoformat(updated_at_str.replace("Z", "+00:00").replace("+00:00", ""))
-                    except:
-                        updated_at = now  # Se non parsabile, assume recente
-                    
-                    # Check if entity should be decayed
-                    if updated_at > decay_threshold_date:
-                        continue  # Entità recente, skip
-                    
-                    # Check if protected (from tags or attributes)
-                    import json
-                    tags = json.loads(entity["tags_json"]) if entity["tags_json"] else []
-                    attrs = json.loads(entity["attributes_json"]) if entity["attributes_json"] else {}
-                    source = attrs.get("source", "extraction")
-                    
-                    if source in self.protected_sources or "protected" in tags:
-                        continue  # Entità protetta
-                    
-                    # Calculate decay factor
-                    days_inactive = (now - updated_at).days
-                    decay_multiplier = min(days_inactive / config["decay_interval_days"], 3.0)  # Max 3x decay
-                    decay_factor = config["decay_rate"] * decay_multiplier
-                    
-                    # Apply decay
-                    new_confidence = confidence * (1.0 - decay_factor)
-                    
-                    if new_confidence < config["min_confidence_threshold"]:
-                        # Remove entity
-                        cursor.execute("DELETE FROM entities WHERE entity_id = ?", (entity_id,))
-                        result["removed"] += 1
-                        logger.debug(f"   Removed entity: {entity_id} (confidence={new_confidence:.3f})")
-                    else:
-                        # Update confidence
-                        cursor.execute(
-                            "UPDATE entities SET confidence = ?, updated_at = ? WHERE entity_id = ?",
-                            (new_confidence, now.isoformat() + "Z", entity_id)
-                        )
-                        result["decayed"] += 1
-                        logger.debug(f"   📉 Decayed entity: {entity_id} ({confidence:.3f} → {new_confidence:.3f})")
-                
-                conn.commit()
-                
-        except Exception as e:
-            result["errors"].append(f"Entity decay error: {e}")
-            logger.error(f"Entity decay error: {e}")
+            conn.execute("SELECT pow(1.0, 1.0)")
+        except sqlite3.OperationalError:
+            conn.create_function("pow", 2, math.pow, deterministic=True)
+    
+    def _unprotected_entity_filter(self) -> str:
+        """
+        SQL fragment che esclude le entità protette, usando le colonne
+        denormalizzate source / is_protected (vedi graph_schema).
         
-        return result
+        Le sources sono inlinate come letterali: con la configurazione di default
+        il predicato coincide con quello di idx_entities_decay_cover e SQLite usa il partial index.
+        """
+        literals = ", ".join("'" + source.replace("'", "''") + "'" for source in self.protected_sources)
+        return f"is_protected = 0 AND source NOT IN ({literals})"
+    
+    def _decay_statements(self) -> Dict[str, str]:
+        """SQL del decay pronto all'uso (ricostruito solo se cambiano le protected_sources)"""
+        key = tuple(self.protected_sources)
+        if self._statements_key != key:
+            unprotected = self._unprotected_entity_filter()
+            self._statements = {
+                name: sql.replace("{unprotected}", unprotected)
+                for name, sql in self._DECAY_SQL_TEMPLATES.items()
+            }
+            self._statements_key = key
+        return self._statements
     
-    async def _decay_relationships(self, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Apply decay to relationships"""
-        result = {"processed": 0, "decayed": 0, "removed": 0, "errors": []}
+    def _decay_entities(self, conn, config: Dict[str, Any], now_ts: int) -> Dict[str, Any]:
+        """Apply decay to entities (set-based: one DELETE + one UPDATE) within the caller's transaction"""
+        sql = self._decay_statements()
+        params = {
+            "now_ts": now_ts,
+            "threshold_ts": now_ts - config["decay_interval_days"] * 86400,
+            "retention": self._daily_retention(config),
+            "min_threshold": config["min_confidence_threshold"],
+        }
         
-        db = self._get_db_manager()
-        now = datetime.utcnow()
-        decay_threshold_date = now - timedelta(days=config["decay_interval_days"])
+        cursor = conn.cursor()
+        processed = cursor.execute(sql["entity_count"]).fetchone()[0]
         
-        try:
-            with db._get_db_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Get all active relationships
-                cursor.execute("""
-                    SELECT rel_id, strength, updated_at
-                    FROM relationships 
-                    WHERE status = 'active'
-                """)
-                relationships = cursor.fetchall()
-                result["processed"] = len(relationships)
-                
-                for rel in relationships:
-                    rel_id = rel["rel_id"]
-                    strength = rel["strength"] or 1.0
-                    updated_at_str = rel["updated_at"]
-                    
-                    # Parse updated_at
-                    try:
-                        updated_at = datetime.fromisoformat(updated_at_str.replace("Z", "+00:00").replace("+00:00", ""))
-                    except:
-                        updated_at = now
-                    
-                    # Check if should be decayed
-                    if updated_at > decay_threshold_date:
-                        continue
-                    
-                    # Calculate decay factor
-                    days_inactive = (now - updated_at).days
-                    decay_multiplier = min(days_inactive / config["decay_interval_days"], 3.0)
-                    decay_factor = config["decay_rate"] * decay_multiplier
-                    
-                    # Apply decay
-                    new_strength = strength * (1.0 - decay_factor)
-                    
-                    if new_strength < config["min_strength_threshold"]:
-                        # Remove relationship
-                        cursor.execute("DELETE FROM relationships WHERE rel_id = ?", (rel_id,))
-                        result["removed"] += 1
-                        logger.debug(f"   Removed relationship: {rel_id}")
-                    else:
-                        # Update strength
-                        cursor.execute(
-                            "UPDATE relationships SET strength = ?, updated_at = ? WHERE rel_id = ?",
-                            (new_strength, now.isoformat() + "Z", rel_id)
-                        )
-                        result["decayed"] += 1
-                        logger.debug(f"   📉 Decayed relationship: {rel_id} ({strength:.3f} → {new_strength:.3f})")
-                
-                conn.commit()
-                
-        except Exception as e:
-            result["errors"].append(f"Relationship decay error: {e}")
-            logger.error(f"Relationship decay error: {e}")
+        # Remove entities that would fall below threshold, then decay the remaining ones
+        removed = cursor.execute(sql["entity_delete"], params).rowcount
+        decayed = cursor.execute(sql["entity_update"], params).rowcount
         
-        return result
+        return {"processed": processed, "decayed": decayed, "removed": removed}
     
-    async def _remove_orphans(self, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Remove orphan entities (entities with no relationships and old)"""
-        result = {"removed": 0, "errors": []}
+    def _decay_relationships(self, conn, config: Dict[str, Any], now_ts: int) -> Dict[str, Any]:
+        """Apply decay to relationships (set-based: one DELETE + one UPDATE) within the caller's transaction"""
+        sql = self._decay_statements()
+        params = {
+            "now_ts": now_ts,
+            "threshold_ts": now_ts - config["decay_interval_days"] * 86400,
+            "retention": self._daily_retention(config),
+            "min_threshold": config["min_strength_threshold"],
+        }
         
-        db = self._get_db_manager()
-        now = datetime.utcnow()
-        orphan_threshold_date = now - timedelta(days=config["orphan_removal_days"])
+        cursor = conn.cursor()
+        processed = cursor.execute(sql["relationship_count"]).fetchone()[0]
         
-        try:
-            with db._get_db_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Find orphan entities (no relationships pointing to/from them)
-                cursor.execute("""
-                    SELECT e.entity_id, e.updated_at, e.attributes_json, e.tags_json
-                    FROM entities e
-                    WHERE e.status = 'active'
-                    AND NOT EXISTS (
-                        SELECT 1 FROM relationships r 
-                        WHERE r.from_entity_id = e.entity_id 
-                        OR r.to_entity_id = e.entity_id
-                    )
-                """)
-                orphans = cursor.fetchall()
-                
-                import json
-                for orphan in orphans:
-                    entity_id = orphan["entity_id"]
-                    updated_at_str = orphan["updated_at"]
-                    
-                    # Parse updated_at
-                    try:
-                        updated_at = datetime.fromisoformat(updated_at_str.replace("Z", "+00:00").replace("+00:00", ""))
-                    except:
-                        updated_at = now
-                    
-                    # Check if old enough to remove
-                    if updated_at > orphan_threshold_date:
-                        continue
-                    
-                    # Check if protected
-                    tags = json.loads(orphan["tags_json"]) if orphan["tags_json"] else []
-                    attrs = json.loads(orphan["attributes_json"]) if orphan["attributes_json"] else {}
-                    source = attrs.get("source", "extraction")
-                    
-                    if source in self.protected_sources or "protected" in tags:
-                        continue
-                    
-                    # Remove orphan
-                    cursor.execute("DELETE FROM entities WHERE entity_id = ?", (entity_id,))
-                    result["removed"] += 1
-                    logger.debug(f"   Removed orphan entity: {entity_id}")
-                
-                conn.commit()
-                
-        except Exception as e:
-            result["errors"].append(f"Orphan removal error: {e}")
-            logger.error(f"Orphan removal error: {e}")
+        # Remove relationships that would fall below threshold, then decay the remaining ones
+        removed = cursor.execute(sql["relationship_delete"], params).rowcount
+        decayed = cursor.execute(sql["relationship_update"], params).rowcount
         
-        return result
+        return {"processed": processed, "decayed": decayed, "removed": removed}
+    
+    def _remove_orphans(self, conn, config: Dict[str, Any], now_ts: int) -> Dict[str, Any]:
+        """Remove orphan entities (entities with no relationships and old) within the caller's transaction"""
+        params = {"threshold_ts": now_ts - config["orphan_removal_days"] * 86400}
+        removed = conn.execute(self._decay_statements()["orphan_delete"], params).rowcount
+        return {"removed": removed}
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get decay service statistics"""
-        return self.stats.copy()
+        """Get decay service statistics (consistent snapshot)"""
+        with self._stats_lock:
+            return self.stats.copy()
     
     def get_config(self) -> Dict[str, Any]:
         """Get current decay configuration"""
@@ -378,10 +357,14 @@ class GraphDecayService:
 
 # Singleton instance
 _decay_service_instance: Optional[GraphDecayService] = None
+_decay_service_lock = threading.Lock()
 
 def get_decay_service() -> GraphDecayService:
-    """Get or create singleton GraphDecayService instance"""
+    """Get or create singleton GraphDecayService instance (thread-safe)"""
     global _decay_service_instance
     if _decay_service_instance is None:
-        _decay_service_instance = GraphDecayService()
+        # Double-checked locking: il lock si paga solo alla prima creazione
+        with _decay_service_lock:
+            if _decay_service_instance is None:
+                _decay_service_instance = GraphDecayService()
     return _decay_service_instance
@@ -9,15 +9,25 @@ Architettura:
 2. **Rule Validation**: Regole usate per confermare/boostare il risultato embedding
 3. **Fallback**: Default a UNKNOWN con bassa confidence
 
+Fast path: nomi senza contesto inequivocabili (nome proprio noto, suffisso
+societario, prefisso di indirizzo) sono classificati dalle sole regole,
+senza chiamare il modello.
+
 Progettato per futura integrazione con LLM locale per migliorare accuracy.
 
 Author: MindMemoryService Team
 Date: February 2026
 """
 
+import hashlib
 import logging
+import os
 import re
-from typing import Dict, Any, Optional, List, Tuple
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Any, Optional, List, Sequence, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -25,16 +35,70 @@ from app.graph.data_models import EntityType
 
 logger = logging.getLogger(__name__)
 
+# Modello usato sia per gli exemplar che per le query
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+# Cache su disco della matrice dei tipi (evita di ri-embeddare gli exemplar ad ogni avvio)
+TYPE_EMBEDDING_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mindmemory")
+
+# Tipi considerati per risultato: best + fino a 3 alternative
+TOP_K_TYPES = 4
+
+# Rule boost: massimo incremento e tetto della confidence boostata
+MAX_RULE_BOOST = 0.15
+MAX_BOOSTED_CONFIDENCE = 0.98
+
+# Fast path (senza embedding) per nomi senza contesto inequivocabili
+FAST_PATH_CONFIDENCE = 0.9
+
+
+class _LazyScores(Mapping):
+    """
+    Mapping read-only {tipo: similarity} materializzato solo al primo accesso.
+    
+    Sul path di classificazione il risultato tiene solo label + riga di similarity;
+    il dict (con arrotondamento) viene costruito solo se qualcuno lo legge,
+    tipicamente to_dict() quando il risultato viene serializzato.
+    """
+    __slots__ = ("_labels", "_values", "_digits", "_dict")
+    
+    def __init__(self, labels: Sequence[EntityType], values: Sequence[float], digits: Optional[int] = None):
+        self._labels = labels
+        self._values = values
+        self._digits = digits
+        self._dict: Optional[Dict[str, float]] = None
+    
+    def _materialize(self) -> Dict[str, float]:
+        if self._dict is None:
+            if self._digits is None:
+                self._dict = {t.value: s for t, s in zip(self._labels, self._values)}
+            else:
+                digits = self._digits
+                self._dict = {t.value: round(s, digits) for t, s in zip(self._labels, self._values)}
+        return self._dict
+    
+    def __getitem__(self, key: str) -> float:
+        return self._materialize()[key]
+    
+    def __iter__(self):
+        return iter(self._materialize())
+    
+    def __len__(self) -> int:
+        return len(self._labels)
+    
+    def __repr__(self) -> str:
+        return repr(self._materialize())
+
 
-@dataclass
+@dataclass(slots=True)
 class EntityTypeResult:
     """Risultato della classificazione del tipo di entità"""
     entity_type: EntityType         # Tipo inferito
     confidence: float               # 0.0 - 1.0
-    method: str                     # embedding, embedding+rules, llm, default
+    method: str                     # embedding, embedding+rules, rules, llm, default
     signals: List[str] = field(default_factory=list)  # Segnali che hanno portato alla decisione
     alternative_types: List[Tuple[EntityType, float]] = field(default_factory=list)  # Altri tipi possibili
-    embedding_scores: Dict[str, float] = field(default_factory=dict)  # Scores per debug
+    embedding_scores: Mapping[str, float] = field(default_factory=dict)  # Scores per debug (lazy)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -162,13 +226,29 @@ PERSON_PATTERNS = [
 ]
 
 # Nomi propri italiani (per boost PERSON)
-ITALIAN_FIRST_NAMES = {
+ITALIAN_FIRST_NAMES = frozenset({
     "marco", "luca", "giuseppe", "giovanni", "francesco", "andrea", "alessandro",
     "stefano", "matteo", "lorenzo", "roberto", "riccardo", "fabio", "fabrizio",
     "paolo", "massimo", "davide", "simone", "antonio", "mario", "pietro",
     "maria", "giulia", "francesca", "anna", "sara", "laura", "valentina",
     "chiara", "federica", "elena", "alessandra", "silvia", "martina", "elisa"
-}
+})
+
+# ==================== FAST PATH (senza embedding) ====================
+# Solo segnali inequivocabili. I pattern di boost qui sopra NON vanno usati da soli:
+# "corso di yoga", "via email", "largo consumo", "il corso" non sono luoghi.
+
+# Suffisso societario in coda al nome (matchato sul nome lowercase)
+FAST_PATH_ORG_SUFFIX_RE = re.compile(
+    r".*\s+(?:s\.?p\.?a\.?|s\.?r\.?l\.?|s\.?n\.?c\.?|s\.?a\.?s\.?|inc\.?|corp\.?|ltd\.?|llc\.?|gmbh\.?)$"
+)
+
+# Indirizzo: via/viale/piazza seguito da un token maiuscolo o numerico
+# (matchato sul nome ORIGINALE: "Via Roma", "piazza 4 Novembre" sì, "via email" no)
+FAST_PATH_ADDRESS_RE = re.compile(r"^(?i:via|viale|piazza)\s+[A-ZÀ-ÖØ-Þ0-9]")
+
+# Cognome dopo un nome proprio noto: una parola maiuscola (anche D'Amico, Rossi-Bianchi)
+FAST_PATH_SURNAME_RE = re.compile(r"^[A-ZÀ-ÖØ-Þ][^\W\d_]*(?:['-][^\W\d_]+)*$")
 
 
 class EntityTypeNormalizer:
@@ -189,82 +269,233 @@ class EntityTypeNormalizer:
         # → EntityTypeResult(entity_type=PERSON, confidence=0.87, method="embedding")
     """
     
-    def __init__(self, use_rule_boost: bool = True):
+    def __init__(
+        self,
+        use_rule_boost: bool = True,
+        cache_max: int = 10_000,
+        query_cache_max: int = 5_000,
+        use_fast_path: bool = True
+    ):
         """
         Initialize EntityTypeNormalizer.
         
         Args:
             use_rule_boost: Se True, usa regole per boost confidence (non per determinare tipo)
+            cache_max: Numero massimo di risultati in cache (LRU)
+            query_cache_max: Numero massimo di embedding di query in cache (LRU, ~1.5 KB l'uno)
+            use_fast_path: Se True, i nomi senza contesto inequivocabili (nome proprio
+                con eventuale cognome, suffisso societario, via/piazza + nome) sono
+                classificati dalle sole regole, senza chiamare il modello
         """
         self.use_rule_boost = use_rule_boost
-        self._cache: Dict[str, EntityTypeResult] = {}
+        self.use_fast_path = use_fast_path
+        # Cache LRU limitata: niente crescita illimitata in un servizio long-running
+        self._cache: "OrderedDict[str, EntityTypeResult]" = OrderedDict()
+        self._cache_max = cache_max
+        
+        # Embedding normalizzati per stringa di query: una re-ingestion dello stesso
+        # testo non richiama il modello anche se il risultato è uscito dalla cache
+        self._query_emb_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._query_cache_max = query_cache_max
+        
+        # Istanza condivisa tra worker thread: le operazioni sulle OrderedDict
+        # (get + move_to_end, insert + evict) non sono atomiche. Il lock copre solo
+        # la contabilità delle cache, mai le chiamate al modello.
+        self._cache_lock = threading.Lock()
+        # Caricamento modello e warmup degli exemplar: una sola volta anche con
+        # richieste concorrenti al primo avvio (RLock: il warmup carica il modello)
+        self._warmup_lock = threading.RLock()
         
         # Embedding function (lazy loading)
         self._embedding_function = None
-        self._type_embeddings: Optional[Dict[EntityType, List[float]]] = None
+        self._type_embeddings: Optional[Dict[EntityType, Any]] = None  # centroidi normalizzati (np.ndarray)
         self._embeddings_ready = False
         
-        # Compile regex patterns per boost
-        self._org_patterns = [re.compile(p, re.IGNORECASE) for p in ORGANIZATION_PATTERNS]
-        self._loc_patterns = [re.compile(p, re.IGNORECASE) for p in LOCATION_PATTERNS]
-        self._person_patterns = [re.compile(p, re.IGNORECASE) for p in PERSON_PATTERNS]
+        # Matrice (num_types, dim) con righe L2-normalizzate: similarity = una sola matmul
+        self._type_matrix = None
+        self._type_labels: List[EntityType] = []
+        
+        # Compile regex patterns per boost: una sola alternation per gruppo → un solo match()
+        # (pattern tutti minuscoli, matchati contro il nome già lowercase: niente IGNORECASE)
+        self._org_regex = self._compile_alternation(ORGANIZATION_PATTERNS)
+        self._loc_regex = self._compile_alternation(LOCATION_PATTERNS)
+        self._person_regex = self._compile_alternation(PERSON_PATTERNS)
         
         # Statistics
         self.stats = {
             "embedding_inferences": 0,
             "rule_boosts": 0,
             "cache_hits": 0,
+            "query_cache_hits": 0,
+            "rule_inferences": 0,
             "fallbacks": 0,
             "llm_inferences": 0  # Per futuro LLM
         }
         
         logger.info("EntityTypeNormalizer initialized (embedding-first mode)")
     
+    @staticmethod
+    def _compile_alternation(patterns: List[str]) -> "re.Pattern":
+        """Unisce una lista di pattern (minuscoli) in un'unica regex (?:p1)|(?:p2)|..."""
+        return re.compile("|".join(f"(?:{p})" for p in patterns))
+    
     def _get_embedding_function(self):
-        """Lazy loading dell'embedding function"""
+        """Lazy loading dell'embedding function (thread-safe)"""
         if self._embedding_function is None:
-            try:
-                from chromadb.utils import embedding_functions
-                self._embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                    model_name='paraphrase-multilingual-MiniLM-L12-v2',
-                    normalize_embeddings=True
-                )
-                logger.info("Embedding function loaded for entity type inference")
-            except Exception as e:
-                logger.error(f"CRITICAL: Could not load embedding function: {e}")
-                raise RuntimeError(f"Embedding function required but failed to load: {e}")
+            with self._warmup_lock:
+                if self._embedding_function is None:
+                    try:
+                        from chromadb.utils import embedding_functions
+                        self._embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+                            model_name=MODEL_NAME,
+                            normalize_embeddings=True
+                        )
+                        logger.info("Embedding function loaded for entity type inference")
+                    except Exception as e:
+                        logger.error("CRITICAL: Could not load embedding function: %s", e)
+                        raise RuntimeError(f"Embedding function required but failed to load: {e}")
         return self._embedding_function
     
     def _ensure_type_embeddings(self):
-        """Pre-calcola embeddings medi per ogni tipo (lazy, una volta)"""
+        """Pre-calcola embeddings medi per ogni tipo (lazy, una volta; persistiti su disco)"""
         if self._embeddings_ready:
             return
+        with self._warmup_lock:
+            if not self._embeddings_ready:
+                self._compute_type_embeddings()
+    
+    def _compute_type_embeddings(self):
+        """Carica da disco o calcola la matrice dei tipi (chiamare sotto _warmup_lock)"""
+        cache_path = self._type_cache_path()
+        if self._load_type_matrix(cache_path):
+            self._embeddings_ready = True
+            logger.info("Type embeddings loaded from %s (%d types)", cache_path, len(self._type_labels))
+            return
         
         emb_fn = self._get_embedding_function()
         self._type_embeddings = {}
         
         logger.info("Pre-computing type embeddings from exemplars...")
         
-        for entity_type, exemplars in TYPE_EXEMPLARS.items():
-            try:
-                # Calcola embedding per ogni exemplar
-                embeddings = emb_fn(exemplars)
-                
-                # Media degli embedding
-                num_dims = len(embeddings[0])
-                avg_embedding = [
-                    sum(emb[i] for emb in embeddings) / len(embeddings)
-                    for i in range(num_dims)
-                ]
-                
-                self._type_embeddings[entity_type] = avg_embedding
-                logger.debug(f"Computed embedding for {entity_type.value} ({len(exemplars)} exemplars)")
-                
-            except Exception as e:
-                logger.warning(f"Failed to compute embedding for {entity_type.value}: {e}")
+        # Tutti gli exemplar in un'unica chiamata al modello (batching interno di
+        # SentenceTransformer), poi slicing per tipo tramite offsets
+        all_exemplars: List[str] = []
+        offsets = [0]
+        for exemplars in TYPE_EXEMPLARS.values():
+            all_exemplars.extend(exemplars)
+            offsets.append(len(all_exemplars))
+        
+        # Dedup: ogni stringa (anche se ripetuta tra tipi o via add_exemplars) viene
+        # embeddata una volta sola, poi riportata nelle posizioni originali
+        unique_exemplars = list(dict.fromkeys(all_exemplars))
+        
+        try:
+            import numpy as np
+            
+            unique_embeddings = np.asarray(emb_fn(unique_exemplars), dtype=np.float32)
+            if len(unique_exemplars) == len(all_exemplars):
+                all_embeddings = unique_embeddings
+            else:
+                position = {text: i for i, text in enumerate(unique_exemplars)}
+                all_embeddings = unique_embeddings[[position[text] for text in all_exemplars]]
+        except Exception as e:
+            logger.warning("Failed to compute exemplar embeddings: %s", e)
+            all_embeddings = None
+        
+        if all_embeddings is not None:
+            for i, (entity_type, exemplars) in enumerate(TYPE_EXEMPLARS.items()):
+                if not exemplars:
+                    continue
+                try:
+                    embeddings = all_embeddings[offsets[i]:offsets[i + 1]]
+                    self._type_embeddings[entity_type] = self._normalized_centroid(embeddings)
+                    logger.debug("Computed embedding for %s (%d exemplars)", entity_type.value, len(exemplars))
+                    
+                except Exception as e:
+                    logger.warning("Failed to compute embedding for %s: %s", entity_type.value, e)
         
+        self._build_type_matrix()
+        # Persisti solo una matrice completa: un errore parziale non deve finire in cache
+        if self._type_matrix is not None and len(self._type_labels) == len(TYPE_EXEMPLARS):
+            self._save_type_matrix(cache_path)
         self._embeddings_ready = True
-        logger.info(f"Type embeddings ready ({len(self._type_embeddings)} types)")
+        logger.info("Type embeddings ready (%d types)", len(self._type_embeddings))
+    
+    @staticmethod
+    def _type_cache_path() -> str:
+        """
+        Path del file di cache, con chiave = hash di modello + exemplar correnti.
+        
+        Qualsiasi modifica a TYPE_EXEMPLARS (es. add_exemplars) cambia la chiave,
+        quindi un file obsoleto non viene mai riletto.
+        """
+        payload = MODEL_NAME + repr(sorted((t.value, list(ex)) for t, ex in TYPE_EXEMPLARS.items()))
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(TYPE_EMBEDDING_CACHE_DIR, f"type_emb_{key}.npz")
+    
+    def _load_type_matrix(self, path: str) -> bool:
+        """Carica matrice e label dei tipi dal file di cache, se presente e valido"""
+        if not os.path.exists(path):
+            return False
+        try:
+            import numpy as np
+            
+            with np.load(path) as data:
+                matrix = np.asarray(data["M"], dtype=np.float32)
+                labels = [EntityType(v) for v in data["labels"].tolist()]
+            if matrix.ndim != 2 or matrix.shape[0] != len(labels):
+                raise ValueError(f"shape {matrix.shape} vs {len(labels)} labels")
+        except Exception as e:
+            logger.warning("Ignoring invalid type embedding cache %s: %s", path, e)
+            return False
+        
+        self._type_matrix = matrix
+        self._type_labels = labels
+        self._type_embeddings = dict(zip(labels, matrix))
+        return True
+    
+    def _save_type_matrix(self, path: str):
+        """Scrive matrice e label dei tipi su disco (best effort, atomico via rename)"""
+        try:
+            import numpy as np
+            
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, M=self._type_matrix, labels=np.array([t.value for t in self._type_labels]))
+            os.replace(tmp_path, path)
+            logger.info("Type embeddings cached to %s", path)
+        except Exception as e:
+            logger.warning("Could not cache type embeddings to %s: %s", path, e)
+    
+    @staticmethod
+    def _normalized_centroid(embeddings):
+        """
+        Centroide di tipo: media degli exemplar L2-normalizzati, poi ri-normalizzata.
+        
+        NON sostituire con la media degli embedding grezzi: per vettori unitari
+        mean_i(cos(q, e_i)) = q · mean_i(e_i), quindi il coseno con la media dei
+        normalizzati è (a meno della norma, costante per tipo) la similarity media
+        verso gli exemplar — nessun exemplar "lungo" domina il centroide.
+        """
+        import numpy as np
+        
+        embs = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embs, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroid = (embs / norms).mean(axis=0)
+        norm = np.linalg.norm(centroid)
+        return centroid / norm if norm > 0 else centroid
+    
+    def _build_type_matrix(self):
+        """Impila i centroidi (già L2-normalizzati) in una matrice float32 (num_types, dim)"""
+        import numpy as np
+        
+        self._type_labels = list(self._type_embeddings.keys())
+        if not self._type_labels:
+            self._type_matrix = None
+            return
+        self._type_matrix = np.stack([self._type_embeddings[t] for t in self._type_labels])
     
     def infer_type(
         self,
@@ -283,138 +514,326 @@ class EntityTypeNormalizer:
         Returns:
             EntityTypeResult con tipo, confidence, scores embedding
         """
-        # Cache check
-        cache_key = f"{entity_name.lower()}|{context[:100] if context else ''}"
-        if cache_key in self._cache:
-            self.stats["cache_hits"] += 1
-            return self._cache[cache_key]
+        return self.infer_types([entity_name], [context])[0]
+    
+    def infer_types(
+        self,
+        entity_names: List[str],
+        contexts: Optional[List[str]] = None
+    ) -> List[EntityTypeResult]:
+        """
+        Inferisce il tipo di più entità in batch (una sola chiamata al modello).
         
-        signals: List[str] = []
+        Le query non in cache vengono embeddate insieme e confrontate con i tipi
+        con un'unica matmul (N, dim) x (dim, num_types); solo la costruzione dei
+        risultati resta un loop Python.
+        
+        Args:
+            entity_names: Nomi delle entità
+            contexts: Contesti opzionali, allineati a entity_names
+            
+        Returns:
+            Lista di EntityTypeResult nello stesso ordine di entity_names
+        """
+        if contexts is None:
+            contexts = [""] * len(entity_names)
+        
+        results: List[Optional[EntityTypeResult]] = [None] * len(entity_names)
+        
+        # Cache check (e dedup delle query ripetute nello stesso batch)
+        pending: Dict[str, List[int]] = {}
+        pending_names: List[str] = []  # nome lowercase per query, allineato a pending
+        queries: List[str] = []
+        with self._cache_lock:
+            for i, (entity_name, context) in enumerate(zip(entity_names, contexts)):
+                # lower() una sola volta: serve sia alla chiave che al rule boost
+                name_lc = entity_name.lower()
+                cache_key = f"{name_lc}|{context[:100]}" if context else name_lc
+                if len(cache_key) < 64:
+                    cache_key = sys.intern(cache_key)
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    self._cache.move_to_end(cache_key)
+                    self.stats["cache_hits"] += 1
+                    results[i] = cached
+                    continue
+                
+                # Fast path: casi ovvi senza contesto, nessuna chiamata al modello
+                fast = self._fast_path_result(entity_name) if self.use_fast_path and not context else None
+                if fast is not None:
+                    if len(self._cache) >= self._cache_max:
+                        self._cache.popitem(last=False)  # Evict least recently used
+                    self._cache[cache_key] = fast
+                    results[i] = fast
+                elif cache_key in pending:
+                    pending[cache_key].append(i)
+                else:
+                    pending[cache_key] = [i]
+                    pending_names.append(name_lc)
+                    # Costruisci query: nome + contesto
+                    queries.append(f"{entity_name} - {context[:150]}" if context else entity_name)
+        
+        if not pending:
+            return results
         
         # ===== STEP 1: EMBEDDING SIMILARITY (PRIMARIO) =====
         try:
-            self._ensure_type_embeddings()
+            import numpy as np
             
-            # Costruisci query: nome + contesto
-            if context:
-                query = f"{entity_name} - {context[:150]}"
-            else:
-                query = entity_name
-            
-            # Calcola embedding query
-            emb_fn = self._get_embedding_function()
-            query_embedding = list(emb_fn([query])[0])
-            
-            # Calcola similarity con ogni tipo
-            similarities: Dict[EntityType, float] = {}
-            if self._type_embeddings:
-                for entity_type, type_embedding in self._type_embeddings.items():
-                    sim = self._cosine_similarity(query_embedding, type_embedding)
-                    similarities[entity_type] = sim
+            self._ensure_type_embeddings()
+            if self._type_matrix is None:
+                raise RuntimeError("no type embeddings available")
             
-            # Ordina per similarity
-            sorted_types = sorted(similarities.items(), key=lambda x: x[1], reverse=True)
-            best_type, best_sim = sorted_types[0]
+            # Embedding delle sole query mai viste in una chiamata, similarity in una matmul
+            query_matrix = self._embed_queries(queries)
+            sims = query_matrix @ self._type_matrix.T
             
-            signals.append(f"embedding_top:{best_type.value}={best_sim:.3f}")
+            # Servono solo i primi TOP_K tipi (best + alternative). Con poche decine di
+            # tipi il costo è tutto overhead di dispatch NumPy: un solo argsort della
+            # riga batte argpartition + sort dei K candidati (3 chiamate in più)
+            top = np.argsort(-sims, axis=1)[:, :TOP_K_TYPES]
             
-            # ===== STEP 2: RULE BOOST (opzionale) =====
-            confidence = best_sim
-            method = "embedding"
+            labels = self._type_labels
+            computed: List[Tuple[str, EntityTypeResult]] = []
+            for row, (cache_key, indices) in enumerate(pending.items()):
+                row_sims = sims[row].tolist()
+                top_types = [(labels[j], row_sims[j]) for j in top[row].tolist()]
+                
+                result = self._build_result(
+                    entity_names[indices[0]], row_sims, top_types, name_lower=pending_names[row]
+                )
+                computed.append((cache_key, result))
+                for i in indices:
+                    results[i] = result
             
-            if self.use_rule_boost:
-                boost = self._calculate_rule_boost(entity_name, best_type)
-                if boost > 0:
-                    confidence = min(0.98, confidence + boost)
-                    method = "embedding+rules"
-                    signals.append(f"rule_boost:+{boost:.2f}")
-                    self.stats["rule_boosts"] += 1
+            with self._cache_lock:
+                for cache_key, result in computed:
+                    if len(self._cache) >= self._cache_max:
+                        self._cache.popitem(last=False)  # Evict least recently used
+                    self._cache[cache_key] = result
             
-            # ===== STEP 3: VALIDA RISULTATO =====
-            # Se confidence troppo bassa, considera UNKNOWN
-            if confidence < 0.35:
-                signals.append("low_confidence_fallback")
+        except Exception as e:
+            logger.error("Embedding inference failed: %s", e)
+            # Fallback totale per le query non risolte
+            for indices in pending.values():
+                if results[indices[0]] is not None:
+                    continue
                 self.stats["fallbacks"] += 1
-                result = EntityTypeResult(
+                fallback = EntityTypeResult(
                     entity_type=EntityType.UNKNOWN,
-                    confidence=confidence,
-                    method="fallback",
-                    signals=signals,
-                    alternative_types=[(t, s) for t, s in sorted_types[:3]],
-                    embedding_scores={t.value: s for t, s in similarities.items()}
+                    confidence=0.2,
+                    method="error_fallback",
+                    signals=[f"error:{str(e)[:50]}"]
                 )
-            else:
-                self.stats["embedding_inferences"] += 1
-                result = EntityTypeResult(
-                    entity_type=best_type,
-                    confidence=round(confidence, 3),
-                    method=method,
-                    signals=signals,
-                    alternative_types=[(t, s) for t, s in sorted_types[1:4] if s >= 0.25],
-                    embedding_scores={t.value: round(s, 4) for t, s in similarities.items()}
-                )
-            
-            self._cache[cache_key] = result
-            return result
-            
-        except Exception as e:
-            logger.error(f"Embedding inference failed: {e}")
-            # Fallback totale
+                for i in indices:
+                    results[i] = fallback
+        
+        return results
+    
+    def _fast_path_result(self, entity_name: str) -> Optional[EntityTypeResult]:
+        """
+        Classificazione solo-regole per nomi inequivocabili (senza contesto).
+        
+        Casi ammessi (tutto il resto va all'embedding):
+        - suffisso societario ("Acme S.r.l.", "Foo Inc.") → ORGANIZATION
+        - via/viale/piazza + token maiuscolo o numerico ("Via Roma") → LOCATION
+        - nome proprio noto, da solo o seguito da un cognome ("Marco", "Marco Rossi") → PERSON
+        
+        Il suffisso societario è controllato prima del nome proprio,
+        così "Luca S.r.l." resta un'organizzazione.
+        
+        Returns:
+            EntityTypeResult con method="rules", oppure None se il caso è ambiguo
+            e serve l'embedding
+        """
+        entity_name = entity_name.strip()
+        if not entity_name:
+            return None
+        
+        parts = entity_name.split()
+        first = parts[0].lower()
+        if FAST_PATH_ORG_SUFFIX_RE.match(entity_name.lower()):
+            entity_type, signal = EntityType.ORGANIZATION, "fast_path:org_suffix"
+        elif FAST_PATH_ADDRESS_RE.match(entity_name):
+            entity_type, signal = EntityType.LOCATION, "fast_path:address"
+        elif first in ITALIAN_FIRST_NAMES and (
+            len(parts) == 1 or (len(parts) == 2 and FAST_PATH_SURNAME_RE.match(parts[1]))
+        ):
+            entity_type, signal = EntityType.PERSON, f"fast_path:first_name={first}"
+        else:
+            return None
+        
+        self.stats["rule_inferences"] += 1
+        return EntityTypeResult(
+            entity_type=entity_type,
+            confidence=FAST_PATH_CONFIDENCE,
+            method="rules",
+            signals=[signal]
+        )
+    
+    def _embed_queries(self, queries: List[str]):
+        """
+        Embedding L2-normalizzati (float32) delle query, passando dalla cache LRU.
+        
+        Le query non in cache vengono calcolate con una sola chiamata al modello.
+        
+        Returns:
+            np.ndarray (len(queries), dim)
+        """
+        import numpy as np
+        
+        cache = self._query_emb_cache
+        vectors: List[Any] = [None] * len(queries)
+        missing: List[int] = []
+        with self._cache_lock:
+            for i, query in enumerate(queries):
+                vec = cache.get(query)
+                if vec is None:
+                    missing.append(i)
+                else:
+                    cache.move_to_end(query)
+                    self.stats["query_cache_hits"] += 1
+                    vectors[i] = vec
+        
+        if missing:
+            computed = self._compute_embeddings([queries[i] for i in missing])
+            with self._cache_lock:
+                for i, vec in zip(missing, computed):
+                    vectors[i] = vec
+                    if len(cache) >= self._query_cache_max:
+                        cache.popitem(last=False)  # Evict least recently used
+                    cache[queries[i]] = vec
+        
+        return np.stack(vectors)
+    
+    def _compute_embeddings(self, texts: List[str]):
+        """Embedding L2-normalizzati (float32) di texts, una sola chiamata al modello"""
+        import numpy as np
+        
+        emb_fn = self._get_embedding_function()
+        computed = np.asarray(emb_fn(texts), dtype=np.float32)
+        norms = np.linalg.norm(computed, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        computed /= norms
+        return computed
+    
+    def embed_texts(self, texts: List[str], cache: bool = False):
+        """
+        Embedding L2-normalizzati (float32) con il modello del normalizer, per altri servizi.
+        
+        Args:
+            texts: Testi da codificare
+            cache: True per passare dalla cache LRU delle query di infer_type; di default
+                   no, per non riempirla con testi che non sono nomi di entità
+        
+        Returns:
+            np.ndarray (len(texts), dim)
+        """
+        if cache:
+            return self._embed_queries(texts)
+        return self._compute_embeddings(texts)
+    
+    def _build_result(
+        self,
+        entity_name: str,
+        similarities: List[float],
+        top_types: List[Tuple[EntityType, float]],
+        name_lower: Optional[str] = None
+    ) -> EntityTypeResult:
+        """
+        Applica rule boost e soglia alle similarity di una singola entità.
+        
+        Args:
+            entity_name: Nome dell'entità
+            similarities: Similarity verso ogni tipo, allineate a self._type_labels
+            top_types: Primi TOP_K_TYPES (tipo, similarity) in ordine decrescente
+            name_lower: entity_name.lower() se già calcolato dal chiamante
+        """
+        signals: List[str] = []
+        best_type, best_sim = top_types[0]
+        
+        signals.append(f"embedding_top:{best_type.value}={best_sim:.3f}")
+        
+        # ===== STEP 2: RULE BOOST (opzionale) =====
+        confidence = best_sim
+        method = "embedding"
+        
+        # Oltre il tetto il boost non può alzare la confidence (min() la riporterebbe
+        # al tetto): si salta il lavoro regex/split. NB: la soglia "utile" NON è
+        # tetto - MAX_RULE_BOOST, perché boost parziali (+0.10, +0.05) sotto quel
+        # valore alzano ancora la confidence
+        if self.use_rule_boost and best_sim < MAX_BOOSTED_CONFIDENCE:
+            boost = self._calculate_rule_boost(entity_name, best_type, name_lower)
+            if boost > 0:
+                confidence = min(MAX_BOOSTED_CONFIDENCE, confidence + boost)
+                method = "embedding+rules"
+                signals.append(f"rule_boost:+{boost:.2f}")
+                self.stats["rule_boosts"] += 1
+        
+        # ===== STEP 3: VALIDA RISULTATO =====
+        # Se confidence troppo bassa, considera UNKNOWN
+        if confidence < 0.35:
+            signals.append("low_confidence_fallback")
             self.stats["fallbacks"] += 1
             return EntityTypeResult(
                 entity_type=EntityType.UNKNOWN,
-                confidence=0.2,
-                method="error_fallback",
-                signals=[f"error:{str(e)[:50]}"]
+                confidence=confidence,
+                method="fallback",
+                signals=signals,
+                alternative_types=top_types[:3],
+                embedding_scores=_LazyScores(self._type_labels, similarities)
             )
+        
+        self.stats["embedding_inferences"] += 1
+        return EntityTypeResult(
+            entity_type=best_type,
+            confidence=round(confidence, 3),
+            method=method,
+            signals=signals,
+            alternative_types=[(t, s) for t, s in top_types[1:4] if s >= 0.25],
+            embedding_scores=_LazyScores(self._type_labels, similarities, digits=4)
+        )
     
-    def _calculate_rule_boost(self, entity_name: str, suggested_type: EntityType) -> float:
+    def _calculate_rule_boost(
+        self,
+        entity_name: str,
+        suggested_type: EntityType,
+        name_lower: Optional[str] = None
+    ) -> float:
         """
         Calcola boost basato su regole per CONFERMARE il tipo suggerito dall'embedding.
         
         NON determina il tipo, solo AUMENTA confidence se le regole concordano.
         
         Returns:
-            Boost value (0.0 - 0.15)
+            Boost value (0.0 - MAX_RULE_BOOST)
         """
         boost = 0.0
-        name_lower = entity_name.lower().strip()
+        name_lower = (name_lower if name_lower is not None else entity_name.lower()).strip()
         
         if suggested_type == EntityType.PERSON:
-            # Boost se nome italiano riconosciuto
-            parts = name_lower.split()
-            if any(p in ITALIAN_FIRST_NAMES for p in parts):
+            # Boost se nome italiano riconosciuto: il caso comune ("Marco", "Giulia Rossi")
+            # si risolve sul primo token senza allocare la lista di split()
+            first = name_lower.partition(" ")[0]
+            if first in ITALIAN_FIRST_NAMES or (
+                first != name_lower and any(p in ITALIAN_FIRST_NAMES for p in name_lower.split())
+            ):
                 boost += 0.1
             # Boost se pattern titolo (Dott., Ing., etc.)
-            for pattern in self._person_patterns:
-                if pattern.match(entity_name):
-                    boost += 0.05
-                    break
+            if self._person_regex.match(name_lower):
+                boost += 0.05
         
         elif suggested_type == EntityType.ORGANIZATION:
             # Boost se suffisso societario
-            for pattern in self._org_patterns:
-                if pattern.match(entity_name):
-                    boost += 0.1
-                    break
+            if self._org_regex.match(name_lower):
+                boost += 0.1
         
         elif suggested_type == EntityType.LOCATION:
             # Boost se pattern indirizzo
-            for pattern in self._loc_patterns:
-                if pattern.match(entity_name):
-                    boost += 0.1
-                    break
-        
-        return min(0.15, boost)  # Cap al 15% boost
-    
-    def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        """Calcola cosine similarity tra due vettori"""
-        dot_product = sum(x * y for x, y in zip(a, b))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(x * x for x in b) ** 0.5
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return dot_product / (norm_a * norm_b)
+            if self._loc_regex.match(name_lower):
+                boost += 0.1
+        
+        return min(MAX_RULE_BOOST, boost)  # Cap al 15% boost
     
     # ==================== FUTURE: LLM INTEGRATION ====================
     
@@ -461,6 +880,7 @@ class EntityTypeNormalizer:
         """Ritorna statistiche d'uso"""
         total = (
             self.stats["embedding_inferences"] + 
+            self.stats["rule_inferences"] + 
             self.stats["fallbacks"] + 
             self.stats["cache_hits"]
         )
@@ -468,40 +888,52 @@ class EntityTypeNormalizer:
             **self.stats,
             "total_inferences": total,
             "cache_size": len(self._cache),
+            "cache_max": self._cache_max,
+            "query_cache_size": len(self._query_emb_cache),
             "types_loaded": len(self._type_embeddings) if self._type_embeddings else 0,
             "embedding_ready": self._embeddings_ready
         }
     
     def clear_cache(self):
-        """Svuota la cache"""
-        self._cache.clear()
+        """Svuota la cache (risultati ed embedding delle query)"""
+        with self._cache_lock:
+            self._cache.clear()
+            self._query_emb_cache.clear()
         logger.info("Entity type cache cleared")
     
     def add_exemplars(self, entity_type: EntityType, exemplars: List[str]):
         """
         Aggiunge exemplars per un tipo (per fine-tuning).
         
-        Richiede re-compute degli embeddings.
+        Richiede re-compute degli embeddings (la chiave della cache su disco
+        cambia con gli exemplar, quindi il file viene riscritto al prossimo uso).
         """
-        if entity_type in TYPE_EXEMPLARS:
-            TYPE_EXEMPLARS[entity_type].extend(exemplars)
-        else:
-            TYPE_EXEMPLARS[entity_type] = exemplars
-        
-        # Invalida embeddings pre-calcolati
-        self._embeddings_ready = False
-        self._type_embeddings = None
+        # Sotto _warmup_lock: non si modificano gli exemplar a metà di un warmup
+        with self._warmup_lock:
+            if entity_type in TYPE_EXEMPLARS:
+                TYPE_EXEMPLARS[entity_type].extend(exemplars)
+            else:
+                TYPE_EXEMPLARS[entity_type] = exemplars
+            
+            # Invalida embeddings pre-calcolati
+            self._embeddings_ready = False
+            self._type_embeddings = None
+            self._type_matrix = None
         
-        logger.info(f"Added {len(exemplars)} exemplars for {entity_type.value}, embeddings invalidated")
+        logger.info("Added %d exemplars for %s, embeddings invalidated", len(exemplars), entity_type.value)
 
 
 # Singleton instance
 _normalizer_instance: Optional[EntityTypeNormalizer] = None
+_normalizer_lock = threading.Lock()
 
 
 def get_entity_type_normalizer() -> EntityTypeNormalizer:
-    """Get singleton instance of EntityTypeNormalizer"""
+    """Get singleton instance of EntityTypeNormalizer (thread-safe)"""
     global _normalizer_instance
     if _normalizer_instance is None:
-        _normalizer_instance = EntityTypeNormalizer()
+        # Double-checked locking: il lock si paga solo alla prima creazione
+        with _normalizer_lock:
+            if _normalizer_instance is None:
+                _normalizer_instance = EntityTypeNormalizer()
     return _normalizer_instance
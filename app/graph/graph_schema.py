@@ -0,0 +1,486 @@
+"""
+Graph Schema - Indici e migrazioni idempotenti per le tabelle del grafo
+
+Le tabelle entities / relationships / relationship_events vengono create
+fuori da questo servizio: qui si aggiungono solo colonne denormalizzate,
+trigger e indici in modo idempotente. Se una tabella non esiste ancora, i suoi
+statement vengono semplicemente saltati e ritentati alla connessione successiva.
+
+Author: MindMemoryService Team
+Date: February 2026
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Scalari "caldi" di entities derivati dai blob JSON. ref: prefisso delle colonne
+# (es. "NEW." nei trigger). JSON non valido → valori di default, mai un errore:
+# i trigger girano anche sulle scritture dei writer esterni
+def _entity_source_sql(ref: str = "") -> str:
+    """attributes_json.source, 'extraction' se assente"""
+    attributes = f"{ref}attributes_json"
+    return (
+        f"COALESCE(CASE WHEN json_valid({attributes}) "
+        f"THEN json_extract({attributes}, '$.source') END, 'extraction')"
+    )
+
+
+def _entity_protected_sql(ref: str = "") -> str:
+    """1 se tags_json contiene il tag 'protected'"""
+    tags = f"{ref}tags_json"
+    return (
+        f"EXISTS (SELECT 1 FROM json_each(CASE WHEN json_valid({tags}) THEN {tags} ELSE '[]' END) "
+        f"WHERE value = 'protected')"
+    )
+
+
+# Colonne aggiunte via ALTER TABLE: (nome, definizione, backfill one-shot o None).
+# Il backfill gira solo quando la colonna viene appena creata.
+GRAPH_COLUMNS: Dict[str, List[Tuple[str, str, Optional[str]]]] = {
+    "entities": [
+        # Scalari "caldi" letti dal decay, estratti dai blob JSON (AoS → SoA)
+        (
+            "source", "TEXT DEFAULT 'extraction'",
+            f"UPDATE entities SET source = {_entity_source_sql()}"
+        ),
+        (
+            "is_protected", "INTEGER DEFAULT 0",
+            f"UPDATE entities SET is_protected = {_entity_protected_sql()}"
+        ),
+        # updated_at come epoch seconds: confronti interi e range scan sull'indice
+        (
+            "updated_at_ts", "INTEGER",
+            "UPDATE entities SET updated_at_ts = CAST(strftime('%s', updated_at) AS INTEGER)"
+        ),
+        # Ultimo decay applicato (epoch seconds): il decay non tocca più updated_at
+        ("last_decayed_at", "INTEGER", None),
+    ],
+    "relationships": [
+        (
+            "updated_at_ts", "INTEGER",
+            "UPDATE relationships SET updated_at_ts = CAST(strftime('%s', updated_at) AS INTEGER)"
+        ),
+        ("last_decayed_at", "INTEGER", None),
+    ],
+}
+
+
+def _updated_ts_triggers(table: str) -> List[str]:
+    """
+    Trigger che mantengono updated_at_ts allineato a updated_at per ogni writer
+    (anche quelli esterni a questo servizio). Il WHEN evita la seconda scrittura
+    quando il writer ha già impostato il valore corretto.
+    """
+    ts = "CAST(strftime('%s', NEW.updated_at) AS INTEGER)"
+    body = f"UPDATE {table} SET updated_at_ts = {ts} WHERE rowid = NEW.rowid;"
+    guard = f"WHEN NEW.updated_at_ts IS NOT {ts}"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_updated_ts_insert "
+        f"AFTER INSERT ON {table} {guard} BEGIN {body} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_updated_ts_update "
+        f"AFTER UPDATE OF updated_at ON {table} {guard} BEGIN {body} END",
+    ]
+
+
+def _entity_flag_triggers() -> List[str]:
+    """
+    Trigger che mantengono source / is_protected allineati ad attributes_json /
+    tags_json per ogni writer (il decay filtra solo su queste colonne). Il WHEN
+    evita la seconda scrittura quando il writer ha già impostato i valori corretti.
+    """
+    source, protected = _entity_source_sql("NEW."), _entity_protected_sql("NEW.")
+    body = (
+        f"UPDATE entities SET source = {source}, is_protected = {protected} "
+        f"WHERE rowid = NEW.rowid;"
+    )
+    guard = f"WHEN NEW.source IS NOT {source} OR NEW.is_protected IS NOT {protected}"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_entities_flags_insert "
+        f"AFTER INSERT ON entities {guard} BEGIN {body} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_entities_flags_update "
+        f"AFTER UPDATE OF attributes_json, tags_json ON entities {guard} BEGIN {body} END",
+    ]
+
+
+GRAPH_TRIGGERS: Dict[str, List[str]] = {
+    "entities": _updated_ts_triggers("entities") + _entity_flag_triggers(),
+    "relationships": _updated_ts_triggers("relationships"),
+}
+
+# Indici per tabella (CREATE INDEX IF NOT EXISTS → sicuri da rieseguire)
+GRAPH_INDEXES: Dict[str, List[str]] = {
+    "entities": [
+        # Versioni precedenti dell'indice di decay (su updated_at TEXT / non covering)
+        "DROP INDEX IF EXISTS idx_entities_decay",
+        "DROP INDEX IF EXISTS idx_entities_decay_ts",
+        # Partial covering index: il decay legge solo le entità attive decadibili
+        # e valuta soglia + nuovo valore senza toccare la tabella
+        "CREATE INDEX IF NOT EXISTS idx_entities_decay_cover "
+        "ON entities(updated_at_ts, last_decayed_at, confidence) "
+        "WHERE status = 'active' AND is_protected = 0 AND source NOT IN ('user_declared', 'system')",
+        # Lookup esatto per nome (case-insensitive ASCII, come LOWER di SQLite)
+        "CREATE INDEX IF NOT EXISTS idx_entities_name_lower ON entities(LOWER(primary_name))",
+    ],
+    "relationships": [
+        "DROP INDEX IF EXISTS idx_relationships_updated_ts",
+        "CREATE INDEX IF NOT EXISTS idx_relationships_active_updated "
+        "ON relationships(updated_at_ts, last_decayed_at, strength) WHERE status = 'active'",
+        # NOT EXISTS degli orfani e lookup per endpoint. Su from_entity_id un indice
+        # composto: il prefisso serve gli stessi lookup, relation_type/to_entity_id
+        # coprono i filtri combinati e il rinforzo quando manca l'indice UNIQUE
+        "DROP INDEX IF EXISTS idx_relationships_from",
+        "CREATE INDEX IF NOT EXISTS idx_relationships_from_type "
+        "ON relationships(from_entity_id, relation_type, to_entity_id)",
+        "CREATE INDEX IF NOT EXISTS idx_relationships_to ON relationships(to_entity_id)",
+        # query_relationships: ORDER BY intensity, confidence sulle attive senza sort
+        "CREATE INDEX IF NOT EXISTS idx_relationships_active_intensity "
+        "ON relationships(intensity DESC, confidence DESC) WHERE status = 'active'",
+    ],
+    "relationship_events": [
+        # Storico per relazione in ordine di tempo: covering per trend/volatilità
+        # (valence, intensity); il prefisso serve anche get_relationship_events
+        "CREATE INDEX IF NOT EXISTS idx_relationship_events_rel_ts "
+        "ON relationship_events(rel_id, timestamp DESC, valence, intensity)",
+    ],
+}
+
+# Unicità della relazione attiva (from, to, relation_type): è il conflict target
+# dell'UPSERT in create_relationship_from_raw. Su database con duplicati storici
+# la creazione fallisce → warning e il servizio resta sul percorso SELECT + UPDATE.
+#
+# VINCOLO per tutti i writer di relationships (anche esterni al servizio): al più UNA
+# riga con status='active' per (from_entity_id, to_entity_id, relation_type). Le righe
+# archived/deleted non sono vincolate. Un INSERT o un UPDATE che riattiva una seconda
+# riga fallisce con sqlite3.IntegrityError; update_relationship lo traduce in
+# RelationshipConflictError (HTTP 409 su PATCH /graph/relationships/{rel_id}).
+RELATIONSHIP_ACTIVE_UNIQUE_INDEX = "idx_relationships_active_unique"
+GRAPH_UNIQUE_INDEXES: Dict[str, List[str]] = {
+    "relationships": [
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {RELATIONSHIP_ACTIVE_UNIQUE_INDEX} "
+        "ON relationships(from_entity_id, to_entity_id, relation_type) WHERE status = 'active'",
+    ],
+}
+
+# Indice full-text (FTS5, tokenizer trigram) su entity_id / primary_name / aliases_json:
+# le ricerche per sottostringa delle entità ('%q%') lo usano al posto della scansione.
+# External content (nessuna copia del testo) tenuto allineato da trigger; se FTS5 o il
+# tokenizer trigram (SQLite >= 3.34) mancano → warning e le ricerche restano su LIKE.
+ENTITY_FTS_TABLE = "entities_fts"
+ENTITY_FTS_COLUMNS = ("entity_id", "primary_name", "aliases_json")
+
+
+def _entity_fts_statements() -> List[str]:
+    """CREATE della tabella FTS e trigger di sincronizzazione con entities"""
+    columns = ", ".join(ENTITY_FTS_COLUMNS)
+    new_values = ", ".join(f"NEW.{column}" for column in ENTITY_FTS_COLUMNS)
+    old_values = ", ".join(f"OLD.{column}" for column in ENTITY_FTS_COLUMNS)
+    insert = f"INSERT INTO {ENTITY_FTS_TABLE}(rowid, {columns}) VALUES (NEW.rowid, {new_values});"
+    delete = (
+        f"INSERT INTO {ENTITY_FTS_TABLE}({ENTITY_FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', OLD.rowid, {old_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {ENTITY_FTS_TABLE} USING fts5("
+        f"{columns}, content='entities', content_rowid='rowid', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS trg_entities_fts_insert "
+        f"AFTER INSERT ON entities BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_entities_fts_delete "
+        f"AFTER DELETE ON entities BEGIN {delete} END",
+        # Solo le colonne indicizzate: il decay (confidence) non tocca l'indice
+        f"CREATE TRIGGER IF NOT EXISTS trg_entities_fts_update "
+        f"AFTER UPDATE OF {columns} ON entities BEGIN {delete} {insert} END",
+    ]
+
+
+# Alias delle entità, uno per riga e in minuscolo, estratti da aliases_json: il lookup
+# esatto per alias è una ricerca sulla chiave invece di una scansione dei blob JSON.
+# Tenuta allineata da trigger (anche per i writer esterni a questo servizio)
+ENTITY_ALIAS_TABLE = "entity_aliases"
+
+
+def _entity_alias_statements() -> List[str]:
+    """CREATE della tabella alias e trigger di sincronizzazione con entities"""
+    aliases = ENTITY_ALIAS_TABLE
+    insert = (
+        f"INSERT OR IGNORE INTO {aliases}(alias_lower, entity_id) "
+        f"SELECT LOWER(value), NEW.entity_id FROM json_each("
+        f"CASE WHEN json_valid(NEW.aliases_json) THEN NEW.aliases_json ELSE '[]' END) "
+        f"WHERE type = 'text';"
+    )
+    delete = f"DELETE FROM {aliases} WHERE entity_id = OLD.entity_id;"
+    return [
+        f"CREATE TABLE IF NOT EXISTS {aliases} ("
+        "alias_lower TEXT NOT NULL, entity_id TEXT NOT NULL, "
+        "PRIMARY KEY (alias_lower, entity_id)"
+        ") WITHOUT ROWID",
+        f"CREATE INDEX IF NOT EXISTS idx_{aliases}_entity ON {aliases}(entity_id)",
+        f"CREATE TRIGGER IF NOT EXISTS trg_entities_aliases_insert "
+        f"AFTER INSERT ON entities BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_entities_aliases_delete "
+        f"AFTER DELETE ON entities BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_entities_aliases_update "
+        f"AFTER UPDATE OF entity_id, aliases_json ON entities BEGIN {delete} {insert} END",
+    ]
+
+
+# Valence testuale degli eventi → segno * intensity, in [-1, 1] (valori già numerici
+# vengono usati così come sono). ref: prefisso delle colonne (es. "NEW." nei trigger)
+def valence_score_sql(ref: str = "") -> str:
+    """Espressione SQL del punteggio di valence di un evento"""
+    return (
+        f"CASE WHEN typeof({ref}valence) IN ('integer', 'real') THEN {ref}valence "
+        f"ELSE (CASE {ref}valence WHEN 'positive' THEN 1.0 WHEN 'negative' THEN -1.0 ELSE 0.0 END) "
+        f"* COALESCE({ref}intensity, 1.0) END"
+    )
+
+
+# Aggregati incrementali per relazione (Welford: conteggio, media, M2, ultimo punteggio,
+# cambi di segno) aggiornati a ogni evento inserito: la volatilità è una lettura O(1)
+# invece di una scansione dello storico. Delete/update di eventi invalidano la riga:
+# finché manca, le letture calcolano gli aggregati dallo storico (senza scrivere) e
+# ensure_graph_schema la ricostruisce al successivo avvio.
+RELATIONSHIP_STATS_TABLE = "relationship_stats"
+
+
+def _relationship_stats_rebuild_sql(where: str = "") -> str:
+    """Ricalcolo completo degli aggregati dallo storico (tutte le relazioni o filtrate da where)"""
+    return f"""
+        INSERT OR REPLACE INTO {RELATIONSHIP_STATS_TABLE}
+            (rel_id, event_count, mean, m2, last_score, sign_changes)
+        SELECT rel_id,
+               COUNT(*),
+               AVG(score),
+               MAX(SUM(score * score) - COUNT(*) * AVG(score) * AVG(score), 0.0),
+               MAX(CASE WHEN pos = 1 THEN score END),
+               COALESCE(SUM((score >= 0) != (prev_score >= 0)), 0)
+        FROM (
+            SELECT rel_id, score,
+                   ROW_NUMBER() OVER (PARTITION BY rel_id ORDER BY timestamp DESC) AS pos,
+                   LAG(score) OVER (PARTITION BY rel_id ORDER BY timestamp) AS prev_score
+            FROM (
+                SELECT rel_id, timestamp, {valence_score_sql()} AS score
+                FROM relationship_events {where}
+            )
+        )
+        GROUP BY rel_id
+    """
+
+
+def _relationship_stats_statements() -> List[str]:
+    """CREATE della tabella aggregati e trigger di manutenzione su relationship_events"""
+    stats = RELATIONSHIP_STATS_TABLE
+    score = valence_score_sql("NEW.")
+    # Nel DO UPDATE le colonne sono i valori precedenti, excluded.mean è il nuovo punteggio
+    upsert = (
+        f"INSERT INTO {stats}(rel_id, event_count, mean, m2, last_score, sign_changes) "
+        f"VALUES (NEW.rel_id, 1, {score}, 0.0, {score}, 0) "
+        f"ON CONFLICT(rel_id) DO UPDATE SET "
+        f"event_count = event_count + 1, "
+        f"mean = mean + (excluded.mean - mean) / (event_count + 1), "
+        f"m2 = m2 + (excluded.mean - mean) "
+        f"* (excluded.mean - (mean + (excluded.mean - mean) / (event_count + 1))), "
+        f"last_score = excluded.mean, "
+        f"sign_changes = sign_changes + ((excluded.mean >= 0) != (last_score >= 0));"
+    )
+    return [
+        f"CREATE TABLE IF NOT EXISTS {stats} ("
+        "rel_id TEXT PRIMARY KEY, event_count INTEGER NOT NULL, mean REAL NOT NULL, "
+        "m2 REAL NOT NULL, last_score REAL, sign_changes INTEGER NOT NULL DEFAULT 0"
+        ") WITHOUT ROWID",
+        f"CREATE TRIGGER IF NOT EXISTS trg_relationship_events_stats_insert "
+        f"AFTER INSERT ON relationship_events BEGIN {upsert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_relationship_events_stats_delete "
+        f"AFTER DELETE ON relationship_events "
+        f"BEGIN DELETE FROM {stats} WHERE rel_id = OLD.rel_id; END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_relationship_events_stats_update "
+        f"AFTER UPDATE OF rel_id, valence, intensity, timestamp ON relationship_events "
+        f"BEGIN DELETE FROM {stats} WHERE rel_id IN (OLD.rel_id, NEW.rel_id); END",
+    ]
+
+
+# Database (db_file) già migrati in questo processo
+_ready_databases: Set[str] = set()
+_ready_lock = threading.Lock()
+
+
+def _existing_tables(conn) -> Set[str]:
+    """Nomi delle tabelle presenti nel database"""
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    return {row[0] for row in rows}
+
+
+def _existing_columns(conn, table: str) -> Set[str]:
+    """Nomi delle colonne di una tabella"""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def table_exists(conn, name: str) -> bool:
+    """True se la tabella (anche virtuale) esiste nel database"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def _ensure_entity_fts(conn) -> None:
+    """Crea l'indice full-text delle entità; al primo avvio lo popola dalle righe esistenti"""
+    created = not table_exists(conn, ENTITY_FTS_TABLE)
+    try:
+        for sql in _entity_fts_statements():
+            conn.execute(sql)
+    except sqlite3.OperationalError as e:
+        logger.warning("[GRAPH_SCHEMA] Entity full-text index unavailable (FTS5/trigram): %s", e)
+        return
+    if created:
+        conn.execute(f"INSERT INTO {ENTITY_FTS_TABLE}({ENTITY_FTS_TABLE}) VALUES ('rebuild')")
+        logger.info("[GRAPH_SCHEMA] Built full-text index %s", ENTITY_FTS_TABLE)
+
+
+def _ensure_entity_aliases(conn) -> None:
+    """Crea la tabella alias e i trigger; al primo avvio la popola dalle entità esistenti"""
+    created = not table_exists(conn, ENTITY_ALIAS_TABLE)
+    for sql in _entity_alias_statements():
+        conn.execute(sql)
+    if created:
+        conn.execute(
+            f"INSERT OR IGNORE INTO {ENTITY_ALIAS_TABLE}(alias_lower, entity_id) "
+            "SELECT LOWER(a.value), e.entity_id FROM entities e, json_each("
+            "CASE WHEN json_valid(e.aliases_json) THEN e.aliases_json ELSE '[]' END) a "
+            "WHERE a.type = 'text'"
+        )
+        logger.info("[GRAPH_SCHEMA] Built table %s", ENTITY_ALIAS_TABLE)
+
+
+def _ensure_relationship_stats(conn) -> None:
+    """Crea la tabella aggregati e i trigger; al primo avvio la popola dallo storico"""
+    created = not table_exists(conn, RELATIONSHIP_STATS_TABLE)
+    for sql in _relationship_stats_statements():
+        conn.execute(sql)
+    if created:
+        conn.execute(_relationship_stats_rebuild_sql())
+        logger.info("[GRAPH_SCHEMA] Built table %s", RELATIONSHIP_STATS_TABLE)
+        return
+    # Righe invalidate da delete/update di eventi dopo l'ultimo avvio
+    rebuilt = conn.execute(_relationship_stats_rebuild_sql(
+        f"WHERE rel_id NOT IN (SELECT rel_id FROM {RELATIONSHIP_STATS_TABLE})"
+    )).rowcount
+    if rebuilt > 0:
+        logger.info("[GRAPH_SCHEMA] Rebuilt %d rows of %s", rebuilt, RELATIONSHIP_STATS_TABLE)
+
+
+def _resync_entity_flags(conn) -> None:
+    """
+    Prima della creazione dei trigger su source / is_protected: riallinea le righe
+    scritte da writer esterni dopo il backfill (una volta sola per database)
+    """
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_entities_flags_insert'"
+    ).fetchone()
+    if row is not None:
+        return
+    source, protected = _entity_source_sql(), _entity_protected_sql()
+    cursor = conn.execute(
+        f"UPDATE entities SET source = {source}, is_protected = {protected} "
+        f"WHERE source IS NOT {source} OR is_protected IS NOT {protected}"
+    )
+    if cursor.rowcount:
+        logger.info("[GRAPH_SCHEMA] Resynced source/is_protected on %d entities", cursor.rowcount)
+
+
+def index_exists(conn, name: str) -> bool:
+    """True se l'indice esiste nel database"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def ensure_graph_schema(conn) -> bool:
+    """
+    Applica colonne/indici del grafo sulle tabelle esistenti.
+
+    Args:
+        conn: Database connection
+
+    Returns:
+        True se tutte le tabelle del grafo esistevano (schema completo),
+        False se qualcuna manca e va ritentata più tardi
+    """
+    tables = _existing_tables(conn)
+    complete = True
+
+    for table, columns in GRAPH_COLUMNS.items():
+        if table not in tables:
+            complete = False
+            continue
+        existing = _existing_columns(conn, table)
+        for name, definition, backfill in columns:
+            if name in existing:
+                continue
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            if backfill:
+                conn.execute(backfill)
+            logger.info(f"[GRAPH_SCHEMA] Added column {table}.{name}")
+
+    if "entities" in tables:
+        _resync_entity_flags(conn)
+    
+    for table, statements in GRAPH_TRIGGERS.items():
+        if table not in tables:
+            complete = False
+            continue
+        for sql in statements:
+            conn.execute(sql)
+
+    for table, statements in GRAPH_INDEXES.items():
+        if table not in tables:
+            complete = False
+            continue
+        for sql in statements:
+            conn.execute(sql)
+
+    for table, statements in GRAPH_UNIQUE_INDEXES.items():
+        if table not in tables:
+            complete = False
+            continue
+        for sql in statements:
+            try:
+                conn.execute(sql)
+            except sqlite3.IntegrityError as e:
+                logger.warning("[GRAPH_SCHEMA] Unique index skipped on %s (duplicate rows): %s", table, e)
+
+    if "entities" in tables:
+        _ensure_entity_fts(conn)
+        _ensure_entity_aliases(conn)
+    
+    if "relationship_events" in tables:
+        _ensure_relationship_stats(conn)
+    
+    conn.commit()
+    if complete:
+        logger.info("[GRAPH_SCHEMA] Graph schema ensured")
+    return complete
+
+
+def ensure_graph_schema_once(db_manager) -> None:
+    """
+    Esegue ensure_graph_schema una sola volta per database e processo
+    (ritentato alle chiamate successive finché le tabelle non esistono).
+
+    Args:
+        db_manager: SQLiteMetadataManager instance
+    """
+    key = getattr(db_manager, "db_file", None) or str(id(db_manager))
+    if key in _ready_databases:
+        return
+    with _ready_lock:
+        if key in _ready_databases:
+            return
+        with db_manager._get_thread_connection() as conn:
+            if ensure_graph_schema(conn):
+                _ready_databases.add(key)
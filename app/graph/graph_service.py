@@ -13,20 +13,459 @@ Author: MindMemoryService Team
 Date: February 2026
 """
 
+import asyncio
+import functools
 import logging
 import json
-import uuid
-from typing import Dict, Any, List, Optional
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from app.graph.data_models import StoredRelationship, RelationCategory, EntityType
 from app.graph.predicate_normalizer import PredicateNormalizer, get_predicate_normalizer
 from app.graph.entity_type_normalizer import EntityTypeNormalizer, get_entity_type_normalizer
 from app.graph.decay_service import GraphDecayService, get_decay_service
+from app.graph.graph_schema import (
+    ENTITY_ALIAS_TABLE, ENTITY_FTS_TABLE, RELATIONSHIP_ACTIVE_UNIQUE_INDEX,
+    RELATIONSHIP_STATS_TABLE, ensure_graph_schema_once, index_exists, table_exists,
+    valence_score_sql
+)
 
 logger = logging.getLogger(__name__)
 
 
+class RelationshipConflictError(ValueError):
+    """
+    La scrittura renderebbe attive due relazioni con lo stesso (from, to, relation_type):
+    vedi RELATIONSHIP_ACTIVE_UNIQUE_INDEX. active_rel_id è la relazione attiva esistente.
+    """
+    
+    def __init__(self, rel_id: str, active_rel_id: Optional[str]):
+        self.rel_id = rel_id
+        self.active_rel_id = active_rel_id
+        super().__init__(
+            f"Relationship {rel_id} cannot be active: "
+            f"{active_rel_id or 'another relationship'} is already active for the same "
+            f"(from_entity_id, to_entity_id, relation_type)"
+        )
+
+
+# Massimo numero di parametri "?" per statement (SQLITE_MAX_VARIABLE_NUMBER storico)
+SQLITE_MAX_PARAMS = 999
+
+# Entità la cui esistenza è stata confermata da un commit recente: per questo
+# intervallo _ensure_entity_exists non tocca il database
+ENTITY_SEEN_TTL_SECONDS = 60.0
+ENTITY_SEEN_MAX = 50_000
+
+# Cache dei risultati di search_entities / resolve_entity (Mind risolve lo stesso nome
+# a ogni turno): LRU limitata con TTL breve, invalidata da ogni scrittura del servizio.
+# Il TTL limita la staleness verso i writer esterni (altri processi, vectorstore)
+LOOKUP_CACHE_TTL_SECONDS = 10.0
+LOOKUP_CACHE_MAX = 512
+
+# Embedding delle descrizioni "nome (tipo)" dei candidati di disambiguate_entity:
+# ricorrono tra una chiamata e l'altra. LRU propria, separata dalla cache delle
+# query dell'EntityTypeNormalizer (~1.5 KB a voce)
+DESCRIPTION_EMB_CACHE_MAX = 2_000
+
+# create_entity su un'entità già presente e senza novità: nessuna scrittura, salvo
+# rinfrescare updated_at (ultima evidenza per il decay) se più vecchio di così
+ENTITY_TOUCH_INTERVAL_SECONDS = 3600
+
+# Inferenza tipo da entity_id: ID che indicano l'utente stesso + prefissi "tipo:"
+# in un'unica alternation con gruppi nominati (una sola scansione dell'ID)
+SELF_ENTITY_IDS = frozenset({"self", "user", "user_admin", "me", "io"})
+ENTITY_ID_TYPE_RE = re.compile(
+    r"(?P<person>person:|user:)"
+    r"|(?P<place>place:|location:|city:|country:)"
+    r"|(?P<organization>org:|company:|organization:)"
+    r"|(?P<food>food:|dish:|meal:)"
+    r"|(?P<vehicle>vehicle:|car:|bike:)"
+)
+
+# Caratteri rimossi dal nome in _generate_entity_id: \W è l'esatto complemento di
+# isalnum() + "_" (Unicode), quindi le lettere accentate restano nell'ID
+ENTITY_ID_STRIP_RE = re.compile(r"\W+")
+
+# Pool di thread per l'I/O SQLite bloccante: i metodi async non bloccano l'event
+# loop e ogni worker riusa la propria connessione persistente (_get_thread_connection)
+DB_EXECUTOR_WORKERS = 4
+_db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="graph-db")
+
+# Colonne lette da _row_to_relationship_dict (al posto di SELECT *). I due testi
+# potenzialmente lunghi sono separati: le liste possono ometterli (include_metadata)
+RELATIONSHIP_COLUMNS = (
+    "rel_id", "from_entity_id", "to_entity_id", "type", "relation_type",
+    "original_predicate", "strength", "confidence", "valence", "intensity",
+    "evidence_count", "trust", "status", "created_at", "updated_at", "last_reinforced",
+)
+RELATIONSHIP_TEXT_COLUMNS = ("source_sentence", "metadata_json")
+# Default per i dict privi di qualche colonna (le righe SQL le hanno sempre tutte)
+RELATIONSHIP_DICT_DEFAULTS = {"confidence": 0.8, "valence": "neutral", "intensity": 0.5, "evidence_count": 1}
+
+
+@functools.lru_cache(maxsize=None)
+def _relationship_columns(include_metadata: bool = True, alias: str = "") -> str:
+    """
+    Lista SELECT delle colonne relazione (alias: prefisso tabella, es. "r").
+    In cache: le query costruite a ogni chiamata non ricompongono la lista
+    """
+    columns = RELATIONSHIP_COLUMNS + (RELATIONSHIP_TEXT_COLUMNS if include_metadata else ())
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(prefix + column for column in columns)
+
+
+# Colonne scritte dall'INSERT di create_relationships_from_raw_bulk: le altre
+# (trust, ...) restano ai default dello schema e vengono rilette
+BULK_RELATIONSHIP_INSERT_COLUMNS = (
+    "rel_id", "from_entity_id", "to_entity_id", "type", "relation_type",
+    "original_predicate", "source_sentence", "metadata_json",
+    "strength", "confidence", "valence", "intensity",
+    "evidence_count", "status", "created_at", "updated_at", "last_reinforced",
+)
+BULK_RELATIONSHIP_INSERT_SQL = (
+    f"INSERT INTO relationships ({', '.join(BULK_RELATIONSHIP_INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(BULK_RELATIONSHIP_INSERT_COLUMNS))})"
+)
+
+RELATIONSHIP_SELECT_BY_ID = f"SELECT {_relationship_columns()} FROM relationships WHERE rel_id = ?"
+RELATIONSHIP_SELECT_ACTIVE = f"""
+    SELECT {_relationship_columns()}
+    FROM relationships 
+    WHERE from_entity_id = ? AND to_entity_id = ? AND relation_type = ?
+    AND status = 'active'
+"""
+
+# RETURNING (SQLite >= 3.35) con le stesse colonne di _relationship_columns().
+# I CAST servono perché RETURNING restituisce i REAL interi (1.0) come int
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+RELATIONSHIP_RETURNING = "RETURNING " + ", ".join(
+    f"CAST({column} AS REAL) AS {column}"
+    if column in ("strength", "confidence", "intensity", "trust") else column
+    for column in RELATIONSHIP_COLUMNS + RELATIONSHIP_TEXT_COLUMNS
+)
+
+# Colonne scalari di relationship_events restituite così come sono
+# (metadata_json viene letto in coda e deserializzato a parte)
+RELATIONSHIP_EVENT_COLUMNS = (
+    "event_id", "rel_id", "predicate", "valence", "intensity", "source_sentence",
+    "timestamp", "normalization_method", "normalization_confidence",
+)
+
+# Storia eventi di una relazione, un testo SQL costante per direzione
+RELATIONSHIP_EVENTS_DESC_SQL = f"""
+    SELECT {", ".join(RELATIONSHIP_EVENT_COLUMNS)}, metadata_json FROM relationship_events
+    WHERE rel_id = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+"""
+RELATIONSHIP_EVENTS_ASC_SQL = f"""
+    SELECT {", ".join(RELATIONSHIP_EVENT_COLUMNS)}, metadata_json FROM relationship_events
+    WHERE rel_id = ?
+    ORDER BY timestamp ASC
+    LIMIT ?
+"""
+
+# Valence numerica degli eventi (segno * intensity, vedi graph_schema.valence_score_sql).
+# Calcolata in SQL: trend e volatilità vengono aggregati da SQLite in una sola riga
+VALENCE_SCORE_SQL = valence_score_sql()
+
+# Ultimi N eventi (più recente per primo): conteggio, media, valence più recente
+# e meno recente della window, differenza media tra eventi consecutivi
+RELATIONSHIP_TREND_SQL = f"""
+    SELECT COUNT(*) AS n,
+           AVG(score) AS avg_valence,
+           MAX(CASE WHEN pos = 1 THEN score END) AS current_valence,
+           MAX(CASE WHEN pos = window_rows THEN score END) AS oldest_valence,
+           AVG(ABS(score - prev_score)) AS avg_diff
+    FROM (
+        SELECT score,
+               ROW_NUMBER() OVER w AS pos,
+               COUNT(*) OVER () AS window_rows,
+               LAG(score) OVER w AS prev_score
+        FROM (
+            SELECT {VALENCE_SCORE_SQL} AS score, timestamp
+            FROM relationship_events
+            WHERE rel_id = ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+        )
+        WINDOW w AS (ORDER BY timestamp DESC)
+    )
+"""
+
+# Aggregati incrementali della relazione (tabella relationship_stats, vedi graph_schema)
+RELATIONSHIP_STATS_SQL = f"""
+    SELECT event_count AS n, m2, sign_changes
+    FROM {RELATIONSHIP_STATS_TABLE}
+    WHERE rel_id = ?
+"""
+
+# Fallback senza relationship_stats (o con la riga invalidata): tutti gli eventi in
+# ordine cronologico, deviazione standard (graph_stddev, vedi _register_sql_functions)
+# e cambi di segno consecutivi
+RELATIONSHIP_VOLATILITY_SQL = f"""
+    SELECT COUNT(*) AS n,
+           graph_stddev(score) AS stddev,
+           COALESCE(SUM((score >= 0) != (prev_score >= 0)), 0) AS sign_changes
+    FROM (
+        SELECT score, LAG(score) OVER (ORDER BY timestamp) AS prev_score
+        FROM (
+            SELECT {VALENCE_SCORE_SQL} AS score, timestamp
+            FROM relationship_events
+            WHERE rel_id = ?
+        )
+    )
+"""
+
+
+class _StddevAggregate:
+    """Deviazione standard di popolazione (Welford, una sola passata) come aggregate SQLite"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def step(self, value):
+        if value is None:
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def finalize(self):
+        if not self.count:
+            return None
+        return (self.m2 / self.count) ** 0.5
+
+
+# Ultima connessione su cui il thread ha registrato le funzioni SQL (le connessioni
+# sqlite3 non supportano weakref/attributi: si tiene il riferimento per identità)
+_sql_functions_local = threading.local()
+
+
+def _register_sql_functions(conn: sqlite3.Connection) -> None:
+    """Registra le funzioni SQL del grafo una sola volta per connessione"""
+    if getattr(_sql_functions_local, "conn", None) is conn:
+        return
+    conn.create_aggregate("graph_stddev", 1, _StddevAggregate)
+    _sql_functions_local.conn = conn
+
+
+# Campi scalari modificabili da update_relationship, in ordine canonico
+# ("metadata" è gestito a parte: merge con il JSON esistente)
+RELATIONSHIP_UPDATE_FIELDS = (
+    "strength", "confidence", "valence", "intensity", "status", "source_sentence"
+)
+
+# Condizioni dei filtri di get_relationships, nell'ordine dei bit della maschera
+RELATIONSHIP_FILTER_CONDITIONS = (
+    "from_entity_id = ?",
+    "to_entity_id = ?",
+    "relation_type = ?",
+    "valence = ?",
+    "confidence >= ?",
+    "strength >= ?",
+    "status = ?",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _relationships_page_sql(mask: int, include_metadata: bool) -> Tuple[str, str]:
+    """
+    SQL di get_relationships per una combinazione di filtri (bit i → condizione i),
+    costruito una sola volta: (pagina con totale, conteggio).
+    """
+    where = " WHERE 1=1" + "".join(
+        f" AND {condition}"
+        for bit, condition in enumerate(RELATIONSHIP_FILTER_CONDITIONS)
+        if mask >> bit & 1
+    )
+    # COUNT(*) OVER() è calcolato sull'intero risultato filtrato, prima di LIMIT/OFFSET
+    page_sql = (
+        f"SELECT {_relationship_columns(include_metadata)}, COUNT(*) OVER() AS total_rows "
+        f"FROM relationships{where} ORDER BY created_at DESC LIMIT ? OFFSET ?"
+    )
+    count_sql = f"SELECT COUNT(*) FROM relationships{where}"
+    return page_sql, count_sql
+
+
+def _dumps_json(obj: Any) -> str:
+    """Serializza le colonne *_json: orjson se disponibile, altrimenti json (stesso formato compatto)"""
+    if ORJSON_AVAILABLE:
+        # OPT_NON_STR_KEYS: chiavi non stringa convertite come fa json.dumps
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _loads_json(data: str) -> Any:
+    """Deserializza le colonne *_json (orjson se disponibile)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Colonne lette da _row_to_entity_dict, in quest'ordine: le SELECT delle entità
+# le elencano esplicitamente (ENTITY_SELECT) e il convertitore le legge per posizione,
+# senza la ricerca per nome di sqlite3.Row. Seguono i campi usati dal merge
+ENTITY_DICT_COLUMNS = (
+    "entity_id", "type", "primary_name", "aliases_json", "identifiers_json",
+    "attributes_json", "salience", "confidence", "status", "tags_json",
+    "created_at", "updated_at",
+)
+ENTITY_COLUMNS = ENTITY_DICT_COLUMNS + ("source", "updated_at_ts")
+ENTITY_SELECT = ", ".join(ENTITY_COLUMNS)
+ENTITY_SELECT_BY_ID = f"SELECT {ENTITY_SELECT} FROM entities WHERE entity_id = ?"
+
+# Entità attive il cui nome o un alias coincide con la query (case-insensitive):
+# indice su LOWER(primary_name) + tabella entity_aliases (vedi graph_schema)
+ENTITY_SELECT_EXACT = f"""
+    SELECT {ENTITY_SELECT} FROM entities
+    WHERE (LOWER(primary_name) = ?
+           OR entity_id IN (SELECT entity_id FROM {ENTITY_ALIAS_TABLE} WHERE alias_lower = ?))
+    AND status = 'active'
+    AND confidence >= ?
+"""
+
+# resolve_entity STEP 2: relazioni attive che menzionano il nome (come source o target),
+# con l'entità menzionata letta nella stessa query (colonne entità in testa, per posizione)
+RESOLVE_RELATIONSHIP_MENTIONS_SQL = f"""
+    WITH found AS (
+        SELECT DISTINCT
+            CASE
+                WHEN LOWER(from_entity_id) LIKE ? THEN from_entity_id
+                WHEN LOWER(to_entity_id) LIKE ? THEN to_entity_id
+            END AS found_entity_id,
+            source_sentence,
+            confidence
+        FROM relationships
+        WHERE status = 'active'
+        AND (LOWER(from_entity_id) LIKE ? OR LOWER(to_entity_id) LIKE ?)
+        ORDER BY confidence DESC
+        LIMIT 5
+    )
+    SELECT {", ".join("e." + column for column in ENTITY_COLUMNS)},
+           found.source_sentence, found.confidence
+    FROM found
+    JOIN entities e ON e.entity_id = found.found_entity_id
+    ORDER BY found.confidence DESC
+"""
+
+# disambiguate_entity: relazioni attive tra i candidati (?1) e le related_entities (?2),
+# in entrambe le direzioni. Le liste di ID arrivano come array JSON (nessun limite
+# sul numero di parametri)
+DISAMBIGUATE_RELATED_SQL = """
+    SELECT rel_id, relation_type, valence, from_entity_id, to_entity_id
+    FROM relationships
+    WHERE status = 'active'
+    AND (
+        (from_entity_id IN (SELECT value FROM json_each(?1))
+         AND to_entity_id IN (SELECT value FROM json_each(?2)))
+        OR (from_entity_id IN (SELECT value FROM json_each(?2))
+            AND to_entity_id IN (SELECT value FROM json_each(?1)))
+    )
+"""
+
+# disambiguate_entity: relazioni attive dei candidati (?1) con i tipi attesi (?2),
+# con i dati dell'entità all'altro capo (target) letti nella stessa query
+DISAMBIGUATE_EXPECTED_SQL = """
+    SELECT c.value AS candidate_id, LOWER(r.relation_type) AS relation_key,
+           r.rel_id, r.valence, r.from_entity_id, r.to_entity_id,
+           e.entity_id AS target_entity_id, e.primary_name AS target_name,
+           e.aliases_json AS target_aliases_json
+    FROM json_each(?1) c
+    JOIN relationships r ON (r.from_entity_id = c.value OR r.to_entity_id = c.value)
+    JOIN entities e ON e.entity_id = CASE
+        WHEN r.from_entity_id = c.value THEN r.to_entity_id
+        ELSE r.from_entity_id
+    END
+    WHERE r.status = 'active'
+    AND LOWER(r.relation_type) IN (SELECT value FROM json_each(?2))
+"""
+
+# Colonne scritte da create_entity: INSERT di una nuova entità e merge su una esistente
+ENTITY_INSERT_COLUMNS = (
+    "entity_id", "type", "primary_name", "aliases_json", "identifiers_json",
+    "attributes_json", "salience", "confidence", "status", "tags_json",
+    "created_at", "updated_at", "source", "is_protected",
+)
+ENTITY_MERGE_COLUMNS = (
+    "aliases_json", "identifiers_json", "attributes_json", "confidence", "updated_at", "source",
+)
+
+# Valori vuoti scritti di default nelle colonne *_json: restituiti senza parser
+_EMPTY_JSON_VALUES = {"[]": list, "{}": dict}
+
+# Blob *_json brevi (tag, alias, attributi piccoli) si ripetono tra molte entità:
+# il parse di liste/dict piatti resta in una cache LRU limitata e il chiamante ne
+# riceve una copia superficiale (modificabile senza toccare la cache)
+JSON_CACHE_MAX_LENGTH = 256
+
+
+@functools.lru_cache(maxsize=4096)
+def _loads_flat_json_cached(data: str) -> Optional[Any]:
+    """Lista/dict con soli valori scalari deserializzati; None per gli altri valori"""
+    value = _loads_json(data)
+    if isinstance(value, list):
+        items = value
+    elif isinstance(value, dict):
+        items = value.values()
+    else:
+        return None
+    if any(isinstance(item, (list, dict)) for item in items):
+        return None
+    return value
+
+
+def _loads_json_field(data: Optional[str], default_factory) -> Any:
+    """Colonna *_json deserializzata; default_factory() se vuota o non valida"""
+    if not data:
+        return default_factory()
+    empty = _EMPTY_JSON_VALUES.get(data)
+    if empty is not None:
+        return empty()
+    try:
+        if len(data) < JSON_CACHE_MAX_LENGTH:
+            value = _loads_flat_json_cached(data)
+            if value is not None:
+                return value.copy()
+        return _loads_json(data)
+    except (ValueError, TypeError):
+        return default_factory()
+
+
+def _chunked(items: List[Any], size: int):
+    """Suddivide una lista in blocchi di al più size elementi"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _invalidates_lookups(method):
+    """Metodo async di scrittura: al termine (anche in errore) invalida la cache di search/resolve"""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            self._lookup_epoch += 1
+    return wrapper
+
+
 class GraphService:
     """
     Servizio centrale per operazioni sul Knowledge Graph.
@@ -34,6 +473,7 @@ class GraphService:
     Fornisce:
     - create_entity(): Crea entità con tipo normalizzato automaticamente
     - create_relationship_from_raw(): Crea relazione normalizzando predicato RAW
+    - create_relationships_from_raw_bulk(): Stesso flusso per N relazioni in una transazione
     - get_relationships(): Query con filtri
     - query_relationships(): Query avanzate con group_by
     - apply_decay(): Trigger decay service
@@ -51,9 +491,134 @@ class GraphService:
         self.entity_type_normalizer = get_entity_type_normalizer()
         self.decay_service = get_decay_service()
         
+        # entity_id -> time.monotonic() dell'ultima conferma (vedi _entity_recently_seen).
+        # Letta e scritta dai thread di _db_executor: accesso sotto _entity_seen_lock
+        self._entity_seen: Dict[str, float] = {}
+        self._entity_seen_lock = threading.Lock()
+        self._entity_seen_epoch = self.decay_service.removal_epoch
+        
+        # UPSERT delle relazioni disponibile? (calcolato alla prima scrittura)
+        self._relationship_upsert: Optional[bool] = None
+        
+        # Indice full-text delle entità presente? (calcolato alla prima ricerca)
+        self._entity_fts: Optional[bool] = None
+        
+        # Tabella degli alias delle entità presente? (calcolato al primo lookup)
+        self._entity_aliases: Optional[bool] = None
+        
+        # Tabella degli aggregati per relazione presente? (calcolato alla prima lettura)
+        self._relationship_stats: Optional[bool] = None
+        
+        # (chiave con epoch) -> (time.monotonic(), risultato) di search_entities / resolve_entity.
+        # Usata solo dal loop asyncio (nessun lock). L'epoch è incrementato da ogni
+        # scrittura (_invalidates_lookups): le voci precedenti non vengono più lette
+        # ed escono per LRU. I risultati sono condivisi: i chiamanti non li modificano
+        self._lookup_cache: "OrderedDict[tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lookup_epoch = 0
+        
+        # descrizione "nome (tipo)" -> embedding normalizzato (vedi _context_similarities).
+        # Usata dai thread di _db_executor: accesso sotto _description_emb_lock
+        self._description_emb_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._description_emb_lock = threading.Lock()
+        
         logger.info("[GRAPH_SERVICE] Initialized")
     
-    def _ensure_entity_exists(self, conn, entity_id: str, entity_type: str = "auto") -> bool:
+    # INSERT di un'entità minimal auto-creata (usato da _ensure_entity_exists e dal bulk).
+    # OR IGNORE su entity_id (PRIMARY KEY): esistenza + creazione in un solo statement
+    _AUTO_ENTITY_INSERT_SQL = """
+        INSERT OR IGNORE INTO entities (
+            entity_id, type, primary_name, aliases_json, identifiers_json,
+            attributes_json, salience, confidence, status, tags_json,
+            created_at, updated_at, source, is_protected
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _auto_entity_row(entity_id: str, entity_type: str, now: str) -> tuple:
+        """Parametri di _AUTO_ENTITY_INSERT_SQL per un'entità auto-creata"""
+        return (
+            entity_id,
+            entity_type,
+            entity_id,  # primary_name = entity_id
+            "[]",       # aliases_json
+            "{}",       # identifiers_json  
+            "{}",       # attributes_json
+            0.5,        # salience
+            0.7,        # confidence (auto-created = slightly lower)
+            "active",
+            "[]",       # tags_json
+            now, now,
+            "extraction",  # source (denormalizzato da attributes.source)
+            0              # is_protected (denormalizzato da tags)
+        )
+    
+    def _entity_seen_snapshot(self) -> int:
+        """
+        Epoch di rimozione del decay, da leggere DOPO il BEGIN IMMEDIATE del writer e
+        da passare a _mark_entities_seen: il decay lo incrementa prima del suo commit
+        """
+        return self.decay_service.removal_epoch
+    
+    def _entity_recently_seen(self, entity_id: str) -> bool:
+        """
+        True se l'esistenza dell'entità è stata confermata da un commit negli ultimi
+        ENTITY_SEEN_TTL_SECONDS e il decay non ha cancellato entità nel frattempo.
+        """
+        epoch = self.decay_service.removal_epoch
+        with self._entity_seen_lock:
+            if epoch != self._entity_seen_epoch:
+                # Il decay ha rimosso entità: qualsiasi voce potrebbe essere obsoleta
+                self._entity_seen.clear()
+                self._entity_seen_epoch = epoch
+                return False
+            seen_at = self._entity_seen.get(entity_id)
+        return seen_at is not None and time.monotonic() - seen_at < ENTITY_SEEN_TTL_SECONDS
+    
+    def _mark_entities_seen(self, entity_ids, epoch: int) -> None:
+        """
+        Registra entità esistenti; da chiamare solo DOPO il commit (un rollback non le crea).
+        epoch = _entity_seen_snapshot() letto nella transazione: se il decay ha cancellato
+        entità da allora, la conferma potrebbe essere già obsoleta e non viene registrata
+        """
+        current = self.decay_service.removal_epoch
+        with self._entity_seen_lock:
+            if current != self._entity_seen_epoch:
+                self._entity_seen.clear()
+                self._entity_seen_epoch = current
+            if epoch != current:
+                return
+            if len(self._entity_seen) >= ENTITY_SEEN_MAX:
+                self._entity_seen.clear()
+            now = time.monotonic()
+            for entity_id in entity_ids:
+                self._entity_seen[entity_id] = now
+    
+    def _lookup_cache_key(self, *parts) -> tuple:
+        """Chiave di cache valida fino alla prossima scrittura o al prossimo decay"""
+        return (self._lookup_epoch, self.decay_service.stats["total_decay_runs"], *parts)
+    
+    def _lookup_cache_get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        """Risultato in cache non scaduto, None se assente"""
+        entry = self._lookup_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at >= LOOKUP_CACHE_TTL_SECONDS:
+            del self._lookup_cache[key]
+            return None
+        self._lookup_cache.move_to_end(key)
+        return result
+    
+    def _lookup_cache_put(self, key: tuple, result: Dict[str, Any]) -> None:
+        """Memorizza un risultato (evict least recently used oltre LOOKUP_CACHE_MAX)"""
+        self._lookup_cache[key] = (time.monotonic(), result)
+        self._lookup_cache.move_to_end(key)
+        if len(self._lookup_cache) > LOOKUP_CACHE_MAX:
+            self._lookup_cache.popitem(last=False)
+    
+    def _ensure_entity_exists(
+        self, conn, entity_id: str, entity_type: str = "auto", now: Optional[str] = None
+    ) -> bool:
         """
         Verifica se un'entità esiste e la crea se non esiste.
         
@@ -61,49 +626,35 @@ class GraphService:
             conn: Database connection
             entity_id: ID dell'entità
             entity_type: Tipo dell'entità (default: auto-detected)
+            now: Timestamp ISO della scrittura in corso (default: adesso)
             
         Returns:
             True se l'entità esisteva già, False se è stata creata
         """
-        cursor = conn.cursor()
-        
-        # Check se esiste
-        cursor.execute("SELECT entity_id FROM entities WHERE entity_id = ?", (entity_id,))
-        if cursor.fetchone():
+        # Hot path: entità confermata da poco (es. "user_admin" in quasi ogni relazione)
+        if self._entity_recently_seen(entity_id):
             return True
         
+        cursor = conn.cursor()
+        
         # Auto-detect tipo se necessario
         if entity_type == "auto":
             entity_type = self._infer_entity_type(entity_id)
         
-        # Crea entità minimal
-        now = datetime.utcnow().isoformat() + "Z"
-        cursor.execute("""
-            INSERT INTO entities (
-                entity_id, type, primary_name, aliases_json, identifiers_json,
-                attributes_json, salience, confidence, status, tags_json,
-                created_at, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            entity_id,
-            entity_type,
-            entity_id,  # primary_name = entity_id
-            "[]",       # aliases_json
-            "{}",       # identifiers_json  
-            "{}",       # attributes_json
-            0.5,        # salience
-            0.7,        # confidence (auto-created = slightly lower)
-            "active",
-            "[]",       # tags_json
-            now, now
-        ))
+        # Crea entità minimal se non esiste (nessun SELECT preliminare, nessuna race)
+        if now is None:
+            now = datetime.utcnow().isoformat() + "Z"
+        cursor.execute(self._AUTO_ENTITY_INSERT_SQL, self._auto_entity_row(entity_id, entity_type, now))
+        if cursor.rowcount == 0:
+            return True
         
-        logger.info(
-            f"[GRAPH] AUTO-CREATED entity:\n"
-            f"  ID: {entity_id}\n"
-            f"  Type: {entity_type} (inferred)\n"
-            f"  Confidence: 0.7 (auto-generated)"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"[GRAPH] AUTO-CREATED entity:\n"
+                f"  ID: {entity_id}\n"
+                f"  Type: {entity_type} (inferred)\n"
+                f"  Confidence: 0.7 (auto-generated)"
+            )
         return False
     
     def _infer_entity_type(self, entity_id: str) -> str:
@@ -119,29 +670,30 @@ class GraphService:
         entity_id_lower = entity_id.lower()
         
         # Pattern comuni
-        if entity_id_lower in ("self", "user", "user_admin", "me", "io"):
-            return "person"
-        if any(x in entity_id_lower for x in ("person:", "user:")):
+        if entity_id_lower in SELF_ENTITY_IDS:
             return "person"
-        if any(x in entity_id_lower for x in ("place:", "location:", "city:", "country:")):
-            return "place"
-        if any(x in entity_id_lower for x in ("org:", "company:", "organization:")):
-            return "organization"
-        if any(x in entity_id_lower for x in ("food:", "dish:", "meal:")):
-            return "food"
-        if any(x in entity_id_lower for x in ("vehicle:", "car:", "bike:")):
-            return "vehicle"
+        # Il prefisso più a sinistra decide (il namespace iniziale dell'ID)
+        match = ENTITY_ID_TYPE_RE.search(entity_id_lower)
+        if match:
+            return match.lastgroup
         
         # Default
         return "thing"
     
+    async def _run_db(self, fn, *args, **kwargs):
+        """Esegue fn (lavoro SQLite sincrono) nel pool DB e ne attende il risultato"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_db_executor, functools.partial(fn, *args, **kwargs))
+    
     def _get_db_manager(self):
         """Get DB manager (lazy loading)"""
         if self.db_manager is None:
             from app.utils.sqlite_metadata_manager import SQLiteMetadataManager
             self.db_manager = SQLiteMetadataManager()
+        ensure_graph_schema_once(self.db_manager)
         return self.db_manager
     
+    @_invalidates_lookups
     async def create_relationship_from_raw(
         self,
         user_id: str,
@@ -163,6 +715,14 @@ class GraphService:
         Returns:
             Relazione normalizzata salvata
         """
+        return await self._run_db(self._sync_create_relationship_from_raw, user_id, raw_relation)
+    
+    def _sync_create_relationship_from_raw(
+        self,
+        user_id: str,
+        raw_relation: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di create_relationship_from_raw (eseguito nel pool DB)"""
         subject = raw_relation.get("subject", "")
         predicate = raw_relation.get("predicate", "")
         obj = raw_relation.get("object", "")
@@ -174,23 +734,25 @@ class GraphService:
         # Normalizza il predicato
         norm_result = self.normalizer.normalize(predicate)
         
-        logger.info(
-            f"\n{'='*60}\n"
-            f"[GRAPH] PROCESSING RELATIONSHIP\n"
-            f"{'='*60}\n"
-            f"  Subject:   {subject}\n"
-            f"  Predicate: '{predicate}'\n"
-            f"  Object:    {obj}\n"
-            f"  -------------------------------------------\n"
-            f"  Normalized: {norm_result.relation_type} / {norm_result.valence}\n"
-            f"  Intensity:  {norm_result.intensity}\n"
-            f"  Method:     {norm_result.method}\n"
-            f"  Source:     '{source_sentence[:100]}...'\n"
-            f"{'='*60}"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"\n{'='*60}\n"
+                f"[GRAPH] PROCESSING RELATIONSHIP\n"
+                f"{'='*60}\n"
+                f"  Subject:   {subject}\n"
+                f"  Predicate: '{predicate}'\n"
+                f"  Object:    {obj}\n"
+                f"  -------------------------------------------\n"
+                f"  Normalized: {norm_result.relation_type} / {norm_result.valence}\n"
+                f"  Intensity:  {norm_result.intensity}\n"
+                f"  Method:     {norm_result.method}\n"
+                f"  Source:     '{source_sentence[:100]}...'\n"
+                f"{'='*60}"
+            )
         
         # Genera ID relazione (solo per nuove relazioni)
-        rel_id = f"rel:{subject}_to_{obj}_{uuid.uuid4().hex[:8]}"
+        # token_hex: stessi caratteri esadecimali di uuid4().hex[:n], senza costruire un UUID
+        rel_id = f"rel:{subject}_to_{obj}_{secrets.token_hex(4)}"
         now = datetime.utcnow().isoformat() + "Z"
         
         # Costruisci metadata
@@ -202,160 +764,116 @@ class GraphService:
             **norm_result.metadata
         }
         
+        # Serializzato una sola volta: stesso valore per relazione ed evento
+        metadata_json = _dumps_json(metadata)
+        
         # Genera event_id per il log
-        event_id = f"evt:{uuid.uuid4().hex[:12]}"
+        event_id = f"evt:{secrets.token_hex(6)}"
         
         # Salva nel database
         db = self._get_db_manager()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Assicura che le entità esistano (crea automaticamente se necessario)
-                self._ensure_entity_exists(conn, subject)
-                self._ensure_entity_exists(conn, obj)
-                
-                # Check se esiste già una relazione simile (stesso tipo)
-                cursor.execute("""
-                    SELECT rel_id, evidence_count, strength, valence, intensity
-                    FROM relationships 
-                    WHERE from_entity_id = ? AND to_entity_id = ? AND relation_type = ?
-                    AND status = 'active'
-                """, (subject, obj, norm_result.relation_type))
-                
-                existing = cursor.fetchone()
+                # Un'unica transazione di scrittura (un solo commit/fsync) per entità,
+                # relazione ed evento. IMMEDIATE prende subito il lock di scrittura: due
+                # writer concorrenti non possono entrambi "non trovare" la relazione
+                # e inserirla due volte
+                cursor.execute("BEGIN IMMEDIATE")
+                seen_epoch = self._entity_seen_snapshot()
                 
-                if existing:
-                    # ======== RELAZIONE ESISTENTE ========
-                    # Pattern: Last Value Wins + Event Log
-                    # - UPDATE valence/intensity con NUOVO valore (non media)
-                    # - INSERT evento per tracciare la storia
-                    
-                    existing_id = existing["rel_id"]
-                    old_valence = existing["valence"]
-                    new_evidence_count = existing["evidence_count"] + 1
-                    new_strength = min(1.0, existing["strength"] + 0.1)
-                    
-                    # UPDATE con NUOVO valence (last value wins)
-                    cursor.execute("""
-                        UPDATE relationships 
-                        SET evidence_count = ?, 
-                            strength = ?, 
-                            valence = ?,
-                            intensity = ?,
-                            original_predicate = ?,
-                            source_sentence = ?,
-                            metadata_json = ?,
-                            last_reinforced = ?, 
-                            updated_at = ?
-                        WHERE rel_id = ?
-                    """, (
-                        new_evidence_count, 
-                        new_strength, 
-                        norm_result.valence,      # NUOVO valence
-                        norm_result.intensity,    # NUOVA intensity
-                        predicate,                # Ultimo predicato usato
-                        source_sentence,
-                        json.dumps(metadata),
-                        now, 
-                        now, 
-                        existing_id
-                    ))
-                    
-                    # INSERT evento nella storia
-                    cursor.execute("""
-                        INSERT INTO relationship_events (
-                            event_id, rel_id, predicate, valence, intensity,
-                            source_sentence, timestamp, normalization_method,
-                            normalization_confidence, metadata_json
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        event_id,
-                        existing_id,
+                # Assicura che le entità esistano (crea automaticamente se necessario)
+                self._ensure_entity_exists(conn, subject, now=now)
+                self._ensure_entity_exists(conn, obj, now=now)
+                
+                if self._relationship_upsert_available(conn):
+                    # RETURNING restituisce solo i valori nuovi: la valence precedente
+                    # serve solo al log INFO, letta sull'indice UNIQUE (stessa transazione)
+                    old_valence = None
+                    if logger.isEnabledFor(logging.INFO):
+                        cursor.execute(
+                            "SELECT valence FROM relationships "
+                            "WHERE from_entity_id = ? AND to_entity_id = ? "
+                            "AND relation_type = ? AND status = 'active'",
+                            (subject, obj, norm_result.relation_type)
+                        )
+                        previous = cursor.fetchone()
+                        if previous is not None:
+                            old_valence = previous[0]
+
+                    # Esistenza + insert/rinforzo in un solo statement: il conflict
+                    # target è l'indice UNIQUE parziale sulle relazioni attive
+                    cursor.execute(self._RELATIONSHIP_UPSERT_SQL, (
+                        rel_id, subject, obj,
+                        norm_result.relation_type,
+                        norm_result.relation_type,
                         predicate,
-                        norm_result.valence,
-                        norm_result.intensity,
                         source_sentence,
-                        now,
-                        norm_result.method,
+                        metadata_json,
+                        1.0,  # strength iniziale
                         norm_result.confidence,
-                        json.dumps(metadata)
+                        norm_result.valence,
+                        norm_result.intensity,
+                        1,  # evidence_count
+                        "active",
+                        now, now
                     ))
-                    
-                    conn.commit()
-                    
+                    row = cursor.fetchone()
+                else:
+                    row, old_valence = self._write_relationship_select_update(
+                        cursor, rel_id, subject, obj, predicate, source_sentence,
+                        metadata_json, norm_result, now
+                    )
+                
+                # rel_id diverso da quello generato → relazione esistente rinforzata
+                # Pattern: Last Value Wins + Event Log
+                reinforced = row["rel_id"] != rel_id
+                
+                # INSERT evento nella storia
+                cursor.execute("""
+                    INSERT INTO relationship_events (
+                        event_id, rel_id, predicate, valence, intensity,
+                        source_sentence, timestamp, normalization_method,
+                        normalization_confidence, metadata_json
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    event_id,
+                    row["rel_id"],
+                    predicate,
+                    norm_result.valence,
+                    norm_result.intensity,
+                    source_sentence,
+                    now,
+                    norm_result.method,
+                    norm_result.confidence,
+                    metadata_json
+                ))
+                
+                conn.commit()
+                self._mark_entities_seen((subject, obj), seen_epoch)
+                
+                if reinforced and logger.isEnabledFor(logging.INFO):
                     valence_change = ""
-                    if old_valence != norm_result.valence:
+                    if old_valence is not None and old_valence != norm_result.valence:
                         valence_change = f" | VALENCE CHANGED: {old_valence}→{norm_result.valence}"
                     
                     logger.info(
                         f"\n{'*'*60}\n"
                         f"[GRAPH] RELATIONSHIP UPDATED (REINFORCED)\n"
                         f"{'*'*60}\n"
-                        f"  Rel ID:      {existing_id}\n"
+                        f"  Rel ID:      {row['rel_id']}\n"
                         f"  From:        {subject}\n"
                         f"  To:          {obj}\n"
                         f"  Type:        {norm_result.relation_type}\n"
                         f"  Valence:     {norm_result.valence} (intensity={norm_result.intensity})\n"
-                        f"  Evidence:    {existing['evidence_count']} -> {new_evidence_count}\n"
-                        f"  Strength:    {existing['strength']:.2f} -> {new_strength:.2f}\n"
+                        f"  Evidence:    {row['evidence_count']}\n"
+                        f"  Strength:    {row['strength']:.2f}\n"
                         f"  Event ID:    {event_id}{valence_change}\n"
                         f"{'*'*60}"
                     )
-                    
-                    # Ritorna la relazione aggiornata
-                    cursor.execute("SELECT * FROM relationships WHERE rel_id = ?", (existing_id,))
-                    row = cursor.fetchone()
-                    return self._row_to_relationship_dict(row)
-                
-                else:
-                    # ======== NUOVA RELAZIONE ========
-                    cursor.execute("""
-                        INSERT INTO relationships (
-                            rel_id, from_entity_id, to_entity_id, type, relation_type,
-                            original_predicate, source_sentence, metadata_json,
-                            strength, confidence, valence, intensity,
-                            evidence_count, status, created_at, updated_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        rel_id, subject, obj,
-                        norm_result.relation_type,
-                        norm_result.relation_type,
-                        predicate,
-                        source_sentence,
-                        json.dumps(metadata),
-                        1.0,  # strength iniziale
-                        norm_result.confidence,
-                        norm_result.valence,
-                        norm_result.intensity,
-                        1,  # evidence_count
-                        "active",
-                        now, now
-                    ))
-                    
-                    # INSERT primo evento nella storia
-                    cursor.execute("""
-                        INSERT INTO relationship_events (
-                            event_id, rel_id, predicate, valence, intensity,
-                            source_sentence, timestamp, normalization_method,
-                            normalization_confidence, metadata_json
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        event_id,
-                        rel_id,
-                        predicate,
-                        norm_result.valence,
-                        norm_result.intensity,
-                        source_sentence,
-                        now,
-                        norm_result.method,
-                        norm_result.confidence,
-                        json.dumps(metadata)
-                    ))
-                    
-                    conn.commit()
-                    
+                elif logger.isEnabledFor(logging.INFO):
                     logger.info(
                         f"\n{'+'*60}\n"
                         f"[GRAPH] NEW RELATIONSHIP CREATED\n"
@@ -372,29 +890,370 @@ class GraphService:
                         f"  Event ID:    {event_id}\n"
                         f"{'+'*60}"
                     )
-                    
-                    return {
-                        "id": rel_id,
-                        "source_entity_id": subject,
-                        "target_entity_id": obj,
-                        "relation_type": norm_result.relation_type,
-                        "original_predicate": predicate,
-                        "source_sentence": source_sentence,
-                        "metadata": metadata,
-                        "strength": 1.0,
-                        "confidence": norm_result.confidence,
-                        "valence": norm_result.valence,
-                        "intensity": norm_result.intensity,
-                        "evidence_count": 1,
-                        "status": "active",
-                        "created_at": now,
-                        "updated_at": now
-                    }
+                
+                return self._row_to_relationship_dict(row)
                     
         except Exception as e:
             logger.error(f"[GRAPH] Error creating relationship: {e}")
             raise
     
+    def _relationship_upsert_available(self, conn) -> bool:
+        """
+        True se l'UPSERT è utilizzabile: SQLite >= 3.35 (RETURNING) e indice UNIQUE
+        sulle relazioni attive presente (manca se il DB ha duplicati storici).
+        """
+        if self._relationship_upsert is None:
+            self._relationship_upsert = (
+                SQLITE_HAS_RETURNING
+                and index_exists(conn, RELATIONSHIP_ACTIVE_UNIQUE_INDEX)
+            )
+        return self._relationship_upsert
+    
+    # Nuova relazione o rinforzo di quella attiva (from, to, relation_type):
+    # stessi valori del percorso SELECT + UPDATE/INSERT, in un solo statement
+    _RELATIONSHIP_UPSERT_SQL = f"""
+        INSERT INTO relationships (
+            rel_id, from_entity_id, to_entity_id, type, relation_type,
+            original_predicate, source_sentence, metadata_json,
+            strength, confidence, valence, intensity,
+            evidence_count, status, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (from_entity_id, to_entity_id, relation_type) WHERE status = 'active'
+        DO UPDATE SET
+            evidence_count = evidence_count + 1,
+            strength = MIN(1.0, strength + 0.1),
+            valence = excluded.valence,
+            intensity = excluded.intensity,
+            original_predicate = excluded.original_predicate,
+            source_sentence = excluded.source_sentence,
+            metadata_json = excluded.metadata_json,
+            last_reinforced = excluded.updated_at,
+            updated_at = excluded.updated_at
+        {RELATIONSHIP_RETURNING}
+    """
+    
+    # Rinforzo + lettura della riga aggiornata in un solo statement.
+    # COALESCE: con source_sentence NULL resta la frase esistente
+    _REINFORCE_RETURNING_SQL = f"""
+        UPDATE relationships
+        SET strength = MIN(1.0, strength + ?),
+            evidence_count = evidence_count + 1,
+            last_reinforced = ?,
+            updated_at = ?,
+            source_sentence = COALESCE(?, source_sentence)
+        WHERE rel_id = ?
+        {RELATIONSHIP_RETURNING}
+    """
+    
+    def _write_relationship_select_update(
+        self, cursor, rel_id: str, subject: str, obj: str, predicate: str,
+        source_sentence: str, metadata_json: str, norm_result, now: str
+    ):
+        """
+        Fallback senza UPSERT: SELECT della relazione attiva e poi UPDATE o INSERT.
+        
+        Returns:
+            (riga salvata, valence precedente o None se la relazione è nuova)
+        """
+        cursor.execute(RELATIONSHIP_SELECT_ACTIVE, (subject, obj, norm_result.relation_type))
+        
+        existing = cursor.fetchone()
+        
+        if existing:
+            # UPDATE con NUOVO valence (last value wins). La riga restituita è quella
+            # letta sopra con i valori scritti: nessuna rilettura
+            old_valence = existing["valence"]
+            updated = dict(zip(existing.keys(), existing))
+            updated.update(
+                evidence_count=existing["evidence_count"] + 1,
+                strength=min(1.0, existing["strength"] + 0.1),
+                valence=norm_result.valence,
+                intensity=norm_result.intensity,
+                original_predicate=predicate,
+                source_sentence=source_sentence,
+                metadata_json=metadata_json,
+                last_reinforced=now,
+                updated_at=now
+            )
+            cursor.execute("""
+                UPDATE relationships 
+                SET evidence_count = ?, 
+                    strength = ?, 
+                    valence = ?,
+                    intensity = ?,
+                    original_predicate = ?,
+                    source_sentence = ?,
+                    metadata_json = ?,
+                    last_reinforced = ?, 
+                    updated_at = ?
+                WHERE rel_id = ?
+            """, (
+                updated["evidence_count"],
+                updated["strength"],
+                norm_result.valence,
+                norm_result.intensity,
+                predicate,
+                source_sentence,
+                metadata_json,
+                now,
+                now,
+                existing["rel_id"]
+            ))
+            return updated, old_valence
+        
+        cursor.execute("""
+            INSERT INTO relationships (
+                rel_id, from_entity_id, to_entity_id, type, relation_type,
+                original_predicate, source_sentence, metadata_json,
+                strength, confidence, valence, intensity,
+                evidence_count, status, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            rel_id, subject, obj,
+            norm_result.relation_type,
+            norm_result.relation_type,
+            predicate,
+            source_sentence,
+            metadata_json,
+            1.0,
+            norm_result.confidence,
+            norm_result.valence,
+            norm_result.intensity,
+            1,
+            "active",
+            now, now
+        ))
+        
+        # Nuova relazione: riletta perché le colonne non scritte (trust, ...) hanno
+        # i default dello schema esterno
+        cursor.execute(RELATIONSHIP_SELECT_BY_ID, (rel_id,))
+        return cursor.fetchone(), None
+    
+    @_invalidates_lookups
+    async def create_relationships_from_raw_bulk(
+        self,
+        user_id: str,
+        raw_relations: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Versione batch di create_relationship_from_raw.
+        
+        Stessa semantica di N chiamate singole applicate in ordine (una relazione
+        ripetuta nel batch viene rinforzata dalle occorrenze successive), ma:
+        - ogni predicato distinto viene normalizzato una sola volta
+        - entità e relazioni esistenti vengono lette con pochi SELECT ... IN (a blocchi)
+        - relazioni, aggiornamenti ed eventi vengono scritti con executemany
+        - un'unica transazione BEGIN IMMEDIATE (un solo commit) per tutto il batch
+        
+        Args:
+            user_id: User identifier (per future multi-tenancy)
+            raw_relations: Lista di relazioni raw, stesso formato di create_relationship_from_raw
+            
+        Returns:
+            Relazioni salvate, nello stesso ordine dell'input (stato dopo
+            l'applicazione di ciascuna relazione)
+        """
+        return await self._run_db(
+            self._sync_create_relationships_from_raw_bulk,
+            user_id, raw_relations
+        )
+    
+    def _sync_create_relationships_from_raw_bulk(
+        self,
+        user_id: str,
+        raw_relations: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Corpo sincrono di create_relationships_from_raw_bulk (eseguito nel pool DB)"""
+        if not raw_relations:
+            return []
+        
+        # Validazione + normalizzazione prima di qualsiasi scrittura:
+        # un elemento invalido fa fallire l'intero batch
+        for raw in raw_relations:
+            if not raw.get("subject") or not raw.get("predicate") or not raw.get("object"):
+                raise ValueError("subject, predicate and object are required")
+        
+        # Un'unica normalizzazione batch (predicati distinti una volta, embedding in blocco)
+        norm_results = self.normalizer.normalize_batch([raw["predicate"] for raw in raw_relations])
+        items = [
+            (raw["subject"], raw["predicate"], raw["object"], raw.get("source_sentence") or "", norm_result)
+            for raw, norm_result in zip(raw_relations, norm_results)
+        ]
+        
+        now = datetime.utcnow().isoformat() + "Z"
+        db = self._get_db_manager()
+        
+        try:
+            with db._get_thread_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                seen_epoch = self._entity_seen_snapshot()
+                
+                # ===== ENTITÀ: INSERT OR IGNORE di tutte (le esistenti vengono saltate) =====
+                entity_ids = list(dict.fromkeys(e for s, _, o, _, _ in items for e in (s, o)))
+                unseen_ids = [e for e in entity_ids if not self._entity_recently_seen(e)]
+                created_entities = 0
+                if unseen_ids:
+                    cursor.executemany(self._AUTO_ENTITY_INSERT_SQL, [
+                        self._auto_entity_row(e, self._infer_entity_type(e), now) for e in unseen_ids
+                    ])
+                    created_entities = cursor.rowcount
+                
+                # ===== RELAZIONI ATTIVE ESISTENTI per (from, to, relation_type) =====
+                keys = list(dict.fromkeys((s, o, n.relation_type) for s, _, o, _, n in items))
+                state: Dict[tuple, Dict[str, Any]] = {}
+                for chunk in _chunked(keys, SQLITE_MAX_PARAMS // 3):
+                    values = ", ".join(["(?, ?, ?)"] * len(chunk))
+                    cursor.execute(f"""
+                        SELECT {_relationship_columns()} FROM relationships
+                        WHERE status = 'active'
+                        AND (from_entity_id, to_entity_id, relation_type) IN (VALUES {values})
+                    """, [param for key in chunk for param in key])
+                    for row in cursor.fetchall():
+                        key = (row["from_entity_id"], row["to_entity_id"], row["relation_type"])
+                        state.setdefault(key, dict(row))
+                
+                # ===== APPLICA IN ORDINE (stato in memoria, scritture alla fine) =====
+                inserts: Dict[str, Dict[str, Any]] = {}
+                updates: Dict[str, Dict[str, Any]] = {}
+                events = []
+                snapshots: List[Dict[str, Any]] = []
+                metadata_jsons: Dict[str, str] = {}
+                for subject, predicate, obj, source_sentence, norm_result in items:
+                    # metadata dipende solo dal predicato normalizzato: serializzato una volta
+                    metadata_json = metadata_jsons.get(predicate)
+                    if metadata_json is None:
+                        metadata_json = metadata_jsons[predicate] = _dumps_json({
+                            "valence": norm_result.valence,
+                            "intensity": norm_result.intensity,
+                            "normalization_method": norm_result.method,
+                            "normalization_confidence": norm_result.confidence,
+                            **norm_result.metadata
+                        })
+                    key = (subject, obj, norm_result.relation_type)
+                    rel = state.get(key)
+                    
+                    if rel is None:
+                        # Nuova relazione (eventuali ripetizioni nel batch la rinforzano)
+                        rel = {
+                            "rel_id": f"rel:{subject}_to_{obj}_{secrets.token_hex(4)}",
+                            "from_entity_id": subject,
+                            "to_entity_id": obj,
+                            "type": norm_result.relation_type,
+                            "relation_type": norm_result.relation_type,
+                            "original_predicate": predicate,
+                            "source_sentence": source_sentence,
+                            "metadata_json": metadata_json,
+                            "strength": 1.0,
+                            "confidence": norm_result.confidence,
+                            "valence": norm_result.valence,
+                            "intensity": norm_result.intensity,
+                            "evidence_count": 1,
+                            "status": "active",
+                            "created_at": now,
+                            "updated_at": now,
+                            "last_reinforced": None
+                        }
+                        state[key] = rel
+                        inserts[rel["rel_id"]] = rel
+                    else:
+                        # Relazione esistente: Last Value Wins + Event Log
+                        rel.update(
+                            evidence_count=rel["evidence_count"] + 1,
+                            strength=min(1.0, rel["strength"] + 0.1),
+                            valence=norm_result.valence,
+                            intensity=norm_result.intensity,
+                            original_predicate=predicate,
+                            source_sentence=source_sentence,
+                            metadata_json=metadata_json,
+                            last_reinforced=now,
+                            updated_at=now
+                        )
+                        if rel["rel_id"] not in inserts:
+                            updates[rel["rel_id"]] = rel
+                    
+                    events.append((
+                        f"evt:{secrets.token_hex(6)}",
+                        rel["rel_id"],
+                        predicate,
+                        norm_result.valence,
+                        norm_result.intensity,
+                        source_sentence,
+                        now,
+                        norm_result.method,
+                        norm_result.confidence,
+                        metadata_json
+                    ))
+                    snapshots.append(dict(rel))
+                
+                # Colonne non scritte dall'INSERT (trust, ...): default dello schema esterno,
+                # riletti come fa create_relationship_from_raw (executemany non ha RETURNING)
+                schema_defaults: Dict[str, Dict[str, Any]] = {}
+                if inserts:
+                    cursor.executemany(BULK_RELATIONSHIP_INSERT_SQL, [
+                        tuple(r[column] for column in BULK_RELATIONSHIP_INSERT_COLUMNS)
+                        for r in inserts.values()
+                    ])
+                    for chunk in _chunked(list(inserts), SQLITE_MAX_PARAMS):
+                        cursor.execute(f"""
+                            SELECT {_relationship_columns()} FROM relationships
+                            WHERE rel_id IN ({", ".join("?" * len(chunk))})
+                        """, chunk)
+                        for row in cursor.fetchall():
+                            schema_defaults[row["rel_id"]] = {
+                                column: row[column] for column in row.keys()
+                                if column not in BULK_RELATIONSHIP_INSERT_COLUMNS
+                            }
+                
+                if updates:
+                    cursor.executemany("""
+                        UPDATE relationships 
+                        SET evidence_count = ?, 
+                            strength = ?, 
+                            valence = ?,
+                            intensity = ?,
+                            original_predicate = ?,
+                            source_sentence = ?,
+                            metadata_json = ?,
+                            last_reinforced = ?, 
+                            updated_at = ?
+                        WHERE rel_id = ?
+                    """, [
+                        (
+                            r["evidence_count"], r["strength"], r["valence"], r["intensity"],
+                            r["original_predicate"], r["source_sentence"], r["metadata_json"],
+                            r["last_reinforced"], r["updated_at"], r["rel_id"]
+                        )
+                        for r in updates.values()
+                    ])
+                
+                cursor.executemany("""
+                    INSERT INTO relationship_events (
+                        event_id, rel_id, predicate, valence, intensity,
+                        source_sentence, timestamp, normalization_method,
+                        normalization_confidence, metadata_json
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, events)
+                
+                conn.commit()
+            self._mark_entities_seen(entity_ids, seen_epoch)
+            
+            # Stato dopo ciascuna relazione, completato con i default letti dopo l'INSERT
+            results = [
+                self._row_to_relationship_dict({**snapshot, **schema_defaults.get(snapshot["rel_id"], {})})
+                for snapshot in snapshots
+            ]
+            
+            logger.info(
+                "[GRAPH] BULK: %d relations -> %d new, %d reinforced, %d entities auto-created",
+                len(items), len(inserts), len(updates), created_entities
+            )
+            return results
+        
+        except Exception as e:
+            logger.error("[GRAPH] Error creating relationships in bulk: %s", e)
+            raise
+    
     async def get_relationships(
         self,
         user_id: Optional[str] = None,
@@ -406,7 +1265,8 @@ class GraphService:
         min_strength: Optional[float] = None,
         status: str = "active",
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        include_metadata: bool = True
     ) -> Dict[str, Any]:
         """
         Query relazioni con filtri.
@@ -422,87 +1282,87 @@ class GraphService:
             status: Status filter (default: active)
             limit: Max results
             offset: Pagination offset
+            include_metadata: Se False omette source_sentence e metadata (righe più leggere)
             
         Returns:
             {"relationships": [...], "count": N, "total": M}
         """
+        return await self._run_db(
+            self._sync_get_relationships,
+            user_id, from_entity_id, to_entity_id, relation_type, valence, min_confidence,
+            min_strength, status, limit, offset, include_metadata
+        )
+    
+    def _sync_get_relationships(
+        self,
+        user_id: Optional[str] = None,
+        from_entity_id: Optional[str] = None,
+        to_entity_id: Optional[str] = None,
+        relation_type: Optional[str] = None,
+        valence: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        min_strength: Optional[float] = None,
+        status: str = "active",
+        limit: int = 50,
+        offset: int = 0,
+        include_metadata: bool = True
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di get_relationships (eseguito nel pool DB)"""
         db = self._get_db_manager()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Build query
-                query = "SELECT * FROM relationships WHERE 1=1"
-                count_query = "SELECT COUNT(*) FROM relationships WHERE 1=1"
+                # Filtri attivi → maschera di bit; i valori None/"" sono ignorati
+                filter_values = (
+                    from_entity_id, to_entity_id, relation_type, valence,
+                    min_confidence, min_strength, status
+                )
+                mask = 0
                 params = []
+                for bit, value in enumerate(filter_values):
+                    if value is not None and value != "":
+                        mask |= 1 << bit
+                        params.append(value)
                 
-                if from_entity_id:
-                    query += " AND from_entity_id = ?"
-                    count_query += " AND from_entity_id = ?"
-                    params.append(from_entity_id)
-                
-                if to_entity_id:
-                    query += " AND to_entity_id = ?"
-                    count_query += " AND to_entity_id = ?"
-                    params.append(to_entity_id)
-                
-                if relation_type:
-                    query += " AND relation_type = ?"
-                    count_query += " AND relation_type = ?"
-                    params.append(relation_type)
-                
-                if valence:
-                    query += " AND valence = ?"
-                    count_query += " AND valence = ?"
-                    params.append(valence)
-                
-                if min_confidence is not None:
-                    query += " AND confidence >= ?"
-                    count_query += " AND confidence >= ?"
-                    params.append(min_confidence)
-                
-                if min_strength is not None:
-                    query += " AND strength >= ?"
-                    count_query += " AND strength >= ?"
-                    params.append(min_strength)
-                
-                if status:
-                    query += " AND status = ?"
-                    count_query += " AND status = ?"
-                    params.append(status)
-                
-                # Get total count
-                cursor.execute(count_query, params)
-                total = cursor.fetchone()[0]
-                
-                # Add ordering and pagination
-                query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-                params.extend([limit, offset])
-                
-                cursor.execute(query, params)
+                # Pagina + totale in un'unica esecuzione (SQL precompilato per maschera)
+                page_sql, count_sql = _relationships_page_sql(mask, include_metadata)
+                cursor.execute(page_sql, params + [limit, offset])
                 rows = cursor.fetchall()
                 
-                relationships = [self._row_to_relationship_dict(row) for row in rows]
+                if rows:
+                    total = rows[0]["total_rows"]
+                elif offset:
+                    # Pagina oltre la fine: il totale non arriva con le righe
+                    cursor.execute(count_sql, params)
+                    total = cursor.fetchone()[0]
+                else:
+                    total = 0
                 
-                # Log dettagliato per search
-                if relationships:
+                relationships = [
+                    self._row_to_relationship_dict(row, include_metadata) for row in rows
+                ]
+                
+                # Log dettagliato per search (anteprima costruita solo se INFO è attivo)
+                if relationships and logger.isEnabledFor(logging.INFO):
+                    preview = "\n".join(
+                        f"    - {r['source_entity_id']} --[{r['relation_type']}/{r['valence']}]--> {r['target_entity_id']}"
+                        for r in relationships[:5]
+                    )
                     logger.info(
                         f"\n{'-'*60}\n"
                         f"[GRAPH] RELATIONSHIPS SEARCH RESULTS\n"
                         f"{'-'*60}\n"
-                        f"  Filters: from={from_entity or 'any'}, to={to_entity or 'any'}, "
+                        f"  Filters: from={from_entity_id or 'any'}, to={to_entity_id or 'any'}, "
                         f"type={relation_type or 'any'}, valence={valence or 'any'}\n"
                         f"  Found: {len(relationships)} (total: {total})\n"
-                        + "\n".join([
-                            f"    - {r['source_entity_id']} --[{r['relation_type']}/{r['valence']}]--> {r['target_entity_id']}"
-                            for r in relationships[:5]
-                        ])
+                        f"{preview}"
                         + (f"\n    ... and {len(relationships)-5} more" if len(relationships) > 5 else "")
                         + f"\n{'-'*60}"
                     )
-                else:
-                    logger.info(f"[GRAPH] RELATIONSHIPS SEARCH: no results for filters")
+                elif not relationships:
+                    logger.info("[GRAPH] RELATIONSHIPS SEARCH: no results for filters")
                 
                 return {
                     "relationships": relationships,
@@ -519,7 +1379,8 @@ class GraphService:
         user_id: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
         group_by: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        include_metadata: bool = True
     ) -> Dict[str, Any]:
         """
         Query avanzate con raggruppamento per pattern detection.
@@ -534,6 +1395,7 @@ class GraphService:
                 }
             group_by: Campo per raggruppamento (es. "target_type" per raggruppare per tipo target)
             limit: Max results per group
+            include_metadata: Se False omette source_sentence e metadata (solo risultati flat)
             
         Returns:
             Se group_by:
@@ -541,16 +1403,37 @@ class GraphService:
             Altrimenti:
                 {"relationships": [...], "count": N}
         """
+        return await self._run_db(
+            self._sync_query_relationships,
+            user_id, filters, group_by, limit, include_metadata
+        )
+    
+    def _sync_query_relationships(
+        self,
+        user_id: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        group_by: Optional[str] = None,
+        limit: int = 100,
+        include_metadata: bool = True
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di query_relationships (eseguito nel pool DB)"""
         db = self._get_db_manager()
         filters = filters or {}
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Build base query
-                query = """
-                    SELECT r.*, e.type as target_type 
+                # Build base query: il raggruppamento legge solo i campi riassuntivi
+                if group_by == "target_type":
+                    columns = (
+                        "r.to_entity_id, r.intensity, r.confidence, r.strength, "
+                        "r.valence, r.original_predicate"
+                    )
+                else:
+                    columns = _relationship_columns(include_metadata, alias="r")
+                query = f"""
+                    SELECT {columns}, e.type as target_type 
                     FROM relationships r
                     LEFT JOIN entities e ON r.to_entity_id = e.entity_id
                     WHERE r.status = 'active'
@@ -577,8 +1460,9 @@ class GraphService:
                     query += " AND r.from_entity_id = ?"
                     params.append(filters["from_entity_id"])
                 
-                query += " ORDER BY r.intensity DESC, r.confidence DESC"
-                query += f" LIMIT {limit}"
+                # LIMIT come parametro: il testo SQL non varia col limite (statement cache)
+                query += " ORDER BY r.intensity DESC, r.confidence DESC LIMIT ?"
+                params.append(limit)
                 
                 cursor.execute(query, params)
                 rows = cursor.fetchall()
@@ -607,7 +1491,9 @@ class GraphService:
                 
                 else:
                     # Risultati flat
-                    relationships = [self._row_to_relationship_dict(row) for row in rows]
+                    relationships = [
+                        self._row_to_relationship_dict(row, include_metadata) for row in rows
+                    ]
                     return {
                         "relationships": relationships,
                         "count": len(relationships)
@@ -627,39 +1513,45 @@ class GraphService:
         Returns:
             Relazione o None se non trovata
         """
+        return await self._run_db(self._sync_get_relationship, rel_id)
+    
+    def _sync_get_relationship(self, rel_id: str) -> Optional[Dict[str, Any]]:
+        """Corpo sincrono di get_relationship (eseguito nel pool DB)"""
         db = self._get_db_manager()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM relationships WHERE rel_id = ?", (rel_id,))
+                cursor.execute(RELATIONSHIP_SELECT_BY_ID, (rel_id,))
                 row = cursor.fetchone()
                 
                 if row:
                     rel = self._row_to_relationship_dict(row)
-                    logger.info(
-                        f"\n{'-'*60}\n"
-                        f"[GRAPH] RELATIONSHIP RETRIEVED\n"
-                        f"{'-'*60}\n"
-                        f"  Rel ID:      {rel['id']}\n"
-                        f"  From:        {rel['source_entity_id']}\n"
-                        f"  To:          {rel['target_entity_id']}\n"
-                        f"  Type:        {rel['relation_type']}\n"
-                        f"  Valence:     {rel['valence']} (intensity={rel['intensity']})\n"
-                        f"  Strength:    {rel['strength']:.2f}\n"
-                        f"  Evidence:    {rel['evidence_count']}\n"
-                        f"  Predicate:   '{rel.get('original_predicate', '')}'\n"
-                        f"{'-'*60}"
-                    )
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(
+                            f"\n{'-'*60}\n"
+                            f"[GRAPH] RELATIONSHIP RETRIEVED\n"
+                            f"{'-'*60}\n"
+                            f"  Rel ID:      {rel['id']}\n"
+                            f"  From:        {rel['source_entity_id']}\n"
+                            f"  To:          {rel['target_entity_id']}\n"
+                            f"  Type:        {rel['relation_type']}\n"
+                            f"  Valence:     {rel['valence']} (intensity={rel['intensity']})\n"
+                            f"  Strength:    {rel['strength']:.2f}\n"
+                            f"  Evidence:    {rel['evidence_count']}\n"
+                            f"  Predicate:   '{rel.get('original_predicate', '')}'\n"
+                            f"{'-'*60}"
+                        )
                     return rel
                 else:
-                    logger.info(f"[GRAPH] Relationship NOT FOUND: {rel_id}")
+                    logger.info("[GRAPH] Relationship NOT FOUND: %s", rel_id)
                 return None
                 
         except Exception as e:
             logger.error(f"[GRAPH] Error getting relationship: {e}")
             raise
     
+    @_invalidates_lookups
     async def update_relationship(
         self,
         rel_id: str,
@@ -680,64 +1572,82 @@ class GraphService:
                 
         Returns:
             Relazione aggiornata o None se non trovata
+            
+        Raises:
+            RelationshipConflictError: status='active' su una relazione archiviata/eliminata
+                quando esiste già una relazione attiva con lo stesso (from, to, relation_type)
         """
+        return await self._run_db(self._sync_update_relationship, rel_id, updates)
+    
+    def _sync_update_relationship(
+        self,
+        rel_id: str,
+        updates: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Corpo sincrono di update_relationship (eseguito nel pool DB)"""
         db = self._get_db_manager()
         now = datetime.utcnow().isoformat() + "Z"
         
-        # Campi ammessi per update
-        allowed_fields = {
-            "strength", "confidence", "valence", "intensity", 
-            "status", "source_sentence"
-        }
-        
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Verifica che esista
-                cursor.execute("SELECT * FROM relationships WHERE rel_id = ?", (rel_id,))
+                cursor.execute(RELATIONSHIP_SELECT_BY_ID, (rel_id,))
                 row = cursor.fetchone()
                 
                 if not row:
                     return None
                 
-                # Costruisci UPDATE
-                set_clauses = ["updated_at = ?"]
-                params = [now]
+                # Costruisci UPDATE (colonna -> nuovo valore); i campi non ammessi
+                # vengono ignorati
+                changes = {"updated_at": now}
+                for field in RELATIONSHIP_UPDATE_FIELDS:
+                    if field in updates:
+                        changes[field] = updates[field]
                 
-                for field, value in updates.items():
-                    if field in allowed_fields:
-                        set_clauses.append(f"{field} = ?")
-                        params.append(value)
-                    elif field == "metadata":
-                        # Merge metadata
-                        existing_metadata = {}
-                        if row["metadata_json"]:
-                            try:
-                                existing_metadata = json.loads(row["metadata_json"])
-                            except:
-                                pass
-                        existing_metadata.update(value)
-                        set_clauses.append("metadata_json = ?")
-                        params.append(json.dumps(existing_metadata))
-                
-                params.append(rel_id)
-                
-                sql = f"UPDATE relationships SET {', '.join(set_clauses)} WHERE rel_id = ?"
-                cursor.execute(sql, params)
+                if "metadata" in updates:
+                    # Merge metadata
+                    existing_metadata = {}
+                    if row["metadata_json"]:
+                        try:
+                            existing_metadata = _loads_json(row["metadata_json"])
+                        except:
+                            pass
+                    existing_metadata.update(updates["metadata"])
+                    changes["metadata_json"] = _dumps_json(existing_metadata)
+                
+                set_clauses = ", ".join(f"{column} = ?" for column in changes)
+                sql = f"UPDATE relationships SET {set_clauses} WHERE rel_id = ?"
+                try:
+                    cursor.execute(sql, [*changes.values(), rel_id])
+                except sqlite3.IntegrityError:
+                    # Riattivazione in conflitto con l'indice UNIQUE delle relazioni attive
+                    conn.rollback()
+                    cursor.execute(
+                        "SELECT rel_id FROM relationships WHERE from_entity_id = ? "
+                        "AND to_entity_id = ? AND relation_type = ? AND status = 'active'",
+                        (row["from_entity_id"], row["to_entity_id"], row["relation_type"])
+                    )
+                    active = cursor.fetchone()
+                    raise RelationshipConflictError(rel_id, active[0] if active else None)
                 conn.commit()
                 
-                logger.info(f"[GRAPH] Updated relationship: {rel_id}")
-                
-                # Ritorna la relazione aggiornata
-                cursor.execute("SELECT * FROM relationships WHERE rel_id = ?", (rel_id,))
-                row = cursor.fetchone()
-                return self._row_to_relationship_dict(row)
+                logger.info("[GRAPH] Updated relationship: %s", rel_id)
                 
+                # Relazione aggiornata: riga letta sopra + valori appena scritti
+                updated = dict(zip(row.keys(), row))
+                updated.update(changes)
+                return self._row_to_relationship_dict(updated)
+                
+        except RelationshipConflictError as e:
+            logger.warning("[GRAPH] %s", e)
+            raise
         except Exception as e:
             logger.error(f"[GRAPH] Error updating relationship: {e}")
             raise
     
+    @_invalidates_lookups
     async def delete_relationship(
         self,
         rel_id: str,
@@ -753,35 +1663,45 @@ class GraphService:
         Returns:
             True se eliminata, False se non trovata
         """
+        return await self._run_db(self._sync_delete_relationship, rel_id, hard_delete)
+    
+    def _sync_delete_relationship(
+        self,
+        rel_id: str,
+        hard_delete: bool = False
+    ) -> bool:
+        """Corpo sincrono di delete_relationship (eseguito nel pool DB)"""
         db = self._get_db_manager()
         now = datetime.utcnow().isoformat() + "Z"
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Verifica che esista
-                cursor.execute("SELECT rel_id FROM relationships WHERE rel_id = ?", (rel_id,))
-                if not cursor.fetchone():
-                    return False
-                
+                # Nessun SELECT preliminare: rowcount == 0 → relazione inesistente
+                # (conta solo le righe toccate dallo statement, non trigger/cascade)
                 if hard_delete:
                     cursor.execute("DELETE FROM relationships WHERE rel_id = ?", (rel_id,))
-                    logger.info(f"[GRAPH] Hard deleted relationship: {rel_id}")
                 else:
                     cursor.execute(
                         "UPDATE relationships SET status = 'deleted', updated_at = ? WHERE rel_id = ?",
                         (now, rel_id)
                     )
-                    logger.info(f"[GRAPH] Soft deleted relationship: {rel_id}")
+                
+                if cursor.rowcount == 0:
+                    return False
                 
                 conn.commit()
+                logger.info(
+                    "[GRAPH] %s deleted relationship: %s", "Hard" if hard_delete else "Soft", rel_id
+                )
                 return True
                 
         except Exception as e:
             logger.error(f"[GRAPH] Error deleting relationship: {e}")
             raise
     
+    @_invalidates_lookups
     async def reinforce_relationship(
         self,
         rel_id: str,
@@ -801,64 +1721,202 @@ class GraphService:
         Returns:
             Relazione rinforzata o None se non trovata
         """
+        return await self._run_db(
+            self._sync_reinforce_relationship,
+            rel_id, strength_boost, new_source_sentence
+        )
+    
+    def _sync_reinforce_relationship(
+        self,
+        rel_id: str,
+        strength_boost: float = 0.1,
+        new_source_sentence: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Corpo sincrono di reinforce_relationship (eseguito nel pool DB)"""
         db = self._get_db_manager()
         now = datetime.utcnow().isoformat() + "Z"
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Recupera relazione
-                cursor.execute("SELECT * FROM relationships WHERE rel_id = ?", (rel_id,))
-                row = cursor.fetchone()
+                if SQLITE_HAS_RETURNING:
+                    cursor.execute(self._REINFORCE_RETURNING_SQL, (
+                        strength_boost, now, now, new_source_sentence or None, rel_id
+                    ))
+                    # fetchall: lo statement deve terminare prima del commit
+                    rows = cursor.fetchall()
+                    updated = dict(zip(rows[0].keys(), rows[0])) if rows else None
+                    old_strength = None  # RETURNING restituisce solo i valori nuovi
+                else:
+                    updated, old_strength = self._reinforce_select_update(
+                        cursor, rel_id, strength_boost, new_source_sentence, now
+                    )
                 
-                if not row:
+                if updated is None:
                     return None
                 
-                # Calcola nuovi valori
-                old_strength = row["strength"]
-                old_evidence_count = row["evidence_count"]
-                new_strength = min(1.0, row["strength"] + strength_boost)
-                new_evidence_count = row["evidence_count"] + 1
+                new_strength = updated["strength"]
+                new_evidence_count = updated["evidence_count"]
+                old_evidence_count = new_evidence_count - 1
+                
+                conn.commit()
+                
+                # Log dettagliato (stringhe costruite solo se INFO è attivo)
+                if logger.isEnabledFor(logging.INFO):
+                    source_info = ""
+                    if new_source_sentence:
+                        source_info = f"\n  Source: '{new_source_sentence[:60]}...'"
+                    old_strength_info = f"{old_strength:.2f}->" if old_strength is not None else ""
+                    logger.info(
+                        f"[GRAPH] REINFORCED relationship:\n"
+                        f"  ID: {rel_id}\n"
+                        f"  {updated['from_entity_id']} -> {updated['to_entity_id']}\n"
+                        f"  Type: {updated['relation_type']}/{updated['valence']}\n"
+                        f"  Strength: {old_strength_info}{new_strength:.2f} (+{strength_boost:.2f})\n"
+                        f"  Evidence: {old_evidence_count}->{new_evidence_count}{source_info}"
+                    )
+                
+                return self._row_to_relationship_dict(updated)
+                
+        except Exception as e:
+            logger.error(f"[GRAPH] Error reinforcing relationship: {e}")
+            raise
+    
+    def _reinforce_select_update(
+        self, cursor, rel_id: str, strength_boost: float,
+        new_source_sentence: Optional[str], now: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        """
+        Fallback senza RETURNING: SELECT della relazione e poi UPDATE.
+        
+        Returns:
+            (riga aggiornata, strength precedente) o (None, None) se non trovata
+        """
+        cursor.execute(RELATIONSHIP_SELECT_BY_ID, (rel_id,))
+        row = cursor.fetchone()
+        
+        if not row:
+            return None, None
+        
+        # Riga letta + valori scritti: nessuna rilettura
+        updated = dict(zip(row.keys(), row))
+        updated.update(
+            strength=min(1.0, row["strength"] + strength_boost),
+            evidence_count=row["evidence_count"] + 1,
+            last_reinforced=now,
+            updated_at=now
+        )
+        if new_source_sentence:
+            updated["source_sentence"] = new_source_sentence
+        
+        cursor.execute("""
+            UPDATE relationships 
+            SET strength = ?, evidence_count = ?, last_reinforced = ?, 
+                updated_at = ?, source_sentence = ?
+            WHERE rel_id = ?
+        """, (
+            updated["strength"], updated["evidence_count"], now, now,
+            updated["source_sentence"], rel_id
+        ))
+        return updated, row["strength"]
+
+    @_invalidates_lookups
+    async def reinforce_relationships_bulk(
+        self,
+        reinforcements: List[Dict[str, Any]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Versione batch di reinforce_relationship.
+        
+        Stessa semantica di N chiamate singole applicate in ordine (una relazione
+        ripetuta nel batch viene rinforzata più volte), con le relazioni lette da
+        pochi SELECT ... IN (a blocchi), un executemany e un unico commit.
+        
+        Args:
+            reinforcements: Lista di {"rel_id", "strength_boost" (default 0.1),
+                "source_sentence" (opzionale)}
+            
+        Returns:
+            Relazioni rinforzate nello stesso ordine dell'input (None se non trovata)
+        """
+        return await self._run_db(self._sync_reinforce_relationships_bulk, reinforcements)
+    
+    def _sync_reinforce_relationships_bulk(
+        self,
+        reinforcements: List[Dict[str, Any]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Corpo sincrono di reinforce_relationships_bulk (eseguito nel pool DB)"""
+        if not reinforcements:
+            return []
+        
+        for item in reinforcements:
+            if not item.get("rel_id"):
+                raise ValueError("rel_id is required")
+        
+        now = datetime.utcnow().isoformat() + "Z"
+        db = self._get_db_manager()
+        
+        try:
+            with db._get_thread_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                rel_ids = list(dict.fromkeys(item["rel_id"] for item in reinforcements))
+                state: Dict[str, Dict[str, Any]] = {}
+                for chunk in _chunked(rel_ids, SQLITE_MAX_PARAMS):
+                    placeholders = ", ".join("?" * len(chunk))
+                    cursor.execute(
+                        f"SELECT {_relationship_columns()} FROM relationships WHERE rel_id IN ({placeholders})",
+                        chunk
+                    )
+                    for row in cursor.fetchall():
+                        state[row["rel_id"]] = dict(row)
+                
+                # Rinforzi applicati in ordine sullo stato in memoria
+                updated: Dict[str, Dict[str, Any]] = {}
+                results = []
+                for item in reinforcements:
+                    rel = state.get(item["rel_id"])
+                    if rel is None:
+                        results.append(None)
+                        continue
+                    
+                    rel.update(
+                        strength=min(1.0, rel["strength"] + item.get("strength_boost", 0.1)),
+                        evidence_count=rel["evidence_count"] + 1,
+                        last_reinforced=now,
+                        updated_at=now
+                    )
+                    if item.get("source_sentence"):
+                        rel["source_sentence"] = item["source_sentence"]
+                    updated[rel["rel_id"]] = rel
+                    results.append(self._row_to_relationship_dict(rel))
                 
-                # Update
-                if new_source_sentence:
-                    cursor.execute("""
+                if updated:
+                    cursor.executemany("""
                         UPDATE relationships 
                         SET strength = ?, evidence_count = ?, last_reinforced = ?, 
                             updated_at = ?, source_sentence = ?
                         WHERE rel_id = ?
-                    """, (new_strength, new_evidence_count, now, now, new_source_sentence, rel_id))
-                else:
-                    cursor.execute("""
-                        UPDATE relationships 
-                        SET strength = ?, evidence_count = ?, last_reinforced = ?, updated_at = ?
-                        WHERE rel_id = ?
-                    """, (new_strength, new_evidence_count, now, now, rel_id))
+                    """, [
+                        (
+                            r["strength"], r["evidence_count"], r["last_reinforced"],
+                            r["updated_at"], r["source_sentence"], r["rel_id"]
+                        )
+                        for r in updated.values()
+                    ])
                 
                 conn.commit()
-                
-                # Log dettagliato
-                source_info = ""
-                if new_source_sentence:
-                    source_info = f"\n  Source: '{new_source_sentence[:60]}...'"
-                
-                logger.info(
-                    f"[GRAPH] REINFORCED relationship:\n"
-                    f"  ID: {rel_id}\n"
-                    f"  {row['from_entity_id']} -> {row['to_entity_id']}\n"
-                    f"  Type: {row['relation_type']}/{row['valence']}\n"
-                    f"  Strength: {old_strength:.2f}->{new_strength:.2f} (+{strength_boost:.2f})\n"
-                    f"  Evidence: {old_evidence_count}->{new_evidence_count}{source_info}"
-                )
-                
-                # Ritorna relazione aggiornata
-                cursor.execute("SELECT * FROM relationships WHERE rel_id = ?", (rel_id,))
-                row = cursor.fetchone()
-                return self._row_to_relationship_dict(row)
-                
+            
+            logger.info(
+                "[GRAPH] BULK: %d reinforcements -> %d relationships updated, %d not found",
+                len(reinforcements), len(updated), results.count(None)
+            )
+            return results
+        
         except Exception as e:
-            logger.error(f"[GRAPH] Error reinforcing relationship: {e}")
+            logger.error("[GRAPH] Error reinforcing relationships in bulk: %s", e)
             raise
 
     # ==================== RELATIONSHIP EVENT HISTORY ====================
@@ -880,45 +1938,33 @@ class GraphService:
         Returns:
             Lista di eventi con predicate, valence, timestamp, etc.
         """
+        return await self._run_db(self._sync_get_relationship_events, rel_id, limit, order)
+    
+    def _sync_get_relationship_events(
+        self,
+        rel_id: str,
+        limit: int = 50,
+        order: str = "desc"
+    ) -> List[Dict[str, Any]]:
+        """Corpo sincrono di get_relationship_events (eseguito nel pool DB)"""
         db = self._get_db_manager()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
-                order_dir = "DESC" if order == "desc" else "ASC"
-                cursor.execute(f"""
-                    SELECT * FROM relationship_events 
-                    WHERE rel_id = ?
-                    ORDER BY timestamp {order_dir}
-                    LIMIT ?
-                """, (rel_id, limit))
-                
-                rows = cursor.fetchall()
-                
-                events = []
-                for row in rows:
-                    metadata = {}
-                    if row["metadata_json"]:
-                        try:
-                            metadata = json.loads(row["metadata_json"])
-                        except:
-                            pass
-                    
-                    events.append({
-                        "event_id": row["event_id"],
-                        "rel_id": row["rel_id"],
-                        "predicate": row["predicate"],
-                        "valence": row["valence"],
-                        "intensity": row["intensity"],
-                        "source_sentence": row["source_sentence"],
-                        "timestamp": row["timestamp"],
-                        "normalization_method": row["normalization_method"],
-                        "normalization_confidence": row["normalization_confidence"],
-                        "metadata": metadata
-                    })
+                sql = RELATIONSHIP_EVENTS_DESC_SQL if order == "desc" else RELATIONSHIP_EVENTS_ASC_SQL
+                # Tuple posizionali (niente sqlite3.Row) consumate direttamente dal cursore
+                cursor.row_factory = None
+                cursor.execute(sql, (rel_id, limit))
                 
-                return events
+                return [
+                    {
+                        **dict(zip(RELATIONSHIP_EVENT_COLUMNS, row)),
+                        "metadata": _loads_json_field(row[-1], dict)
+                    }
+                    for row in cursor
+                ]
                 
         except Exception as e:
             logger.error(f"[GRAPH] Error getting relationship events: {e}")
@@ -948,23 +1994,26 @@ class GraphService:
                 "events_analyzed": 3
             }
         """
+        return await self._run_db(self._sync_get_relationship_trend, rel_id, window_size)
+    
+    def _sync_get_relationship_trend(
+        self,
+        rel_id: str,
+        window_size: int = 3
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di get_relationship_trend (eseguito nel pool DB)"""
         db = self._get_db_manager()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Recupera ultimi N eventi
-                cursor.execute("""
-                    SELECT valence, timestamp FROM relationship_events 
-                    WHERE rel_id = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """, (rel_id, window_size))
-                
-                rows = cursor.fetchall()
+                # Aggrega gli ultimi N eventi in SQL (una sola riga)
+                cursor.execute(RELATIONSHIP_TREND_SQL, (rel_id, window_size))
+                stats = cursor.fetchone()
+                events_analyzed = stats["n"]
                 
-                if not rows:
+                if not events_analyzed:
                     return {
                         "current_valence": None,
                         "trend": "unknown",
@@ -973,24 +2022,19 @@ class GraphService:
                         "events_analyzed": 0
                     }
                 
-                valences = [row["valence"] for row in rows]
-                current = valences[0]  # Più recente
-                avg_valence = sum(valences) / len(valences)
+                current = float(stats["current_valence"])  # Più recente
+                avg_valence = float(stats["avg_valence"])
                 
                 # Determina trend
-                if len(valences) == 1:
+                if events_analyzed == 1:
                     trend = "stable"
                     change = 0
                 else:
-                    oldest = valences[-1]  # Meno recente nella window
+                    oldest = float(stats["oldest_valence"])  # Meno recente nella window
                     change = current - oldest
                     
-                    # Calcola volatilità
-                    if len(valences) >= 2:
-                        diffs = [abs(valences[i] - valences[i+1]) for i in range(len(valences)-1)]
-                        avg_diff = sum(diffs) / len(diffs)
-                    else:
-                        avg_diff = 0
+                    # Volatilità: differenza media tra eventi consecutivi
+                    avg_diff = stats["avg_diff"]
                     
                     if avg_diff > 0.5:
                         trend = "volatile"
@@ -1006,7 +2050,7 @@ class GraphService:
                     "trend": trend,
                     "avg_valence": round(avg_valence, 3),
                     "change": round(change, 3),
-                    "events_analyzed": len(valences)
+                    "events_analyzed": events_analyzed
                 }
                 
         except Exception as e:
@@ -1041,49 +2085,40 @@ class GraphService:
                 "interpretation": "stable" | "fluctuating" | "highly_unstable"
             }
         """
+        return await self._run_db(self._sync_get_relationship_volatility, rel_id)
+    
+    def _sync_get_relationship_volatility(
+        self,
+        rel_id: str
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di get_relationship_volatility (eseguito nel pool DB)"""
         db = self._get_db_manager()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Recupera tutti gli eventi
-                cursor.execute("""
-                    SELECT valence FROM relationship_events 
-                    WHERE rel_id = ?
-                    ORDER BY timestamp ASC
-                """, (rel_id,))
-                
-                rows = cursor.fetchall()
+                stats = self._relationship_volatility_stats(conn, rel_id)
+                total_events = stats["n"]
                 
-                if len(rows) < 2:
+                if total_events < 2:
                     return {
                         "volatility": 0.0,
                         "stddev": 0.0,
                         "sign_changes": 0,
-                        "total_events": len(rows),
+                        "total_events": total_events,
                         "interpretation": "insufficient_data"
                     }
                 
-                valences = [row["valence"] for row in rows]
-                
-                # Calcola standard deviation
-                mean = sum(valences) / len(valences)
-                variance = sum((v - mean) ** 2 for v in valences) / len(valences)
-                stddev = variance ** 0.5
-                
-                # Conta cambi di segno (positivo ↔ negativo)
-                sign_changes = 0
-                for i in range(1, len(valences)):
-                    if (valences[i-1] >= 0) != (valences[i] >= 0):
-                        sign_changes += 1
+                stddev = (max(stats["m2"], 0.0) / total_events) ** 0.5
+                sign_changes = stats["sign_changes"]
                 
                 # Normalizza volatilità (0-1)
                 # stddev max teorico = 1.0 (oscillazione -1 a +1)
                 volatility = min(1.0, stddev)
                 
                 # Bonus per sign_changes
-                sign_change_ratio = sign_changes / (len(valences) - 1) if len(valences) > 1 else 0
+                sign_change_ratio = sign_changes / (total_events - 1)
                 volatility = min(1.0, volatility + sign_change_ratio * 0.3)
                 
                 # Interpretazione
@@ -1098,7 +2133,7 @@ class GraphService:
                     "volatility": round(volatility, 3),
                     "stddev": round(stddev, 3),
                     "sign_changes": sign_changes,
-                    "total_events": len(valences),
+                    "total_events": total_events,
                     "interpretation": interpretation
                 }
                 
@@ -1112,6 +2147,7 @@ class GraphService:
                 "interpretation": "error"
             }
 
+    @_invalidates_lookups
     async def apply_decay(
         self,
         user_id: Optional[str] = None,
@@ -1137,69 +2173,135 @@ class GraphService:
         """Get decay service statistics"""
         return self.decay_service.get_stats()
     
-    def _row_to_relationship_dict(self, row) -> Dict[str, Any]:
-        """Convert SQLite row to relationship dict"""
-        metadata = {}
-        if row["metadata_json"]:
-            try:
-                metadata = json.loads(row["metadata_json"])
-            except:
-                pass
+    def _row_to_relationship_dict(self, row, include_metadata: bool = True) -> Dict[str, Any]:
+        """
+        Convert SQLite row (or dict) to relationship dict.
         
-        return {
-            "id": row["rel_id"],
-            "source_entity_id": row["from_entity_id"],
-            "target_entity_id": row["to_entity_id"],
-            "relation_type": row["relation_type"] or row["type"],
-            "original_predicate": row["original_predicate"] or row["type"],
-            "source_sentence": row["source_sentence"],
-            "metadata": metadata,
-            "strength": row["strength"],
-            "confidence": row["confidence"] if "confidence" in row.keys() else 0.8,
-            "valence": row["valence"] if "valence" in row.keys() else "neutral",
-            "intensity": row["intensity"] if "intensity" in row.keys() else 0.5,
-            "evidence_count": row["evidence_count"] if "evidence_count" in row.keys() else 1,
-            "trust": row["trust"],
-            "status": row["status"],
-            "created_at": row["created_at"],
-            "updated_at": row["updated_at"],
-            "last_reinforced": row["last_reinforced"] if "last_reinforced" in row.keys() else None
+        Le righe sono lette per posizione: iniziano con RELATIONSHIP_COLUMNS, seguite
+        da RELATIONSHIP_TEXT_COLUMNS se include_metadata (eventuali colonne extra in coda,
+        es. total_rows / match_score, vengono ignorate).
+        """
+        if isinstance(row, dict):
+            include_metadata = "metadata_json" in row
+            row = tuple(
+                row.get(column, RELATIONSHIP_DICT_DEFAULTS.get(column))
+                for column in RELATIONSHIP_COLUMNS + RELATIONSHIP_TEXT_COLUMNS
+            )
+        
+        (rel_id, from_entity_id, to_entity_id, rel_type, relation_type, original_predicate,
+         strength, confidence, valence, intensity, evidence_count, trust, status,
+         created_at, updated_at, last_reinforced) = row[:len(RELATIONSHIP_COLUMNS)]
+        
+        rel = {
+            "id": rel_id,
+            "source_entity_id": from_entity_id,
+            "target_entity_id": to_entity_id,
+            "relation_type": relation_type or rel_type,
+            "original_predicate": original_predicate or rel_type,
+            "strength": strength,
+            "confidence": confidence,
+            "valence": valence,
+            "intensity": intensity,
+            "evidence_count": evidence_count,
+            "trust": trust,
+            "status": status,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "last_reinforced": last_reinforced
         }
+        
+        # Testi lunghi: presenti solo se selezionati (vedi include_metadata)
+        if include_metadata:
+            offset = len(RELATIONSHIP_COLUMNS)
+            rel["source_sentence"] = row[offset]
+            rel["metadata"] = _loads_json_field(row[offset + 1], dict)
+        
+        return rel
     
     def _row_to_entity_dict(self, row) -> Dict[str, Any]:
-        """Convert SQLite row to entity dict"""
-        aliases = []
-        identifiers = {}
-        attributes = {}
-        tags = []
-        
-        try:
-            if row["aliases_json"]:
-                aliases = json.loads(row["aliases_json"])
-            if row["identifiers_json"]:
-                identifiers = json.loads(row["identifiers_json"])
-            if row["attributes_json"]:
-                attributes = json.loads(row["attributes_json"])
-            if row["tags_json"]:
-                tags = json.loads(row["tags_json"])
-        except:
-            pass
+        """Convert SQLite row (SELECT ENTITY_SELECT) or dict to entity dict"""
+        if isinstance(row, dict):
+            row = tuple(row[column] for column in ENTITY_DICT_COLUMNS)
+        (
+            entity_id, entity_type, primary_name, aliases_json, identifiers_json,
+            attributes_json, salience, confidence, status, tags_json,
+            created_at, updated_at
+        ) = row[:len(ENTITY_DICT_COLUMNS)]
         
         return {
-            "entity_id": row["entity_id"],
-            "type": row["type"],
-            "primary_name": row["primary_name"],
-            "aliases": aliases,
-            "identifiers": identifiers,
-            "attributes": attributes,
-            "salience": row["salience"],
-            "confidence": row["confidence"],
-            "status": row["status"],
-            "tags": tags,
-            "created_at": row["created_at"],
-            "updated_at": row["updated_at"]
+            "entity_id": entity_id,
+            "type": entity_type,
+            "primary_name": primary_name,
+            "aliases": _loads_json_field(aliases_json, list),
+            "identifiers": _loads_json_field(identifiers_json, dict),
+            "attributes": _loads_json_field(attributes_json, dict),
+            "salience": salience,
+            "confidence": confidence,
+            "status": status,
+            "tags": _loads_json_field(tags_json, list),
+            "created_at": created_at,
+            "updated_at": updated_at
         }
     
+    def _relationship_volatility_stats(self, conn, rel_id: str) -> Dict[str, Any]:
+        """
+        Conteggio, M2 (somma dei quadrati degli scarti) e cambi di segno degli eventi.
+        
+        Letti dalla tabella relationship_stats mantenuta dai trigger. Senza la tabella,
+        o con la riga invalidata (eventi cancellati o modificati, ricostruita al prossimo
+        avvio da ensure_graph_schema), gli aggregati sono calcolati sull'intero storico:
+        è una lettura, non scrive nulla.
+        """
+        cursor = conn.cursor()
+        if self._relationship_stats is None:
+            self._relationship_stats = table_exists(conn, RELATIONSHIP_STATS_TABLE)
+        
+        if self._relationship_stats:
+            cursor.execute(RELATIONSHIP_STATS_SQL, (rel_id,))
+            row = cursor.fetchone()
+            if row is not None:
+                return {"n": row["n"], "m2": row["m2"], "sign_changes": row["sign_changes"]}
+        
+        _register_sql_functions(conn)
+        cursor.execute(RELATIONSHIP_VOLATILITY_SQL, (rel_id,))
+        row = cursor.fetchone()
+        stddev = row["stddev"] or 0.0
+        return {"n": row["n"], "m2": stddev * stddev * row["n"], "sign_changes": row["sign_changes"]}
+    
+    def _entity_fts_available(self, conn) -> bool:
+        """True se esiste l'indice full-text delle entità (FTS5 trigram, vedi graph_schema)"""
+        if self._entity_fts is None:
+            self._entity_fts = table_exists(conn, ENTITY_FTS_TABLE)
+        return self._entity_fts
+    
+    def _entity_text_filter(
+        self, conn, query_lower: str, include_aliases: bool = True
+    ) -> Tuple[str, List[Any]]:
+        """
+        Condizione "query contenuta in primary_name / entity_id (/ aliases_json)".
+        
+        Con l'indice full-text è una ricerca trigram sull'indice; senza indice, o per
+        query sotto i 3 caratteri (nessun trigramma), resta il LIKE '%q%' con scansione.
+        
+        Returns:
+            (frammento SQL, parametri)
+        """
+        if len(query_lower) >= 3 and self._entity_fts_available(conn):
+            columns = "entity_id primary_name aliases_json" if include_aliases else "entity_id primary_name"
+            phrase = query_lower.replace('"', '""')
+            return (
+                f"rowid IN (SELECT rowid FROM {ENTITY_FTS_TABLE} WHERE {ENTITY_FTS_TABLE} MATCH ?)",
+                [f'{{{columns}}} : "{phrase}"']
+            )
+        
+        pattern = f"%{query_lower}%"
+        if include_aliases:
+            return (
+                "(LOWER(primary_name) LIKE ? OR LOWER(entity_id) LIKE ? OR LOWER(aliases_json) LIKE ?)",
+                [pattern, pattern, pattern]
+            )
+        return "(LOWER(primary_name) LIKE ? OR LOWER(entity_id) LIKE ?)", [pattern, pattern]
+    
     def _generate_entity_id(self, name: str, entity_type: str) -> str:
         """
         Genera un ID univoco per un'entità basato sul nome e tipo.
@@ -1212,15 +2314,14 @@ class GraphService:
             ID normalizzato (es. "person:fabrizio_rossi")
         """
         # Normalizza il nome
-        normalized = name.lower().strip()
-        normalized = normalized.replace(" ", "_")
-        normalized = "".join(c for c in normalized if c.isalnum() or c == "_")
+        normalized = ENTITY_ID_STRIP_RE.sub("", name.lower().strip().replace(" ", "_"))
         
         # Prefisso tipo
         type_prefix = entity_type.lower() if entity_type else "entity"
         
         return f"{type_prefix}:{normalized}"
     
+    @_invalidates_lookups
     async def create_entity(
         self,
         name: str,
@@ -1254,125 +2355,88 @@ class GraphService:
         Returns:
             Entità creata con metadati di normalizzazione se auto-inferita
         """
+        return await self._run_db(
+            self._sync_create_entity,
+            name, entity_type, aliases, identifiers, attributes, confidence, source, context,
+            hints
+        )
+    
+    def _sync_create_entity(
+        self,
+        name: str,
+        entity_type: str = "auto",
+        aliases: Optional[List[str]] = None,
+        identifiers: Optional[Dict[str, str]] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        confidence: float = 0.8,
+        source: str = "extraction",
+        context: str = "",
+        hints: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di create_entity (eseguito nel pool DB)"""
         db = self._get_db_manager()
         
         # ===== AUTO-INFERENZA TIPO =====
-        type_inference_metadata = None
-        if entity_type == "auto" or entity_type is None:
-            type_result = self.entity_type_normalizer.infer_type(
-                entity_name=name,
-                context=context,
-                hints=hints
-            )
-            entity_type = type_result.entity_type.value
-            type_inference_metadata = {
-                "inferred_type": type_result.entity_type.value,
-                "inference_confidence": type_result.confidence,
-                "inference_method": type_result.method,
-                "inference_signals": type_result.signals,
-                "alternative_types": [
-                    {"type": t.value, "confidence": c} 
-                    for t, c in type_result.alternative_types
-                ]
-            }
-            logger.info(
-                f"[GRAPH] Auto-inferred type for '{name}': "
-                f"{entity_type} (confidence={type_result.confidence:.2f}, method={type_result.method})"
-            )
+        entity_type, attributes, type_inference_metadata = self._resolve_entity_type(
+            name, entity_type, attributes, context, hints
+        )
         
         # Genera ID
         entity_id = self._generate_entity_id(name, entity_type)
         now = datetime.utcnow().isoformat() + "Z"
         
-        # Se c'è metadata di inferenza, aggiungilo agli attributes
-        if type_inference_metadata:
-            if attributes is None:
-                attributes = {}
-            attributes["_type_inference"] = type_inference_metadata
-        
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Check se esiste già
-                cursor.execute("SELECT * FROM entities WHERE entity_id = ?", (entity_id,))
+                cursor.execute(ENTITY_SELECT_BY_ID, (entity_id,))
                 existing = cursor.fetchone()
                 
                 if existing:
                     # Entità esistente: aggiorna/arricchisci
-                    existing_aliases = json.loads(existing["aliases_json"] or "[]")
-                    existing_identifiers = json.loads(existing["identifiers_json"] or "{}")
-                    existing_attributes = json.loads(existing["attributes_json"] or "{}")
-                    
-                    # Merge aliases
-                    if aliases:
-                        existing_aliases = list(set(existing_aliases + aliases))
-                    
-                    # Merge identifiers (nuovi sovrascrivono)
-                    if identifiers:
-                        existing_identifiers.update(identifiers)
-                    
-                    # Merge attributes
-                    if attributes:
-                        existing_attributes.update(attributes)
+                    changes = self._entity_merge_changes(
+                        existing, aliases, identifiers, attributes, confidence, now
+                    )
                     
-                    # Aggiorna confidence se maggiore
-                    new_confidence = max(existing["confidence"], confidence)
+                    # Merge senza effetti e updated_at recente: niente UPDATE, commit né rilettura
+                    if changes is None:
+                        logger.debug("[GRAPH] Entity unchanged, merge skipped: %s", entity_id)
+                        return self._row_to_entity_dict(existing)
                     
-                    cursor.execute("""
-                        UPDATE entities 
-                        SET aliases_json = ?, identifiers_json = ?, attributes_json = ?,
-                            confidence = ?, updated_at = ?
-                        WHERE entity_id = ?
-                    """, (
-                        json.dumps(existing_aliases),
-                        json.dumps(existing_identifiers),
-                        json.dumps(existing_attributes),
-                        new_confidence,
-                        now,
-                        entity_id
-                    ))
+                    cursor.execute(self._ENTITY_MERGE_SQL, (*changes.values(), entity_id))
                     
                     conn.commit()
                     
-                    logger.info(
-                        f"\n{'*'*60}\n"
-                        f"[GRAPH] ENTITY UPDATED (MERGED)\n"
-                        f"{'*'*60}\n"
-                        f"  Entity ID:   {entity_id}\n"
-                        f"  Name:        {name}\n"
-                        f"  Type:        {entity_type}\n"
-                        f"  Aliases:     {existing_aliases if existing_aliases else 'none'}\n"
-                        f"  Identifiers: {list(existing_identifiers.keys()) if existing_identifiers else 'none'}\n"
-                        f"  Confidence:  {existing['confidence']:.2f} -> {new_confidence:.2f}\n"
-                        f"{'*'*60}"
-                    )
+                    if logger.isEnabledFor(logging.INFO):
+                        merged_aliases = _loads_json(changes["aliases_json"])
+                        merged_identifiers = _loads_json(changes["identifiers_json"])
+                        logger.info(
+                            f"\n{'*'*60}\n"
+                            f"[GRAPH] ENTITY UPDATED (MERGED)\n"
+                            f"{'*'*60}\n"
+                            f"  Entity ID:   {entity_id}\n"
+                            f"  Name:        {name}\n"
+                            f"  Type:        {entity_type}\n"
+                            f"  Aliases:     {merged_aliases if merged_aliases else 'none'}\n"
+                            f"  Identifiers: {list(merged_identifiers.keys()) if merged_identifiers else 'none'}\n"
+                            f"  Confidence:  {existing['confidence']:.2f} -> {changes['confidence']:.2f}\n"
+                            f"{'*'*60}"
+                        )
                     
-                    cursor.execute("SELECT * FROM entities WHERE entity_id = ?", (entity_id,))
+                    cursor.execute(ENTITY_SELECT_BY_ID, (entity_id,))
                     row = cursor.fetchone()
                     return self._row_to_entity_dict(row)
                 
                 else:
                     # Nuova entità
-                    cursor.execute("""
-                        INSERT INTO entities (
-                            entity_id, type, primary_name, aliases_json, identifiers_json,
-                            attributes_json, salience, confidence, status, tags_json,
-                            created_at, updated_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        entity_id,
-                        entity_type,
-                        name,
-                        json.dumps(aliases or []),
-                        json.dumps(identifiers or {}),
-                        json.dumps(attributes or {}),
-                        0.5,  # salience iniziale
-                        confidence,
-                        "active",
-                        json.dumps([]),  # tags
-                        now, now
-                    ))
+                    row = self._new_entity_row(
+                        entity_id, entity_type, name, aliases, identifiers, attributes, confidence, now
+                    )
+                    cursor.execute(
+                        self._ENTITY_INSERT_SQL,
+                        tuple(row[column] for column in ENTITY_INSERT_COLUMNS)
+                    )
                     
                     conn.commit()
                     
@@ -1381,37 +2445,296 @@ class GraphService:
                     if type_inference_metadata:
                         type_info = f" ({entity_type}, auto-inferred via {type_inference_metadata['inference_method']}, conf={type_inference_metadata['inference_confidence']:.2f})"
                     
-                    logger.info(
-                        f"\n{'+'*60}\n"
-                        f"[GRAPH] NEW ENTITY CREATED\n"
-                        f"{'+'*60}\n"
-                        f"  Entity ID:   {entity_id}\n"
-                        f"  Name:        {name}\n"
-                        f"  Type:        {type_info}\n"
-                        f"  Aliases:     {aliases if aliases else 'none'}\n"
-                        f"  Identifiers: {list(identifiers.keys()) if identifiers else 'none'}\n"
-                        f"  Confidence:  {confidence:.2f}\n"
-                        f"  Source:      {source}\n"
-                        f"{'+'*60}"
-                    )
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(
+                            f"\n{'+'*60}\n"
+                            f"[GRAPH] NEW ENTITY CREATED\n"
+                            f"{'+'*60}\n"
+                            f"  Entity ID:   {entity_id}\n"
+                            f"  Name:        {name}\n"
+                            f"  Type:        {type_info}\n"
+                            f"  Aliases:     {aliases if aliases else 'none'}\n"
+                            f"  Identifiers: {list(identifiers.keys()) if identifiers else 'none'}\n"
+                            f"  Confidence:  {confidence:.2f}\n"
+                            f"  Source:      {source}\n"
+                            f"{'+'*60}"
+                        )
+                    
+                    return {
+                        "entity_id": entity_id,
+                        "type": entity_type,
+                        "primary_name": name,
+                        "aliases": aliases or [],
+                        "identifiers": identifiers or {},
+                        "attributes": attributes or {},
+                        "salience": 0.5,
+                        "confidence": confidence,
+                        "status": "active",
+                        "tags": [],
+                        "created_at": now,
+                        "updated_at": now
+                    }
+                    
+        except Exception as e:
+            logger.error(f"[GRAPH] Error creating entity: {e}")
+            raise
+    
+    # INSERT di una nuova entità e merge su una esistente (create_entity e bulk)
+    _ENTITY_INSERT_SQL = f"""
+        INSERT INTO entities ({", ".join(ENTITY_INSERT_COLUMNS)})
+        VALUES ({", ".join("?" * len(ENTITY_INSERT_COLUMNS))})
+    """
+    _ENTITY_MERGE_SQL = f"""
+        UPDATE entities
+        SET {", ".join(f"{column} = ?" for column in ENTITY_MERGE_COLUMNS)}
+        WHERE entity_id = ?
+    """
+    
+    def _resolve_entity_type(
+        self,
+        name: str,
+        entity_type: Optional[str],
+        attributes: Optional[Dict[str, Any]],
+        context: str = "",
+        hints: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Tipo dell'entità: quello indicato o, per "auto"/None, inferito
+        dall'EntityTypeNormalizer (metadata di inferenza aggiunti agli attributes).
+        
+        Returns:
+            (entity_type, attributes, metadata di inferenza o None)
+        """
+        if entity_type != "auto" and entity_type is not None:
+            return entity_type, attributes, None
+        
+        type_result = self.entity_type_normalizer.infer_type(
+            entity_name=name,
+            context=context,
+            hints=hints
+        )
+        entity_type = type_result.entity_type.value
+        type_inference_metadata = {
+            "inferred_type": type_result.entity_type.value,
+            "inference_confidence": type_result.confidence,
+            "inference_method": type_result.method,
+            "inference_signals": type_result.signals,
+            "alternative_types": [
+                {"type": t.value, "confidence": c} 
+                for t, c in type_result.alternative_types
+            ]
+        }
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"[GRAPH] Auto-inferred type for '{name}': "
+                f"{entity_type} (confidence={type_result.confidence:.2f}, method={type_result.method})"
+            )
+        
+        # Metadata di inferenza negli attributes
+        if attributes is None:
+            attributes = {}
+        attributes["_type_inference"] = type_inference_metadata
+        return entity_type, attributes, type_inference_metadata
+    
+    @staticmethod
+    def _new_entity_row(
+        entity_id: str,
+        entity_type: str,
+        name: str,
+        aliases: Optional[List[str]],
+        identifiers: Optional[Dict[str, str]],
+        attributes: Optional[Dict[str, Any]],
+        confidence: float,
+        now: str
+    ) -> Dict[str, Any]:
+        """Riga (ENTITY_INSERT_COLUMNS) di una nuova entità creata da create_entity"""
+        return {
+            "entity_id": entity_id,
+            "type": entity_type,
+            "primary_name": name,
+            "aliases_json": _dumps_json(aliases or []),
+            "identifiers_json": _dumps_json(identifiers or {}),
+            "attributes_json": _dumps_json(attributes or {}),
+            "salience": 0.5,  # salience iniziale
+            "confidence": confidence,
+            "status": "active",
+            "tags_json": "[]",
+            "created_at": now,
+            "updated_at": now,
+            "source": (attributes or {}).get("source", "extraction"),
+            "is_protected": 0  # nessun tag alla creazione
+        }
+    
+    @staticmethod
+    def _entity_merge_changes(
+        existing,
+        aliases: Optional[List[str]],
+        identifiers: Optional[Dict[str, str]],
+        attributes: Optional[Dict[str, Any]],
+        confidence: float,
+        now: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Merge di create_entity su un'entità esistente: aliases uniti, identifiers e
+        attributes sovrascritti, confidence aggiornata se maggiore.
+        
+        Returns:
+            Valori di ENTITY_MERGE_COLUMNS (in ordine), o None se il merge non cambia
+            nulla e updated_at è più recente di ENTITY_TOUCH_INTERVAL_SECONDS
+        """
+        existing_aliases = _loads_json(existing["aliases_json"] or "[]")
+        existing_identifiers = _loads_json(existing["identifiers_json"] or "{}")
+        existing_attributes = _loads_json(existing["attributes_json"] or "{}")
+        stored = (set(existing_aliases), dict(existing_identifiers), dict(existing_attributes))
+        
+        # Merge aliases
+        if aliases:
+            existing_aliases = list(set(existing_aliases + aliases))
+        
+        # Merge identifiers (nuovi sovrascrivono)
+        if identifiers:
+            existing_identifiers.update(identifiers)
+        
+        # Merge attributes
+        if attributes:
+            existing_attributes.update(attributes)
+        
+        # Aggiorna confidence se maggiore
+        new_confidence = max(existing["confidence"], confidence)
+        new_source = existing_attributes.get("source", "extraction")
+        
+        updated_ts = existing["updated_at_ts"]
+        if (
+            (set(existing_aliases), existing_identifiers, existing_attributes) == stored
+            and new_confidence == existing["confidence"]
+            and new_source == existing["source"]
+            and updated_ts is not None
+            and time.time() - updated_ts < ENTITY_TOUCH_INTERVAL_SECONDS
+        ):
+            return None
+        
+        return {
+            "aliases_json": _dumps_json(existing_aliases),
+            "identifiers_json": _dumps_json(existing_identifiers),
+            "attributes_json": _dumps_json(existing_attributes),
+            "confidence": new_confidence,
+            "updated_at": now,
+            "source": new_source
+        }
+    
+    @_invalidates_lookups
+    async def create_entities_bulk(
+        self,
+        entities: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Versione batch di create_entity.
+        
+        Stessa semantica di N chiamate singole applicate in ordine (un'entità
+        ripetuta nel batch viene arricchita dalle occorrenze successive), ma:
+        - le entità esistenti vengono lette con pochi SELECT ... IN (a blocchi)
+        - inserimenti e merge vengono scritti con executemany
+        - un'unica transazione BEGIN IMMEDIATE (un solo commit) per tutto il batch
+        
+        Args:
+            entities: Lista di entità con gli stessi campi di create_entity
+                (name obbligatorio; entity_type, aliases, identifiers, attributes,
+                confidence, context, hints opzionali)
+            
+        Returns:
+            Entità salvate, nello stesso ordine dell'input
+        """
+        return await self._run_db(self._sync_create_entities_bulk, entities)
+    
+    def _sync_create_entities_bulk(
+        self,
+        entities: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Corpo sincrono di create_entities_bulk (eseguito nel pool DB)"""
+        if not entities:
+            return []
+        
+        # Validazione + inferenza tipo prima di qualsiasi scrittura:
+        # un elemento invalido fa fallire l'intero batch
+        for item in entities:
+            if not item.get("name"):
+                raise ValueError("name is required")
+        
+        items = []
+        for item in entities:
+            entity_type, attributes, _ = self._resolve_entity_type(
+                item["name"], item.get("entity_type", "auto"), item.get("attributes"),
+                item.get("context") or "", item.get("hints")
+            )
+            entity_id = self._generate_entity_id(item["name"], entity_type)
+            items.append((entity_id, entity_type, item, attributes))
+        
+        now = datetime.utcnow().isoformat() + "Z"
+        now_ts = int(time.time())
+        db = self._get_db_manager()
+        
+        try:
+            with db._get_thread_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                # ===== ENTITÀ ESISTENTI =====
+                entity_ids = list(dict.fromkeys(entity_id for entity_id, _, _, _ in items))
+                state: Dict[str, Dict[str, Any]] = {}
+                for chunk in _chunked(entity_ids, SQLITE_MAX_PARAMS):
+                    placeholders = ", ".join("?" * len(chunk))
+                    cursor.execute(f"SELECT {ENTITY_SELECT} FROM entities WHERE entity_id IN ({placeholders})", chunk)
+                    for row in cursor.fetchall():
+                        state[row["entity_id"]] = dict(row)
+                
+                # ===== APPLICA IN ORDINE (stato in memoria, scritture alla fine) =====
+                inserts: Dict[str, Dict[str, Any]] = {}
+                updates: Dict[str, Dict[str, Any]] = {}
+                results = []
+                for entity_id, entity_type, item, attributes in items:
+                    confidence = item.get("confidence", 0.8)
+                    row = state.get(entity_id)
                     
-                    return {
-                        "entity_id": entity_id,
-                        "type": entity_type,
-                        "primary_name": name,
-                        "aliases": aliases or [],
-                        "identifiers": identifiers or {},
-                        "attributes": attributes or {},
-                        "salience": 0.5,
-                        "confidence": confidence,
-                        "status": "active",
-                        "tags": [],
-                        "created_at": now,
-                        "updated_at": now
-                    }
+                    if row is None:
+                        row = self._new_entity_row(
+                            entity_id, entity_type, item["name"], item.get("aliases"),
+                            item.get("identifiers"), attributes, confidence, now
+                        )
+                        row["updated_at_ts"] = now_ts
+                        state[entity_id] = inserts[entity_id] = row
+                    else:
+                        changes = self._entity_merge_changes(
+                            row, item.get("aliases"), item.get("identifiers"), attributes, confidence, now
+                        )
+                        if changes is not None:
+                            row.update(changes, updated_at_ts=now_ts)
+                            if entity_id not in inserts:
+                                updates[entity_id] = row
                     
+                    results.append(self._row_to_entity_dict(row))
+                
+                if inserts:
+                    cursor.executemany(self._ENTITY_INSERT_SQL, [
+                        tuple(row[column] for column in ENTITY_INSERT_COLUMNS)
+                        for row in inserts.values()
+                    ])
+                
+                if updates:
+                    cursor.executemany(self._ENTITY_MERGE_SQL, [
+                        (*(row[column] for column in ENTITY_MERGE_COLUMNS), entity_id)
+                        for entity_id, row in updates.items()
+                    ])
+                
+                conn.commit()
+            
+            logger.info(
+                "[GRAPH] BULK: %d entities -> %d new, %d merged",
+                len(items), len(inserts), len(updates)
+            )
+            return results
+        
         except Exception as e:
-            logger.error(f"[GRAPH] Error creating entity: {e}")
+            logger.error("[GRAPH] Error creating entities in bulk: %s", e)
             raise
     
     async def get_entity(self, entity_id: str) -> Optional[Dict[str, Any]]:
@@ -1424,32 +2747,38 @@ class GraphService:
         Returns:
             Entità o None se non trovata
         """
+        return await self._run_db(self._sync_get_entity, entity_id)
+    
+    def _sync_get_entity(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Corpo sincrono di get_entity (eseguito nel pool DB)"""
         db = self._get_db_manager()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM entities WHERE entity_id = ?", (entity_id,))
+                cursor.execute(ENTITY_SELECT_BY_ID, (entity_id,))
                 row = cursor.fetchone()
                 
                 if row:
                     entity = self._row_to_entity_dict(row)
-                    logger.info(
-                        f"\n{'-'*60}\n"
-                        f"[GRAPH] ENTITY RETRIEVED\n"
-                        f"{'-'*60}\n"
-                        f"  Entity ID:   {entity['entity_id']}\n"
-                        f"  Name:        {entity['primary_name']}\n"
-                        f"  Type:        {entity['type']}\n"
-                        f"  Aliases:     {entity.get('aliases', [])}\n"
-                        f"  Identifiers: {list(entity.get('identifiers', {}).keys())}\n"
-                        f"  Confidence:  {entity.get('confidence', 0):.2f}\n"
-                        f"  Salience:    {entity.get('salience', 0):.2f}\n"
-                        f"{'-'*60}"
-                    )
+                    # Lettura: banner solo in DEBUG (get_entity è chiamato a ogni risoluzione)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            f"\n{'-'*60}\n"
+                            f"[GRAPH] ENTITY RETRIEVED\n"
+                            f"{'-'*60}\n"
+                            f"  Entity ID:   {entity['entity_id']}\n"
+                            f"  Name:        {entity['primary_name']}\n"
+                            f"  Type:        {entity['type']}\n"
+                            f"  Aliases:     {entity.get('aliases', [])}\n"
+                            f"  Identifiers: {list(entity.get('identifiers', {}).keys())}\n"
+                            f"  Confidence:  {entity.get('confidence', 0):.2f}\n"
+                            f"  Salience:    {entity.get('salience', 0):.2f}\n"
+                            f"{'-'*60}"
+                        )
                     return entity
                 else:
-                    logger.info(f"[GRAPH] Entity NOT FOUND: {entity_id}")
+                    logger.info("[GRAPH] Entity NOT FOUND: %s", entity_id)
                 return None
                 
         except Exception as e:
@@ -1477,29 +2806,43 @@ class GraphService:
         Returns:
             {"entities": [...], "count": N, "exact_match": entity|None}
         """
+        key = self._lookup_cache_key(
+            "search", query.lower().strip(), entity_type, include_aliases, min_confidence, limit
+        )
+        result = self._lookup_cache_get(key)
+        if result is None:
+            result = await self._run_db(
+                self._sync_search_entities,
+                query, entity_type, include_aliases, min_confidence, limit
+            )
+            self._lookup_cache_put(key, result)
+        return result
+    
+    def _sync_search_entities(
+        self,
+        query: str,
+        entity_type: Optional[str] = None,
+        include_aliases: bool = True,
+        min_confidence: float = 0.0,
+        limit: int = 10
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di search_entities (eseguito nel pool DB)"""
         db = self._get_db_manager()
         query_lower = query.lower().strip()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Query base con LIKE per match parziale
-                sql = """
-                    SELECT * FROM entities 
+                # Match parziale (indice full-text o LIKE)
+                text_filter, text_params = self._entity_text_filter(conn, query_lower, include_aliases)
+                sql = f"""
+                    SELECT {ENTITY_SELECT} FROM entities 
                     WHERE status = 'active' 
                     AND confidence >= ?
-                    AND (
-                        LOWER(primary_name) LIKE ?
-                        OR LOWER(entity_id) LIKE ?
+                    AND {text_filter}
                 """
-                params = [min_confidence, f"%{query_lower}%", f"%{query_lower}%"]
-                
-                if include_aliases:
-                    sql += " OR LOWER(aliases_json) LIKE ?"
-                    params.append(f"%{query_lower}%")
-                
-                sql += ")"
+                params = [min_confidence, *text_params]
                 
                 if entity_type:
                     sql += " AND type = ?"
@@ -1527,22 +2870,23 @@ class GraphService:
                 
                 # Log dettagliato per search
                 if entities:
-                    logger.info(
-                        f"\n{'-'*60}\n"
-                        f"[GRAPH] ENTITIES SEARCH RESULTS\n"
-                        f"{'-'*60}\n"
-                        f"  Query: '{query}' (type={entity_type or 'any'})\n"
-                        f"  Found: {len(entities)} entities\n"
-                        + "\n".join([
-                            f"    - {e['entity_id']} | {e['primary_name']} ({e['type']}) conf={e['confidence']:.2f}"
-                            for e in entities[:5]
-                        ])
-                        + (f"\n    ... and {len(entities)-5} more" if len(entities) > 5 else "")
-                        + (f"\n  EXACT MATCH: {exact_match['entity_id']}" if exact_match else "")
-                        + f"\n{'-'*60}"
-                    )
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(
+                            f"\n{'-'*60}\n"
+                            f"[GRAPH] ENTITIES SEARCH RESULTS\n"
+                            f"{'-'*60}\n"
+                            f"  Query: '{query}' (type={entity_type or 'any'})\n"
+                            f"  Found: {len(entities)} entities\n"
+                            + "\n".join([
+                                f"    - {e['entity_id']} | {e['primary_name']} ({e['type']}) conf={e['confidence']:.2f}"
+                                for e in entities[:5]
+                            ])
+                            + (f"\n    ... and {len(entities)-5} more" if len(entities) > 5 else "")
+                            + (f"\n  EXACT MATCH: {exact_match['entity_id']}" if exact_match else "")
+                            + f"\n{'-'*60}"
+                        )
                 else:
-                    logger.info(f"[GRAPH] ENTITIES SEARCH: no results for '{query}'")
+                    logger.info("[GRAPH] ENTITIES SEARCH: no results for '%s'", query)
                 
                 return {
                     "entities": entities,
@@ -1554,6 +2898,47 @@ class GraphService:
             logger.error(f"[GRAPH] Error searching entities: {e}")
             raise
     
+    async def _find_exact_entity(
+        self,
+        name: str,
+        entity_type: Optional[str] = None,
+        min_confidence: float = 0.0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Entità attiva con nome o alias uguale a name (lookup su indice, senza ricerca parziale).
+        
+        Returns:
+            L'entità con confidence/salience più alte, None se nessun match
+            (o se gli indici non sono disponibili: il chiamante ripiega su search_entities)
+        """
+        return await self._run_db(self._sync_find_exact_entity, name, entity_type, min_confidence)
+    
+    def _sync_find_exact_entity(
+        self,
+        name: str,
+        entity_type: Optional[str] = None,
+        min_confidence: float = 0.0
+    ) -> Optional[Dict[str, Any]]:
+        """Corpo sincrono di _find_exact_entity (eseguito nel pool DB)"""
+        db = self._get_db_manager()
+        name_lower = name.lower().strip()
+        
+        with db._get_thread_connection() as conn:
+            if self._entity_aliases is None:
+                self._entity_aliases = table_exists(conn, ENTITY_ALIAS_TABLE)
+            if not self._entity_aliases:
+                return None
+            
+            sql = ENTITY_SELECT_EXACT
+            params = [name_lower, name_lower, min_confidence]
+            if entity_type:
+                sql += " AND type = ?"
+                params.append(entity_type)
+            sql += " ORDER BY confidence DESC, salience DESC LIMIT 1"
+            
+            row = conn.execute(sql, params).fetchone()
+            return self._row_to_entity_dict(row) if row else None
+    
     async def find_or_create_entity(
         self,
         name: str,
@@ -1576,19 +2961,21 @@ class GraphService:
         Returns:
             {"entity": {...}, "created": bool, "matched_by": "exact|alias|partial|created"}
         """
-        # Prima cerca match esatto
-        search_result = await self.search_entities(
-            query=name,
-            entity_type=entity_type,
-            include_aliases=True,
-            min_confidence=0.3,
-            limit=5
-        )
+        # Prima cerca match esatto: lookup su indice, poi ricerca parziale
+        entity = await self._find_exact_entity(name, entity_type, min_confidence=0.3)
+        search_result = None
+        if entity is None:
+            search_result = await self.search_entities(
+                query=name,
+                entity_type=entity_type,
+                include_aliases=True,
+                min_confidence=0.3,
+                limit=5
+            )
+            entity = search_result["exact_match"]
         
-        if search_result["exact_match"]:
+        if entity:
             # Match esatto trovato
-            entity = search_result["exact_match"]
-            
             # Arricchisci con nuovi dati se forniti
             if aliases or identifiers or attributes:
                 entity = await self.create_entity(
@@ -1683,25 +3070,54 @@ class GraphService:
                 "context": str | None  # Contesto trovato
             }
         """
-        logger.info(f"[RESOLVE] Resolving entity: '{entity_name}' (type={entity_type})")
+        key = self._lookup_cache_key(
+            "resolve", entity_name, entity_type, user_id, context_hint,
+            include_episodic, include_semantic, include_relationships, min_confidence
+        )
+        result = self._lookup_cache_get(key)
+        if result is not None:
+            logger.info("[RESOLVE] Cached result for '%s' (type=%s)", entity_name, entity_type)
+            return result
+        
+        result = await self._resolve_entity_steps(
+            entity_name, entity_type, context_hint,
+            include_episodic, include_semantic, include_relationships, min_confidence
+        )
+        self._lookup_cache_put(key, result)
+        return result
+    
+    async def _resolve_entity_steps(
+        self,
+        entity_name: str,
+        entity_type: Optional[str],
+        context_hint: Optional[str],
+        include_episodic: bool,
+        include_semantic: bool,
+        include_relationships: bool,
+        min_confidence: float
+    ) -> Dict[str, Any]:
+        """Pipeline di resolve_entity (senza cache): graph, relazioni, memorie episodic/semantic"""
+        logger.info("[RESOLVE] Resolving entity: '%s' (type=%s)", entity_name, entity_type)
         
         candidates = []
-        db = self._get_db_manager()
         
         # ===== STEP 1: Entity Graph (entità persistenti) =====
-        logger.info(f"[RESOLVE] Step 1: Searching Entity Graph...")
-        
-        search_result = await self.search_entities(
-            query=entity_name,
-            entity_type=entity_type,
-            include_aliases=True,
-            min_confidence=min_confidence,
-            limit=5
-        )
+        logger.info("[RESOLVE] Step 1: Searching Entity Graph...")
         
-        if search_result["exact_match"]:
+        entity = await self._find_exact_entity(entity_name, entity_type, min_confidence)
+        search_result = None
+        if entity is None:
+            search_result = await self.search_entities(
+                query=entity_name,
+                entity_type=entity_type,
+                include_aliases=True,
+                min_confidence=min_confidence,
+                limit=5
+            )
             entity = search_result["exact_match"]
-            logger.info(f"[RESOLVE] EXACT MATCH in Entity Graph: {entity['entity_id']}")
+        
+        if entity:
+            logger.info("[RESOLVE] EXACT MATCH in Entity Graph: %s", entity['entity_id'])
             return {
                 "resolved": True,
                 "entity": entity,
@@ -1722,138 +3138,68 @@ class GraphService:
         
         # ===== STEP 2: Relationships (entità in relazioni) =====
         if include_relationships:
-            logger.info(f"[RESOLVE] Step 2: Searching Relationships...")
+            logger.info("[RESOLVE] Step 2: Searching Relationships...")
             
             try:
-                with db._get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    
-                    # Cerca nelle relazioni come source o target
-                    entity_name_lower = entity_name.lower()
-                    cursor.execute("""
-                        SELECT DISTINCT 
-                            CASE 
-                                WHEN LOWER(from_entity_id) LIKE ? THEN from_entity_id
-                                WHEN LOWER(to_entity_id) LIKE ? THEN to_entity_id
-                            END as found_entity_id,
-                            source_sentence,
-                            confidence
-                        FROM relationships
-                        WHERE status = 'active'
-                        AND (LOWER(from_entity_id) LIKE ? OR LOWER(to_entity_id) LIKE ?)
-                        ORDER BY confidence DESC
-                        LIMIT 5
-                    """, (
-                        f"%{entity_name_lower}%", f"%{entity_name_lower}%",
-                        f"%{entity_name_lower}%", f"%{entity_name_lower}%"
-                    ))
-                    
-                    rows = cursor.fetchall()
-                    
-                    for row in rows:
-                        if row["found_entity_id"]:
-                            # Recupera l'entità completa
-                            entity = await self.get_entity(row["found_entity_id"])
-                            if entity:
-                                # Check match esatto
-                                if entity["primary_name"].lower() == entity_name_lower:
-                                    logger.info(f"[RESOLVE] MATCH in Relationships: {entity['entity_id']}")
-                                    return {
-                                        "resolved": True,
-                                        "entity": entity,
-                                        "candidates": candidates,
-                                        "source": "relationships",
-                                        "confidence": row["confidence"],
-                                        "context": f"Menzionato in: '{row['source_sentence'][:80]}'" if row["source_sentence"] else None
-                                    }
-                                else:
-                                    # Candidato parziale
-                                    candidates.append({
-                                        "entity": entity,
-                                        "source": "relationships",
-                                        "confidence": row["confidence"] * 0.9,
-                                        "match_type": "partial",
-                                        "context": row["source_sentence"][:80] if row["source_sentence"] else None
-                                    })
+                entity_name_lower = entity_name.lower()
+                mentions = await self._run_db(
+                    self._sync_resolve_relationship_mentions, entity_name_lower
+                )
+                
+                for entity, rel_confidence, source_sentence in mentions:
+                    # Check match esatto
+                    if entity["primary_name"].lower() == entity_name_lower:
+                        logger.info("[RESOLVE] MATCH in Relationships: %s", entity['entity_id'])
+                        return {
+                            "resolved": True,
+                            "entity": entity,
+                            "candidates": candidates,
+                            "source": "relationships",
+                            "confidence": rel_confidence,
+                            "context": f"Menzionato in: '{source_sentence[:80]}'" if source_sentence else None
+                        }
+                    # Candidato parziale
+                    candidates.append({
+                        "entity": entity,
+                        "source": "relationships",
+                        "confidence": rel_confidence * 0.9,
+                        "match_type": "partial",
+                        "context": source_sentence[:80] if source_sentence else None
+                    })
                                     
             except Exception as e:
                 logger.warning(f"[RESOLVE] Relationship search failed: {e}")
         
-        # ===== STEP 3: Episodic Memory (conversazioni passate) =====
+        # ===== STEP 3-4: Episodic + Semantic Memory (query vettoriali in parallelo) =====
+        memory_types = []
         if include_episodic:
-            logger.info(f"[RESOLVE] Step 3: Searching Episodic Memory...")
-            
-            try:
-                # Cerca usando il vectorstore per similarity search
-                from app.core.vectordb_manager import get_vectordb_manager
-                vectordb = get_vectordb_manager()
-                
-                # Query semantica per trovare menzioni dell'entità
-                query_text = f"{entity_name}"
-                if context_hint:
-                    query_text = f"{entity_name} {context_hint}"
-                
-                results = vectordb.query_documents(
-                    query_text=query_text,
-                    n_results=5,
-                    where={"type": "episodic"} if entity_type else None
-                )
-                
-                if results and results.get("documents"):
-                    for i, doc in enumerate(results["documents"][0][:3]):
-                        distance = results["distances"][0][i] if results.get("distances") else 1.0
-                        similarity = 1 - distance  # Converti distanza in similarity
-                        
-                        if similarity >= min_confidence:
-                            # Check se il documento menziona l'entità
-                            if entity_name.lower() in doc.lower():
-                                logger.info(f"[RESOLVE] Found in Episodic: sim={similarity:.2f}")
-                                candidates.append({
-                                    "entity": None,  # Non è un'entità strutturata
-                                    "source": "episodic",
-                                    "confidence": similarity,
-                                    "match_type": "mention",
-                                    "context": doc[:150]
-                                })
-                                
-            except Exception as e:
-                logger.warning(f"[RESOLVE] Episodic search failed: {e}")
-        
-        # ===== STEP 4: Semantic Memory (documenti e conoscenze) =====
+            memory_types.append("episodic")
         if include_semantic:
-            logger.info(f"[RESOLVE] Step 4: Searching Semantic Memory...")
+            memory_types.append("semantic")
+        
+        if memory_types:
+            logger.info("[RESOLVE] Step 3-4: Searching %s memory...", " + ".join(memory_types))
             
-            try:
-                from app.core.vectordb_manager import get_vectordb_manager
-                vectordb = get_vectordb_manager()
-                
-                query_text = f"{entity_name}"
-                if context_hint:
-                    query_text = f"{entity_name} {context_hint}"
-                
-                results = vectordb.query_documents(
-                    query_text=query_text,
-                    n_results=5,
-                    where={"type": "semantic"} if entity_type else None
-                )
-                
-                if results and results.get("documents"):
-                    for i, doc in enumerate(results["documents"][0][:3]):
-                        distance = results["distances"][0][i] if results.get("distances") else 1.0
-                        similarity = 1 - distance
-                        
-                        if similarity >= min_confidence and entity_name.lower() in doc.lower():
-                            logger.info(f"[RESOLVE] Found in Semantic: sim={similarity:.2f}")
-                            candidates.append({
-                                "entity": None,
-                                "source": "semantic",
-                                "confidence": similarity,
-                                "match_type": "mention",
-                                "context": doc[:150]
-                            })
-                            
-            except Exception as e:
-                logger.warning(f"[RESOLVE] Semantic search failed: {e}")
+            query_text = f"{entity_name}"
+            if context_hint:
+                query_text = f"{entity_name} {context_hint}"
+            
+            memory_results = await asyncio.gather(
+                *[
+                    asyncio.to_thread(
+                        self._resolve_memory_mentions,
+                        memory_type, query_text, entity_name, entity_type, min_confidence
+                    )
+                    for memory_type in memory_types
+                ],
+                return_exceptions=True
+            )
+            
+            for memory_type, result in zip(memory_types, memory_results):
+                if isinstance(result, Exception):
+                    logger.warning(f"[RESOLVE] {memory_type.capitalize()} search failed: {result}")
+                else:
+                    candidates.extend(result)
         
         # ===== Valutazione finale =====
         
@@ -1863,7 +3209,7 @@ class GraphService:
         # Se abbiamo un candidato con alta confidence, consideralo risolto
         if candidates and candidates[0]["confidence"] >= 0.8:
             best = candidates[0]
-            logger.info(f"[RESOLVE] Best candidate accepted (conf={best['confidence']:.2f})")
+            logger.info("[RESOLVE] Best candidate accepted (conf=%.2f)", best['confidence'])
             
             return {
                 "resolved": True,
@@ -1875,7 +3221,7 @@ class GraphService:
             }
         
         # Nessun match definitivo
-        logger.info(f"[RESOLVE] Entity NOT RESOLVED: '{entity_name}' - {len(candidates)} candidates found")
+        logger.info("[RESOLVE] Entity NOT RESOLVED: '%s' - %s candidates found", entity_name, len(candidates))
         
         return {
             "resolved": False,
@@ -1887,6 +3233,161 @@ class GraphService:
             "suggested_action": "ask_user" if not candidates else "choose_from_candidates"
         }
     
+    def _sync_resolve_relationship_mentions(
+        self,
+        entity_name_lower: str
+    ) -> List[Tuple[Dict[str, Any], float, Optional[str]]]:
+        """
+        resolve_entity STEP 2 (eseguito nel pool DB): entità menzionate nelle relazioni attive.
+        
+        Returns:
+            [(entità, confidence della relazione, source_sentence), ...] per confidence decrescente
+        """
+        db = self._get_db_manager()
+        pattern = f"%{entity_name_lower}%"
+        
+        with db._get_thread_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(RESOLVE_RELATIONSHIP_MENTIONS_SQL, (pattern, pattern, pattern, pattern))
+            offset = len(ENTITY_COLUMNS)
+            return [
+                (self._row_to_entity_dict(row), row[offset + 1], row[offset])
+                for row in cursor.fetchall()
+            ]
+    
+    def _resolve_memory_mentions(
+        self,
+        memory_type: str,
+        query_text: str,
+        entity_name: str,
+        entity_type: Optional[str],
+        min_confidence: float
+    ) -> List[Dict[str, Any]]:
+        """
+        resolve_entity STEP 3/4 (in un thread): documenti episodic/semantic che menzionano l'entità.
+        
+        Returns:
+            Candidati "mention" (senza entità strutturata) con similarity >= min_confidence
+        """
+        # Cerca usando il vectorstore per similarity search
+        from app.core.vectordb_manager import get_vectordb_manager
+        vectordb = get_vectordb_manager()
+        
+        results = vectordb.query_documents(
+            query_text=query_text,
+            n_results=5,
+            where={"type": memory_type} if entity_type else None
+        )
+        
+        candidates = []
+        if results and results.get("documents"):
+            entity_name_lower = entity_name.lower()
+            for i, doc in enumerate(results["documents"][0][:3]):
+                distance = results["distances"][0][i] if results.get("distances") else 1.0
+                similarity = 1 - distance  # Converti distanza in similarity
+                
+                # Check se il documento menziona l'entità
+                if similarity >= min_confidence and entity_name_lower in doc.lower():
+                    logger.info("[RESOLVE] Found in %s: sim=%.2f", memory_type.capitalize(), similarity)
+                    candidates.append({
+                        "entity": None,  # Non è un'entità strutturata
+                        "source": memory_type,
+                        "confidence": similarity,
+                        "match_type": "mention",
+                        "context": doc[:150]
+                    })
+        return candidates
+    
+    def _context_similarities(
+        self, context_sentence: str, entities: List[Dict[str, Any]]
+    ) -> List[float]:
+        """
+        Similarità coseno tra context_sentence e la descrizione "nome (tipo)" di ogni entità.
+        
+        Stesso modello dell'EntityTypeNormalizer (vettori normalizzati), senza la sua
+        cache delle query. Le descrizioni dei candidati passano da una LRU dedicata
+        (DESCRIPTION_EMB_CACHE_MAX): al modello vanno solo la frase e le descrizioni
+        mancanti, in una sola chiamata.
+        """
+        if not entities:
+            return []
+        import numpy as np
+        
+        descriptions = [f"{entity['primary_name']} ({entity['type']})" for entity in entities]
+        cache = self._description_emb_cache
+        vectors: List[Any] = [None] * len(descriptions)
+        missing: List[int] = []
+        with self._description_emb_lock:
+            for i, description in enumerate(descriptions):
+                vec = cache.get(description)
+                if vec is None:
+                    missing.append(i)
+                else:
+                    cache.move_to_end(description)
+                    vectors[i] = vec
+        
+        computed = self.entity_type_normalizer.embed_texts(
+            [context_sentence] + [descriptions[i] for i in missing], cache=False
+        )
+        context_vec = computed[0]
+        with self._description_emb_lock:
+            for i, vec in zip(missing, computed[1:]):
+                vectors[i] = vec
+                if len(cache) >= DESCRIPTION_EMB_CACHE_MAX:
+                    cache.popitem(last=False)  # Evict least recently used
+                cache[descriptions[i]] = vec
+        
+        return (np.stack(vectors) @ context_vec).tolist()
+    
+    @staticmethod
+    def _disambiguate_related_rels(
+        cursor, candidate_ids: List[str], related_entities: List[str]
+    ) -> Dict[Tuple[str, str], List[Any]]:
+        """
+        Relazioni attive tra candidati e related_entities, in una sola query.
+        
+        Returns:
+            {(candidate_id, related_entity_id): [righe relazione]}
+        """
+        candidates = set(candidate_ids)
+        related = set(related_entities)
+        cursor.execute(
+            DISAMBIGUATE_RELATED_SQL, (_dumps_json(candidate_ids), _dumps_json(list(related)))
+        )
+        
+        grouped: Dict[Tuple[str, str], List[Any]] = {}
+        for row in cursor.fetchall():
+            from_id, to_id = row["from_entity_id"], row["to_entity_id"]
+            # Una relazione conta per ogni coppia (candidato, related) che collega
+            pairs = set()
+            if from_id in candidates and to_id in related:
+                pairs.add((from_id, to_id))
+            if to_id in candidates and from_id in related:
+                pairs.add((to_id, from_id))
+            for pair in pairs:
+                grouped.setdefault(pair, []).append(row)
+        return grouped
+    
+    @staticmethod
+    def _disambiguate_expected_rels(
+        cursor, candidate_ids: List[str], expected_relations: List[Dict[str, Any]]
+    ) -> Dict[Tuple[str, str], List[Any]]:
+        """
+        Relazioni attive dei candidati con i tipi attesi (target incluso), in una sola query.
+        
+        Returns:
+            {(candidate_id, relation_type minuscolo): [righe relazione + target]}
+        """
+        relation_types = {exp_rel.get("relation_type", "").lower() for exp_rel in expected_relations}
+        cursor.execute(
+            DISAMBIGUATE_EXPECTED_SQL, (_dumps_json(candidate_ids), _dumps_json(list(relation_types)))
+        )
+        
+        grouped: Dict[Tuple[str, str], List[Any]] = {}
+        for row in cursor.fetchall():
+            grouped.setdefault((row["candidate_id"], row["relation_key"]), []).append(row)
+        return grouped
+    
     # ==================== Entity Disambiguation ====================
     
     async def disambiguate_entity(
@@ -1938,32 +3439,50 @@ class GraphService:
                 "disambiguation_context": {...}
             }
         """
+        return await self._run_db(
+            self._sync_disambiguate_entity,
+            name, entity_type, related_entities, expected_relations, attributes,
+            context_sentence, min_confidence, max_results, ambiguity_threshold
+        )
+    
+    def _sync_disambiguate_entity(
+        self,
+        name: str,
+        entity_type: Optional[str] = None,
+        related_entities: Optional[List[str]] = None,
+        expected_relations: Optional[List[Dict[str, Any]]] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        context_sentence: Optional[str] = None,
+        min_confidence: float = 0.2,
+        max_results: int = 5,
+        ambiguity_threshold: float = 0.1
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di disambiguate_entity (eseguito nel pool DB)"""
         db = self._get_db_manager()
         name_lower = name.lower().strip()
         candidates = []
         
-        logger.info(f"[DISAMBIGUATE] Starting disambiguation for '{name}'")
-        logger.info(f"[DISAMBIGUATE]   Type filter: {entity_type}")
-        logger.info(f"[DISAMBIGUATE]   Related entities: {related_entities}")
-        logger.info(f"[DISAMBIGUATE]   Expected relations: {expected_relations}")
-        logger.info(f"[DISAMBIGUATE]   Attributes: {attributes}")
-        logger.info(f"[DISAMBIGUATE]   Context: '{context_sentence[:50]}...'" if context_sentence else "[DISAMBIGUATE]   Context: None")
+        logger.info("[DISAMBIGUATE] Starting disambiguation for '%s'", name)
+        logger.info("[DISAMBIGUATE]   Type filter: %s", entity_type)
+        logger.info("[DISAMBIGUATE]   Related entities: %s", related_entities)
+        logger.info("[DISAMBIGUATE]   Expected relations: %s", expected_relations)
+        logger.info("[DISAMBIGUATE]   Attributes: %s", attributes)
+        if context_sentence:
+            logger.info("[DISAMBIGUATE]   Context: '%.50s...'", context_sentence)
+        else:
+            logger.info("[DISAMBIGUATE]   Context: None")
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
                 # ===== STEP 1: Cerca candidati per nome =====
-                sql = """
-                    SELECT * FROM entities 
+                text_filter, params = self._entity_text_filter(conn, name_lower)
+                sql = f"""
+                    SELECT {ENTITY_SELECT} FROM entities 
                     WHERE status = 'active' 
-                    AND (
-                        LOWER(primary_name) LIKE ?
-                        OR LOWER(entity_id) LIKE ?
-                        OR LOWER(aliases_json) LIKE ?
-                    )
+                    AND {text_filter}
                 """
-                params = [f"%{name_lower}%", f"%{name_lower}%", f"%{name_lower}%"]
                 
                 if entity_type:
                     sql += " AND type = ?"
@@ -1974,11 +3493,28 @@ class GraphService:
                 cursor.execute(sql, params)
                 rows = cursor.fetchall()
                 
-                logger.info(f"[DISAMBIGUATE] Found {len(rows)} initial candidates by name")
+                logger.info("[DISAMBIGUATE] Found %s initial candidates by name", len(rows))
+                
+                entities = [self._row_to_entity_dict(row) for row in rows]
+                candidate_ids = [entity["entity_id"] for entity in entities]
+                
+                # Relazioni di tutti i candidati: una query per related_entities e una
+                # per expected_relations, raggruppate per candidato
+                related_rels = (
+                    self._disambiguate_related_rels(cursor, candidate_ids, related_entities)
+                    if related_entities and candidate_ids else {}
+                )
+                expected_rels = (
+                    self._disambiguate_expected_rels(cursor, candidate_ids, expected_relations)
+                    if expected_relations and candidate_ids else {}
+                )
                 
                 # ===== STEP 2: Calcola score per ogni candidato =====
-                for row in rows:
-                    entity = self._row_to_entity_dict(row)
+                # (entità, score, reasons, relazioni, incoerenze); il bonus di contesto
+                # viene calcolato dopo, in batch
+                scored = []
+                bonus_by_entity: Dict[str, float] = {}
+                for entity in entities:
                     entity_id = entity["entity_id"]
                     primary_name = entity["primary_name"].lower()
                     aliases = [a.lower() for a in entity.get("aliases", [])]
@@ -2010,17 +3546,7 @@ class GraphService:
                     # --- Score da related_entities (lista semplice di entity_id) ---
                     if related_entities:
                         for rel_entity_id in related_entities:
-                            cursor.execute("""
-                                SELECT rel_id, relation_type, valence, to_entity_id, from_entity_id
-                                FROM relationships
-                                WHERE status = 'active'
-                                AND (
-                                    (from_entity_id = ? AND to_entity_id = ?)
-                                    OR (from_entity_id = ? AND to_entity_id = ?)
-                                )
-                            """, (entity_id, rel_entity_id, rel_entity_id, entity_id))
-                            
-                            rel_rows = cursor.fetchall()
+                            rel_rows = related_rels.get((entity_id, rel_entity_id))
                             if rel_rows:
                                 for rel_row in rel_rows:
                                     score += 0.2
@@ -2039,97 +3565,63 @@ class GraphService:
                             expected_target_name = exp_rel.get("target_name", "").lower() if exp_rel.get("target_name") else None
                             expected_target_id = exp_rel.get("target_entity_id")
                             
-                            # Cerca relazioni di questo tipo per questa entita
-                            cursor.execute("""
-                                SELECT r.rel_id, r.relation_type, r.valence, r.to_entity_id, r.from_entity_id,
-                                       e.primary_name as target_name, e.entity_id as target_entity_id
-                                FROM relationships r
-                                JOIN entities e ON (
-                                    CASE 
-                                        WHEN r.from_entity_id = ? THEN r.to_entity_id = e.entity_id
-                                        ELSE r.from_entity_id = e.entity_id
-                                    END
-                                )
-                                WHERE r.status = 'active'
-                                AND (r.from_entity_id = ? OR r.to_entity_id = ?)
-                                AND LOWER(r.relation_type) = ?
-                            """, (entity_id, entity_id, entity_id, rel_type))
-                            
-                            found_rels = cursor.fetchall()
+                            # Relazioni di questo tipo per questa entita (target già letto)
+                            found_rels = expected_rels.get((entity_id, rel_type))
                             
                             if found_rels:
                                 # Relazione di questo tipo esiste
                                 found_match = False
                                 for found_rel in found_rels:
-                                    # Determina il target effettivo
-                                    if found_rel["from_entity_id"] == entity_id:
-                                        actual_target_id = found_rel["to_entity_id"]
-                                    else:
-                                        actual_target_id = found_rel["from_entity_id"]
-                                    
-                                    # Recupera info sul target
-                                    cursor.execute("""
-                                        SELECT entity_id, primary_name, aliases_json 
-                                        FROM entities WHERE entity_id = ?
-                                    """, (actual_target_id,))
-                                    target_row = cursor.fetchone()
+                                    actual_target_id = found_rel["target_entity_id"]
+                                    actual_target_name = found_rel["target_name"].lower()
+                                    target_aliases = []
+                                    if found_rel["target_aliases_json"]:
+                                        try:
+                                            target_aliases = [a.lower() for a in _loads_json(found_rel["target_aliases_json"])]
+                                        except:
+                                            pass
                                     
-                                    if target_row:
-                                        actual_target_name = target_row["primary_name"].lower()
-                                        target_aliases = []
-                                        if target_row["aliases_json"]:
-                                            try:
-                                                target_aliases = [a.lower() for a in json.loads(target_row["aliases_json"])]
-                                            except:
-                                                pass
-                                        
-                                        # Verifica match
-                                        target_matches = False
-                                        if expected_target_id and actual_target_id == expected_target_id:
+                                    # Verifica match
+                                    target_matches = False
+                                    if expected_target_id and actual_target_id == expected_target_id:
+                                        target_matches = True
+                                    elif expected_target_name:
+                                        if expected_target_name == actual_target_name:
+                                            target_matches = True
+                                        elif expected_target_name in actual_target_name or actual_target_name in expected_target_name:
+                                            target_matches = True
+                                        elif expected_target_name in target_aliases:
                                             target_matches = True
-                                        elif expected_target_name:
-                                            if expected_target_name == actual_target_name:
-                                                target_matches = True
-                                            elif expected_target_name in actual_target_name or actual_target_name in expected_target_name:
-                                                target_matches = True
-                                            elif expected_target_name in target_aliases:
-                                                target_matches = True
-                                        
-                                        if target_matches:
-                                            # Match confermato!
-                                            found_match = True
-                                            score += 0.25
-                                            match_reasons.append(f"expected_relation_confirmed:{rel_type}={target_row['primary_name']}")
-                                            matching_relations.append({
-                                                "rel_id": found_rel["rel_id"],
-                                                "relation_type": rel_type,
-                                                "valence": found_rel["valence"],
-                                                "target": actual_target_id,
-                                                "verified": True
-                                            })
-                                            break
-                                
-                                # Se relazione esiste ma target diverso -> INCOERENZA
-                                if not found_match and expected_target_name:
-                                    # Prendi il primo target trovato per segnalare l'incoerenza
-                                    cursor.execute("""
-                                        SELECT entity_id, primary_name FROM entities 
-                                        WHERE entity_id = ?
-                                    """, (found_rels[0]["to_entity_id"] if found_rels[0]["from_entity_id"] == entity_id else found_rels[0]["from_entity_id"],))
-                                    actual_target_row = cursor.fetchone()
                                     
-                                    if actual_target_row:
-                                        inconsistencies.append({
+                                    if target_matches:
+                                        # Match confermato!
+                                        found_match = True
+                                        score += 0.25
+                                        match_reasons.append(f"expected_relation_confirmed:{rel_type}={found_rel['target_name']}")
+                                        matching_relations.append({
+                                            "rel_id": found_rel["rel_id"],
                                             "relation_type": rel_type,
-                                            "expected_target": exp_rel.get("target_name", ""),
-                                            "found_target": actual_target_row["primary_name"],
-                                            "found_entity_id": actual_target_row["entity_id"],
-                                            "message": f"Relazione '{rel_type}' esiste ma con target diverso: atteso '{exp_rel.get('target_name')}', trovato '{actual_target_row['primary_name']}'"
+                                            "valence": found_rel["valence"],
+                                            "target": actual_target_id,
+                                            "verified": True
                                         })
-                                        logger.warning(f"[DISAMBIGUATE] INCONSISTENCY for {entity_id}: {rel_type} -> expected '{exp_rel.get('target_name')}', found '{actual_target_row['primary_name']}'")
-                                        # Piccolo bonus perche comunque la relazione esiste
-                                        score += 0.1
-                                        match_reasons.append(f"expected_relation_exists_different_target:{rel_type}")
+                                        break
+                                
+                                # Se relazione esiste ma target diverso -> INCOERENZA
+                                if not found_match and expected_target_name:
+                                    # Il primo target trovato segnala l'incoerenza
+                                    found_target = found_rels[0]["target_name"]
+                                    inconsistencies.append({
+                                        "relation_type": rel_type,
+                                        "expected_target": exp_rel.get("target_name", ""),
+                                        "found_target": found_target,
+                                        "found_entity_id": found_rels[0]["target_entity_id"],
+                                        "message": f"Relazione '{rel_type}' esiste ma con target diverso: atteso '{exp_rel.get('target_name')}', trovato '{found_target}'"
+                                    })
+                                    logger.warning(f"[DISAMBIGUATE] INCONSISTENCY for {entity_id}: {rel_type} -> expected '{exp_rel.get('target_name')}', found '{found_target}'")
+                                    # Piccolo bonus perche comunque la relazione esiste
+                                    score += 0.1
+                                    match_reasons.append(f"expected_relation_exists_different_target:{rel_type}")
                     
                     # --- Score da attributi ---
                     if attributes:
@@ -2143,27 +3635,27 @@ class GraphService:
                                     score += 0.08
                                     match_reasons.append(f"attribute_partial:{attr_key}")
                     
-                    # --- Score da context_sentence (semantic similarity) ---
-                    if context_sentence and score > 0:
+                    scored.append((entity, score, match_reasons, matching_relations, inconsistencies))
+                
+                # --- Score da context_sentence (semantic similarity) ---
+                # Un solo batch di embedding per tutti i candidati con score > 0
+                if context_sentence:
+                    contextual = [item for item in scored if item[1] > 0]
+                    if contextual:
                         try:
-                            from chromadb.utils import embedding_functions
-                            emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-                                model_name='paraphrase-multilingual-MiniLM-L12-v2',
-                                normalize_embeddings=True
+                            similarities = self._context_similarities(
+                                context_sentence, [item[0] for item in contextual]
                             )
-                            
-                            entity_desc = f"{entity['primary_name']} ({entity['type']})"
-                            emb_context = emb_fn([context_sentence])[0]
-                            emb_entity = emb_fn([entity_desc])[0]
-                            
-                            similarity = sum(a * b for a, b in zip(emb_context, emb_entity))
-                            
-                            if similarity > 0.5:
-                                bonus = min(0.15, (similarity - 0.5) * 0.3)
-                                score += bonus
-                                match_reasons.append(f"context_similarity:{similarity:.2f}")
+                            for (entity, score, match_reasons, _, _), similarity in zip(contextual, similarities):
+                                if similarity > 0.5:
+                                    bonus = min(0.15, (similarity - 0.5) * 0.3)
+                                    match_reasons.append(f"context_similarity:{similarity:.2f}")
+                                    bonus_by_entity[entity["entity_id"]] = bonus
                         except Exception as e:
                             logger.warning(f"[DISAMBIGUATE] Context similarity failed: {e}")
+                
+                for entity, score, match_reasons, matching_relations, inconsistencies in scored:
+                    score += bonus_by_entity.get(entity["entity_id"], 0.0)
                     
                     # Normalizza score
                     normalized_score = min(1.0, score / 2.0)
@@ -2193,7 +3685,7 @@ class GraphService:
                     diff = candidates[0]["confidence"] - candidates[1]["confidence"]
                     if diff < ambiguity_threshold:
                         ambiguous = True
-                        logger.info(f"[DISAMBIGUATE] AMBIGUOUS: top 2 candidates diff={diff:.3f} < threshold={ambiguity_threshold}")
+                        logger.info("[DISAMBIGUATE] AMBIGUOUS: top 2 candidates diff=%.3f < threshold=%s", diff, ambiguity_threshold)
                 
                 if candidates and not ambiguous:
                     best_match = candidates[0]
@@ -2205,9 +3697,9 @@ class GraphService:
                 for c in candidates:
                     c.pop("_raw_score", None)
                 
-                logger.info(f"[DISAMBIGUATE] Result: {len(candidates)} candidates, ambiguous={ambiguous}, has_inconsistencies={has_inconsistencies}")
+                logger.info("[DISAMBIGUATE] Result: %s candidates, ambiguous=%s, has_inconsistencies=%s", len(candidates), ambiguous, has_inconsistencies)
                 if best_match:
-                    logger.info(f"[DISAMBIGUATE] Best match: {best_match['entity']['entity_id']} (conf={best_match['confidence']})")
+                    logger.info("[DISAMBIGUATE] Best match: %s (conf=%s)", best_match['entity']['entity_id'], best_match['confidence'])
                 
                 return {
                     "query_name": name,
@@ -2254,7 +3746,7 @@ class GraphService:
         Returns:
             {"results": [...], "count": N, "query": str}
         """
-        logger.info(f"🔎 [TOP-K] Episodic search: '{query[:50]}' (k={k})")
+        logger.info("🔎 [TOP-K] Episodic search: '%s' (k=%s)", query[:50], k)
         
         try:
             from app.core.vectordb_manager import get_vectordb_manager
@@ -2290,7 +3782,7 @@ class GraphService:
             items.sort(key=lambda x: x["similarity"], reverse=True)
             items = items[:k]
             
-            logger.info(f"🔎 [TOP-K] Episodic: found {len(items)} results")
+            logger.info("🔎 [TOP-K] Episodic: found %s results", len(items))
             
             return {
                 "results": items,
@@ -2326,7 +3818,7 @@ class GraphService:
         Returns:
             {"results": [...], "count": N, "query": str}
         """
-        logger.info(f"🔎 [TOP-K] Semantic search: '{query[:50]}' (k={k})")
+        logger.info("🔎 [TOP-K] Semantic search: '%s' (k=%s)", query[:50], k)
         
         try:
             from app.core.vectordb_manager import get_vectordb_manager
@@ -2371,7 +3863,7 @@ class GraphService:
             items.sort(key=lambda x: x["similarity"], reverse=True)
             items = items[:k]
             
-            logger.info(f"🔎 [TOP-K] Semantic: found {len(items)} results")
+            logger.info("🔎 [TOP-K] Semantic: found %s results", len(items))
             
             return {
                 "results": items,
@@ -2408,18 +3900,34 @@ class GraphService:
         Returns:
             {"results": [...], "count": N, "query": str}
         """
-        logger.info(f"🔎 [TOP-K] Entities search: '{query[:50]}' (k={k})")
+        return await self._run_db(
+            self._sync_topk_entities,
+            query, k, user_id, entity_type, include_aliases, min_similarity
+        )
+    
+    def _sync_topk_entities(
+        self,
+        query: str,
+        k: int = 5,
+        user_id: str = "default",
+        entity_type: Optional[str] = None,
+        include_aliases: bool = True,
+        min_similarity: float = 0.0
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di topk_entities (eseguito nel pool DB)"""
+        logger.info("🔎 [TOP-K] Entities search: '%s' (k=%s)", query[:50], k)
         
         db = self._get_db_manager()
         query_lower = query.lower().strip()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Query testuale con scoring basato su match quality
-                sql = """
-                    SELECT *,
+                text_filter, text_params = self._entity_text_filter(conn, query_lower, include_aliases)
+                sql = f"""
+                    SELECT {ENTITY_SELECT},
                         CASE 
                             WHEN LOWER(primary_name) = ? THEN 1.0
                             WHEN LOWER(primary_name) LIKE ? THEN 0.9
@@ -2429,25 +3937,16 @@ class GraphService:
                         END as match_score
                     FROM entities 
                     WHERE status = 'active'
-                    AND (
-                        LOWER(primary_name) LIKE ?
-                        OR LOWER(entity_id) LIKE ?
+                    AND {text_filter}
                 """
                 params = [
                     query_lower,
                     f"{query_lower}%",
                     f"%{query_lower}%",
                     f"%{query_lower}%",
-                    f"%{query_lower}%",
-                    f"%{query_lower}%"
+                    *text_params
                 ]
                 
-                if include_aliases:
-                    sql += " OR LOWER(aliases_json) LIKE ?"
-                    params.append(f"%{query_lower}%")
-                
-                sql += ")"
-                
                 if entity_type:
                     sql += " AND type = ?"
                     params.append(entity_type)
@@ -2475,7 +3974,7 @@ class GraphService:
                 
                 items = items[:k]
                 
-                logger.info(f"🔎 [TOP-K] Entities: found {len(items)} results")
+                logger.info("🔎 [TOP-K] Entities: found %s results", len(items))
                 
                 return {
                     "results": items,
@@ -2514,18 +4013,34 @@ class GraphService:
         Returns:
             {"results": [...], "count": N, "query": str}
         """
-        logger.info(f"🔎 [TOP-K] Relationships search: '{query[:50]}' (k={k})")
+        return await self._run_db(
+            self._sync_topk_relationships,
+            query, k, user_id, relation_type, valence, entity_id, min_similarity
+        )
+    
+    def _sync_topk_relationships(
+        self,
+        query: str,
+        k: int = 5,
+        user_id: str = "default",
+        relation_type: Optional[str] = None,
+        valence: Optional[str] = None,
+        entity_id: Optional[str] = None,
+        min_similarity: float = 0.0
+    ) -> Dict[str, Any]:
+        """Corpo sincrono di topk_relationships (eseguito nel pool DB)"""
+        logger.info("🔎 [TOP-K] Relationships search: '%s' (k=%s)", query[:50], k)
         
         db = self._get_db_manager()
         query_lower = query.lower().strip()
         
         try:
-            with db._get_db_connection() as conn:
+            with db._get_thread_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Query con scoring basato su match nella source_sentence
-                sql = """
-                    SELECT r.*,
+                sql = f"""
+                    SELECT {_relationship_columns(alias="r")},
                         CASE 
                             WHEN LOWER(source_sentence) LIKE ? THEN 0.9
                             WHEN LOWER(original_predicate) LIKE ? THEN 0.8
@@ -2583,7 +4098,7 @@ class GraphService:
                 
                 items = items[:k]
                 
-                logger.info(f"🔎 [TOP-K] Relationships: found {len(items)} results")
+                logger.info("🔎 [TOP-K] Relationships: found %s results", len(items))
                 
                 return {
                     "results": items,
@@ -2630,9 +4145,7 @@ class GraphService:
                 "query": str
             }
         """
-        logger.info(f"🔎 [TOP-K] Unified search: '{query[:50]}' (k={k_per_memory})")
-        
-        import asyncio
+        logger.info("🔎 [TOP-K] Unified search: '%s' (k=%s)", query[:50], k_per_memory)
         
         results = {
             "query": query,
@@ -2671,7 +4184,7 @@ class GraphService:
         
         results["total_results"] = total_results
         
-        logger.info(f"🔎 [TOP-K] Unified: found {total_results} total results across {len(task_names)} memories")
+        logger.info("🔎 [TOP-K] Unified: found %s total results across %s memories", total_results, len(task_names))
         
         return results
 
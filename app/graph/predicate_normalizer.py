@@ -184,6 +184,69 @@ class PredicateNormalizer:
         self._cache[predicate_clean] = result
         return result
     
+    def normalize_batch(self, predicates: List[str]) -> List[NormalizationResult]:
+        """
+        Normalizza una lista di predicati (stesso risultato di normalize() per ciascuno).
+        
+        Ogni predicato distinto viene normalizzato una sola volta; quelli che arrivano
+        al fallback embedding vengono codificati con un'unica chiamata al modello
+        e confrontati con le categorie in un solo prodotto matriciale.
+        
+        Args:
+            predicates: Predicati raw da Thalamus
+            
+        Returns:
+            NormalizationResult nello stesso ordine dell'input
+        """
+        cleaned = [p.lower().strip().replace(" ", "_") for p in predicates]
+        
+        # Predicato pulito -> primo predicato originale (per il metadata del default)
+        pending: Dict[str, str] = {}
+        for predicate, predicate_clean in zip(predicates, cleaned):
+            if predicate_clean in self._cache:
+                self.stats["cache_hits"] += 1
+            elif predicate_clean in pending:
+                self.stats["cache_hits"] += 1
+            else:
+                pending[predicate_clean] = predicate
+        
+        # 1-2. Direct lookup / partial match (per stringa, sono lookup e regex)
+        unresolved: List[str] = []
+        for predicate_clean in pending:
+            result = self._try_direct_lookup(predicate_clean)
+            if result:
+                self.stats["direct_hits"] += 1
+                self._cache[predicate_clean] = result
+                continue
+            result = self._try_partial_match(predicate_clean)
+            if result:
+                self.stats["partial_hits"] += 1
+                self._cache[predicate_clean] = result
+                continue
+            unresolved.append(predicate_clean)
+        
+        # 3. Embedding similarity in batch
+        if unresolved and self.use_embeddings:
+            for predicate_clean, result in zip(unresolved, self._try_embedding_similarity_batch(unresolved)):
+                if result:
+                    self.stats["embedding_hits"] += 1
+                    self._cache[predicate_clean] = result
+        
+        # 4. Default fallback
+        for predicate_clean in unresolved:
+            if predicate_clean not in self._cache:
+                self.stats["defaults"] += 1
+                self._cache[predicate_clean] = NormalizationResult(
+                    relation_type=RelationCategory.UNKNOWN.value,
+                    valence="neutral",
+                    intensity=0.5,
+                    metadata={"original": pending[predicate_clean]},
+                    method="default",
+                    confidence=0.3
+                )
+        
+        return [self._cache[predicate_clean] for predicate_clean in cleaned]
+    
     def _try_direct_lookup(self, predicate: str) -> Optional[NormalizationResult]:
         """Prova lookup diretto nel mapping"""
         if predicate in PREDICATE_TO_CATEGORY_HINTS:
@@ -396,31 +459,69 @@ class PredicateNormalizer:
                     best_similarity = similarity
                     best_category = category
             
-            # Se similarity è troppo bassa, ritorna None
-            if best_similarity < 0.3:
-                return None
+            return self._embedding_result(predicate, best_category, best_similarity)
             
-            # Determina valence basato su keyword
-            valence = "neutral"
-            if best_category == "sentiment":
-                # Cerca indicatori di positività/negatività
-                if any(neg in predicate for neg in ["non", "odio", "detest", "disprezz"]):
-                    valence = "negative"
-                else:
-                    valence = "positive"  # Default per sentiment
+        except Exception as e:
+            logger.warning(f"Embedding similarity failed for '{predicate}': {e}")
+            return None
+    
+    def _try_embedding_similarity_batch(self, predicates: List[str]) -> List[Optional[NormalizationResult]]:
+        """Come _try_embedding_similarity, con un solo encode e un solo prodotto matriciale"""
+        ef = self._get_embedding_function()
+        if ef is None:
+            return [None] * len(predicates)
+        
+        category_embeddings = self._compute_category_embeddings()
+        if not category_embeddings:
+            return [None] * len(predicates)
+        
+        try:
+            import numpy as np
+            categories = list(category_embeddings)
+            C = np.asarray([category_embeddings[c] for c in categories], dtype=np.float64)
+            P = np.asarray(ef([p.replace("_", " ") for p in predicates]), dtype=np.float64)
             
-            return NormalizationResult(
-                relation_type=best_category,
-                valence=valence,
-                intensity=min(0.9, best_similarity),  # Cap a 0.9 per embedding match
-                metadata={"similarity": round(best_similarity, 3)},
-                method="embedding",
-                confidence=round(best_similarity * 0.8, 2)  # Confidence più bassa per embedding
-            )
+            # Cosine similarity (predicati x categorie); norma nulla → similarity 0
+            norms = np.outer(np.linalg.norm(P, axis=1), np.linalg.norm(C, axis=1))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sims = np.where(norms > 0, (P @ C.T) / norms, 0.0)
+            
+            # argmax: a parità vince la prima categoria, come nel loop con ">"
+            best = sims.argmax(axis=1)
+            return [
+                self._embedding_result(predicate, categories[j], float(sims[i, j]))
+                for i, (predicate, j) in enumerate(zip(predicates, best))
+            ]
             
         except Exception as e:
-            logger.warning(f"Embedding similarity failed for '{predicate}': {e}")
+            logger.warning(f"Batch embedding similarity failed for {len(predicates)} predicates: {e}")
+            return [None] * len(predicates)
+    
+    def _embedding_result(
+        self, predicate: str, best_category: Optional[str], best_similarity: float
+    ) -> Optional[NormalizationResult]:
+        """Costruisce il risultato embedding dalla categoria più simile (None se troppo bassa)"""
+        # Se similarity è troppo bassa, ritorna None
+        if best_similarity < 0.3:
             return None
+        
+        # Determina valence basato su keyword
+        valence = "neutral"
+        if best_category == "sentiment":
+            # Cerca indicatori di positività/negatività
+            if any(neg in predicate for neg in ["non", "odio", "detest", "disprezz"]):
+                valence = "negative"
+            else:
+                valence = "positive"  # Default per sentiment
+        
+        return NormalizationResult(
+            relation_type=best_category,
+            valence=valence,
+            intensity=min(0.9, best_similarity),  # Cap a 0.9 per embedding match
+            metadata={"similarity": round(best_similarity, 3)},
+            method="embedding",
+            confidence=round(best_similarity * 0.8, 2)  # Confidence più bassa per embedding
+        )
     
     def get_stats(self) -> Dict[str, int]:
         """Ritorna statistiche di normalizzazione"""
@@ -7,6 +7,7 @@ import os
 import json
 import sqlite3
 import logging
+import threading
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
@@ -14,6 +15,48 @@ from pathlib import Path
 # Configurazione logger
 logger = logging.getLogger(__name__)
 
+# Attesa massima (secondi) su un lock di scrittura prima di "database is locked"
+DB_BUSY_TIMEOUT = 5.0
+
+# Statement preparati tenuti in cache per connessione (default sqlite3: 128).
+# Con le connessioni persistenti per thread i template più usati non vengono
+# ri-preparati; i testi SQL variabili (IN con N placeholder) non li espellono
+DB_CACHED_STATEMENTS = 256
+
+
+def backup_sqlite_file(source_path: str, dest_path: str) -> None:
+    """
+    Copia consistente di un database SQLite con l'API di backup (sqlite3.Connection.backup).
+    
+    A differenza della copia del file, include i commit ancora nel -wal e non produce
+    copie strappate con writer o lettori attivi. Solleva sqlite3.Error in caso di errore.
+    """
+    src = sqlite3.connect(source_path, timeout=DB_BUSY_TIMEOUT)
+    try:
+        dst = sqlite3.connect(dest_path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+# PRAGMA per-connessione (journal_mode=WAL è persistente nel file, vedi _init_database)
+CONNECTION_PRAGMAS = (
+    # Abilita foreign keys per supportare ON DELETE CASCADE
+    "PRAGMA foreign_keys = ON",
+    # In WAL mode NORMAL è sicuro e evita un fsync per ogni commit
+    "PRAGMA synchronous = NORMAL",
+    # Tabelle/indici temporanei (ORDER BY, GROUP BY, DISTINCT) in RAM invece che su file
+    "PRAGMA temp_store = MEMORY",
+    # Page cache da 64 MB e letture via mmap fino a 256 MB
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    # Checkpoint automatico del WAL ogni ~1000 pagine (esplicito: è il limite
+    # oltre il quale il file -wal smette di crescere tra un checkpoint e l'altro)
+    "PRAGMA wal_autocheckpoint = 1000",
+)
+
 class SQLiteMetadataManager:
     """
     Gestore metadati documenti in database SQLite.
@@ -32,6 +75,9 @@ class SQLiteMetadataManager:
         self.db_file = os.path.join(self.data_dir, "documents.db")
         self.json_file = os.path.join(self.data_dir, "documents.json")
         
+        # Connessioni persistenti per thread (vedi _get_thread_connection)
+        self._local = threading.local()
+        
         # Assicurarsi che le directory esistano
         os.makedirs(self.data_dir, exist_ok=True)
         
@@ -49,10 +95,42 @@ class SQLiteMetadataManager:
         Returns:
             Connessione SQLite.
         """
-        conn = sqlite3.connect(self.db_file)
+        # timeout → sqlite3_busy_timeout: con WAL lo scrittore concorrente attende
+        # invece di fallire subito con "database is locked"
+        conn = sqlite3.connect(
+            self.db_file, timeout=DB_BUSY_TIMEOUT, cached_statements=DB_CACHED_STATEMENTS
+        )
         conn.row_factory = sqlite3.Row  # Per ottenere risultati come dizionari
-        # Abilita foreign keys per supportare ON DELETE CASCADE
-        conn.execute("PRAGMA foreign_keys = ON")
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _get_thread_connection(self) -> sqlite3.Connection:
+        """
+        Ottiene la connessione persistente del thread corrente, aperta (con i PRAGMA)
+        una sola volta invece che a ogni operazione.
+        
+        Va usata come context manager (commit/rollback a fine blocco) e NON va
+        chiusa. Viene riaperta se il file del database è stato sostituito
+        (reset/restore) dopo l'apertura.
+        
+        Returns:
+            Connessione SQLite del thread corrente.
+        """
+        try:
+            inode = os.stat(self.db_file).st_ino
+        except FileNotFoundError:
+            inode = None
+        
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and inode is not None and inode == self._local.inode:
+            return conn
+        
+        if conn is not None:
+            conn.close()
+        conn = self._get_db_connection()
+        self._local.conn = conn
+        self._local.inode = os.stat(self.db_file).st_ino
         return conn
     
     def _init_database(self) -> None:
@@ -63,6 +141,11 @@ class SQLiteMetadataManager:
             conn = self._get_db_connection()
             cursor = conn.cursor()
             
+            # WAL: lettori non bloccati dallo scrittore, commit più economici (persistente nel file).
+            # Accanto a documents.db compaiono documents.db-wal e documents.db-shm: i commit
+            # recenti stanno nel -wal finché non c'è un checkpoint (vedi backup_database)
+            cursor.execute("PRAGMA journal_mode = WAL")
+            
             # Tabella principale dei documenti
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS documents (
@@ -825,3 +908,19 @@ class SQLiteMetadataManager:
         except Exception as e:
             logger.error(f"Errore nell'esecuzione di VACUUM sul database: {str(e)}")
             return False
+    
+    def backup_database(self, dest_path: str) -> bool:
+        """
+        Crea un backup consistente del database in dest_path (vedi backup_sqlite_file).
+        Da preferire alla copia di documents.db: i commit recenti stanno nel -wal.
+        
+        Returns:
+            True se l'operazione è avvenuta con successo, False altrimenti.
+        """
+        try:
+            backup_sqlite_file(self.db_file, dest_path)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Errore nel backup del database: {str(e)}")
+            return False
@@ -0,0 +1,304 @@
+"""
+Test delle API bulk del GraphService (create_relationships_from_raw_bulk,
+reinforce_relationships_bulk, create_entities_bulk).
+
+Verificano il contratto dichiarato dalle docstring:
+- stesso stato salvato di N chiamate singole applicate in ordine
+  (anche con elementi ripetuti nello stesso batch)
+- un'unica transazione: un elemento che fallisce annulla l'intero batch
+
+Non richiedono il servizio in esecuzione né il modello di embedding: database
+SQLite temporaneo e normalizzatore dei predicati deterministico.
+
+Esecuzione:
+    python -m pytest tests/test_graph_bulk.py
+    python -m unittest tests.test_graph_bulk
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.graph.graph_service import GraphService
+from app.utils.sqlite_metadata_manager import SQLiteMetadataManager
+
+
+# Tabelle del grafo (di proprietà del servizio Mind): solo le colonne usate dal
+# GraphService; le colonne derivate le aggiunge ensure_graph_schema
+GRAPH_TABLES = """
+CREATE TABLE entities (
+    entity_id TEXT PRIMARY KEY, type TEXT, primary_name TEXT, aliases_json TEXT,
+    identifiers_json TEXT, attributes_json TEXT, salience REAL, confidence REAL,
+    status TEXT, tags_json TEXT, created_at TEXT, updated_at TEXT
+);
+CREATE TABLE relationships (
+    rel_id TEXT PRIMARY KEY, from_entity_id TEXT, to_entity_id TEXT, type TEXT,
+    relation_type TEXT, original_predicate TEXT, source_sentence TEXT, metadata_json TEXT,
+    strength REAL, confidence REAL, valence TEXT, intensity REAL, evidence_count INTEGER,
+    trust REAL DEFAULT 0.5, status TEXT, created_at TEXT, updated_at TEXT, last_reinforced TEXT
+);
+CREATE TABLE relationship_events (
+    event_id TEXT PRIMARY KEY, rel_id TEXT, predicate TEXT, valence TEXT, intensity REAL,
+    source_sentence TEXT, timestamp TEXT, normalization_method TEXT,
+    normalization_confidence REAL, metadata_json TEXT
+);
+"""
+
+# Predicato -> (relation_type, valence, intensity)
+PREDICATES = {
+    "ama": ("sentiment", "positive", 0.9),
+    "odia": ("sentiment", "negative", 0.8),
+    "lavora_per": ("employment", "neutral", 0.6),
+    "vive_a": ("location", "neutral", 0.5),
+}
+
+
+class FakePredicateNormalizer:
+    """Normalizzatore deterministico (nessun modello)"""
+
+    def normalize(self, predicate):
+        relation_type, valence, intensity = PREDICATES[predicate]
+        return SimpleNamespace(
+            relation_type=relation_type, valence=valence, intensity=intensity,
+            method="direct", confidence=0.9, metadata={}
+        )
+
+    def normalize_batch(self, predicates):
+        return [self.normalize(predicate) for predicate in predicates]
+
+    def get_stats(self):
+        return {}
+
+
+# Chiavi dei risultati che dipendono da ID casuali o dall'orologio
+VOLATILE_KEYS = ("id", "created_at", "updated_at", "last_reinforced")
+
+
+def _stable(result):
+    """Risultato senza ID casuali e timestamp (last_reinforced: solo presente/assente)"""
+    if result is None:
+        return None
+    stable = {key: value for key, value in result.items() if key not in VOLATILE_KEYS}
+    stable["reinforced"] = result.get("last_reinforced") is not None
+    return stable
+
+
+class GraphBulkTestCase(unittest.TestCase):
+    """Ogni test confronta due database nuovi: chiamate singole vs chiamata bulk"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.addCleanup(self._tmp.cleanup)
+
+    def make_service(self, name):
+        data_dir = os.path.join(self._tmp.name, name)
+        os.makedirs(data_dir)
+        manager = SQLiteMetadataManager(data_dir=data_dir, migrate_from_json=False)
+        conn = sqlite3.connect(manager.db_file)
+        conn.executescript(GRAPH_TABLES)
+        conn.close()
+        service = GraphService(db_manager=manager)
+        service.normalizer = FakePredicateNormalizer()
+        return service, manager.db_file
+
+    @staticmethod
+    def run_async(coro):
+        return asyncio.run(coro)
+
+    @staticmethod
+    def snapshot(db_file):
+        """Stato salvato confrontabile tra due database (senza ID casuali né timestamp)"""
+        conn = sqlite3.connect(db_file)
+        try:
+            entities = conn.execute("""
+                SELECT entity_id, type, primary_name, aliases_json, identifiers_json,
+                       attributes_json, salience, confidence, status, tags_json
+                FROM entities ORDER BY entity_id
+            """).fetchall()
+            relationships = conn.execute("""
+                SELECT from_entity_id, to_entity_id, relation_type, type, original_predicate,
+                       source_sentence, metadata_json, ROUND(strength, 6), confidence, valence,
+                       intensity, evidence_count, trust, status, last_reinforced IS NOT NULL
+                FROM relationships ORDER BY from_entity_id, to_entity_id, relation_type, status
+            """).fetchall()
+            events = conn.execute("""
+                SELECT r.from_entity_id, r.to_entity_id, r.relation_type, e.predicate,
+                       e.valence, e.intensity, e.source_sentence, e.normalization_method
+                FROM relationship_events e JOIN relationships r ON r.rel_id = e.rel_id
+                ORDER BY e.rowid
+            """).fetchall()
+        finally:
+            conn.close()
+        return {"entities": entities, "relationships": relationships, "events": events}
+
+    @staticmethod
+    def fail_on(db_file, table, column, value):
+        """Trigger che fa fallire l'INSERT/UPDATE di una riga (errore a metà batch)"""
+        conn = sqlite3.connect(db_file)
+        for event in ("INSERT", "UPDATE"):
+            conn.execute(
+                f"CREATE TRIGGER fail_{table}_{event.lower()} BEFORE {event} ON {table} "
+                f"WHEN NEW.{column} = '{value}' BEGIN SELECT RAISE(ABORT, 'forced failure'); END"
+            )
+        conn.commit()
+        conn.close()
+
+
+class TestCreateRelationshipsBulk(GraphBulkTestCase):
+
+    RAW_RELATIONS = [
+        {"subject": "user_admin", "predicate": "ama", "object": "food:pizza", "source_sentence": "Amo la pizza"},
+        {"subject": "user_admin", "predicate": "lavora_per", "object": "org:acme"},
+        # Stessa relazione ripetuta: rinforzata dalle occorrenze successive
+        {"subject": "user_admin", "predicate": "ama", "object": "food:pizza", "source_sentence": "Adoro la pizza"},
+        # Stessa chiave (sentiment) con valence opposta: Last Value Wins
+        {"subject": "user_admin", "predicate": "odia", "object": "food:pizza"},
+        {"subject": "person:anna", "predicate": "vive_a", "object": "place:roma"},
+    ]
+
+    def test_bulk_matches_single_calls(self):
+        single, single_db = self.make_service("single")
+        bulk, bulk_db = self.make_service("bulk")
+
+        # Relazione già presente prima del batch in entrambi i database
+        existing = {"subject": "person:anna", "predicate": "vive_a", "object": "place:roma"}
+        self.run_async(single.create_relationship_from_raw("u", existing))
+        self.run_async(bulk.create_relationship_from_raw("u", existing))
+
+        single_results = [
+            self.run_async(single.create_relationship_from_raw("u", raw)) for raw in self.RAW_RELATIONS
+        ]
+        bulk_results = self.run_async(bulk.create_relationships_from_raw_bulk("u", self.RAW_RELATIONS))
+
+        self.assertEqual(self.snapshot(bulk_db), self.snapshot(single_db))
+        self.assertEqual([_stable(r) for r in bulk_results], [_stable(r) for r in single_results])
+        self.assertEqual(bulk_results[0]["id"], bulk_results[2]["id"])
+        self.assertEqual(bulk_results[3]["evidence_count"], 3)
+
+    def test_failing_item_rolls_back_whole_batch(self):
+        service, db_file = self.make_service("rollback")
+        before = self.snapshot(db_file)
+        # La riga dell'ultimo elemento fallisce in INSERT: nulla del batch deve restare
+        self.fail_on(db_file, "relationships", "to_entity_id", "place:boom")
+        raw_relations = self.RAW_RELATIONS + [
+            {"subject": "user_admin", "predicate": "vive_a", "object": "place:boom"}
+        ]
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.run_async(service.create_relationships_from_raw_bulk("u", raw_relations))
+
+        self.assertEqual(self.snapshot(db_file), before)
+        # Le entità auto-create nel batch annullato non risultano "viste"
+        self.assertNotIn("food:pizza", service._entity_seen)
+
+    def test_invalid_item_rejected_before_writing(self):
+        service, db_file = self.make_service("invalid")
+        before = self.snapshot(db_file)
+
+        with self.assertRaises(ValueError):
+            self.run_async(service.create_relationships_from_raw_bulk(
+                "u", self.RAW_RELATIONS + [{"subject": "user_admin", "predicate": "ama"}]
+            ))
+
+        self.assertEqual(self.snapshot(db_file), before)
+
+
+class TestReinforceRelationshipsBulk(GraphBulkTestCase):
+
+    SEED = [
+        {"subject": "user_admin", "predicate": "ama", "object": "food:pizza"},
+        {"subject": "user_admin", "predicate": "lavora_per", "object": "org:acme"},
+    ]
+
+    def seeded_service(self, name):
+        service, db_file = self.make_service(name)
+        rel_ids = [
+            self.run_async(service.create_relationship_from_raw("u", raw))["id"] for raw in self.SEED
+        ]
+        return service, db_file, rel_ids
+
+    @staticmethod
+    def reinforcements(rel_ids):
+        pizza, acme = rel_ids
+        return [
+            {"rel_id": pizza, "strength_boost": 0.2},
+            {"rel_id": acme, "source_sentence": "Lavoro ancora per Acme"},
+            # Ripetuta nello stesso batch: rinforzata due volte
+            {"rel_id": pizza, "strength_boost": 0.05, "source_sentence": "Sempre pizza"},
+            {"rel_id": "rel:missing"},
+        ]
+
+    def test_bulk_matches_single_calls(self):
+        single, single_db, single_ids = self.seeded_service("single")
+        bulk, bulk_db, bulk_ids = self.seeded_service("bulk")
+
+        single_results = [
+            self.run_async(single.reinforce_relationship(
+                item["rel_id"], item.get("strength_boost", 0.1), item.get("source_sentence")
+            ))
+            for item in self.reinforcements(single_ids)
+        ]
+        bulk_results = self.run_async(bulk.reinforce_relationships_bulk(self.reinforcements(bulk_ids)))
+
+        self.assertEqual(self.snapshot(bulk_db), self.snapshot(single_db))
+        self.assertEqual([_stable(r) for r in bulk_results], [_stable(r) for r in single_results])
+        self.assertIsNone(bulk_results[3])
+
+    def test_failing_item_rolls_back_whole_batch(self):
+        service, db_file, rel_ids = self.seeded_service("rollback")
+        before = self.snapshot(db_file)
+        self.fail_on(db_file, "relationships", "source_sentence", "boom")
+        reinforcements = self.reinforcements(rel_ids) + [{"rel_id": rel_ids[1], "source_sentence": "boom"}]
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.run_async(service.reinforce_relationships_bulk(reinforcements))
+
+        self.assertEqual(self.snapshot(db_file), before)
+
+
+class TestCreateEntitiesBulk(GraphBulkTestCase):
+
+    ENTITIES = [
+        {"name": "Anna Rossi", "entity_type": "person", "aliases": ["Anna"], "confidence": 0.7},
+        {"name": "Acme", "entity_type": "organization", "identifiers": {"vat": "IT123"}},
+        # Stessa entità ripetuta: arricchita (alias, attributi, confidence) in ordine
+        {"name": "Anna Rossi", "entity_type": "person", "aliases": ["Annina"],
+         "attributes": {"city": "Roma"}, "confidence": 0.9},
+        {"name": "Roma", "entity_type": "location"},
+    ]
+
+    def test_bulk_matches_single_calls(self):
+        single, single_db = self.make_service("single")
+        bulk, bulk_db = self.make_service("bulk")
+
+        # Entità già presente prima del batch in entrambi i database
+        self.run_async(single.create_entity(name="Acme", entity_type="organization", aliases=["ACME"]))
+        self.run_async(bulk.create_entity(name="Acme", entity_type="organization", aliases=["ACME"]))
+
+        single_results = [self.run_async(single.create_entity(**item)) for item in self.ENTITIES]
+        bulk_results = self.run_async(bulk.create_entities_bulk(self.ENTITIES))
+
+        self.assertEqual(self.snapshot(bulk_db), self.snapshot(single_db))
+        self.assertEqual([_stable(r) for r in bulk_results], [_stable(r) for r in single_results])
+
+    def test_failing_item_rolls_back_whole_batch(self):
+        service, db_file = self.make_service("rollback")
+        before = self.snapshot(db_file)
+        self.fail_on(db_file, "entities", "primary_name", "Boom")
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.run_async(service.create_entities_bulk(
+                self.ENTITIES + [{"name": "Boom", "entity_type": "person"}]
+            ))
+
+        self.assertEqual(self.snapshot(db_file), before)
+
+
+if __name__ == "__main__":
+    unittest.main()